@@ -20,135 +20,288 @@ Antigravity OS  |  Axiom Synthesizer Agent
   - 已存在于地图中的 Axiom 标题会被自动跳过（幂等）
 """
 
+import os
 import re
+import logging
+import logging.handlers
+import asyncio
 import json
+import random
+import hashlib
+import importlib.util
 import argparse
+import functools
 import httpx
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
 from agos.config import (
-    openrouter_api_key, vault_path, inbox_folder,
-    min_score_threshold, model_synthesizer, synth_max_batch,
+    openrouter_api_key, openai_api_key, inbox_folder,
+    min_score_threshold, model_synthesizer, model_synthesizer_batch,
+    synth_max_batch, synth_pending_batch_file,
 )
+from agos import fastjson
+from agos.log import CurrentStreamHandler
 from agos.notify import send_message
-from agos.frontmatter import parse_frontmatter
+from agos.frontmatter import read_frontmatter
+
+from skills.obsidian_bridge.bridge import get_vault, update_frontmatter
+
+# ── 日志 ─────────────────────────────────────────────────────────
+# stdout 由 cron/scheduler 重定向到日志文件；经 MemoryHandler 攒批写出，
+# 避免并发扫描时每条日志一次 write() 系统调用。WARNING 及以上立即刷出，入口函数返回时显式 flush。
+_LOGGER = logging.getLogger("axiom_synthesizer")
+if not _LOGGER.handlers:
+    _LOGGER.setLevel(logging.INFO)
+    _stream_handler = CurrentStreamHandler("stdout")
+    _stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    _LOGGER.addHandler(
+        logging.handlers.MemoryHandler(capacity=256, flushLevel=logging.WARNING, target=_stream_handler)
+    )
+    _LOGGER.propagate = False
 
-from skills.obsidian_bridge.bridge import (
-    get_vault, list_notes, read_note, write_note, append_note,
-    update_frontmatter,
-)
+
+def _flush_log_on_return(fn):
+    """入口函数结束（含异常）时刷出缓冲日志，不依赖解释器退出时的 logging.shutdown。"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            for handler in _LOGGER.handlers:
+                handler.flush()
+    return wrapper
 
 # ── 配置 ─────────────────────────────────────────────────────────
 MAP_FILE = "000 认知架构地图.md"
 INBOX_FOLDER = inbox_folder()
 MIN_AXIOM_SCORE = min_score_threshold()
 MAX_AXIOMS_BATCH = synth_max_batch()
+SCAN_WORKERS = 16
+NOTE_WRITE_WORKERS = 8
+LLM_CONCURRENCY = 8  # 同时在途的分片请求上限，避免触发 OpenRouter RPM 限制
+LLM_MAX_ATTEMPTS = 5
+LLM_RETRY_BASE_DELAY = 1.0
+LLM_RETRY_MAX_DELAY = 30.0
+# httpx 的 HTTP/2 需要可选依赖 h2（pip install "httpx[http2]"）
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_ABSTRACT_RE = re.compile(r">\s*\[!abstract\][^\n]*\n>\s*(.+?)(?:\n|$)")
+_ABSTRACT_FALLBACK_RE = re.compile(r"\[!abstract\].*?\n>\s*(.+?)(?:\n|$)")
+_AXIOM_TITLE_RE = re.compile(r"\[\[Axiom - ([^\]]+)\]\]")
+_BULLET_LINE_RE = re.compile(r"\d+\.\s+\*\*")
+_JSON_EXTRACT_RE = re.compile(r"```(?:json)?\s*(\{.*\}|\[.*\])\s*```|(\{.*\}|\[.*\])", re.DOTALL)
+
+# 近似去重：字符 3-gram 的 MinHash 签名 + LSH 分桶（16 band × 4 row）
+NEAR_DUP_THRESHOLD = 0.85
+_MINHASH_PERM = 64
+_LSH_BANDS = 16
+_MINHASH_PRIME = (1 << 61) - 1
+_MINHASH_SEED = random.Random(0x5EED)
+_MINHASH_PARAMS = [
+    (_MINHASH_SEED.randrange(1, _MINHASH_PRIME), _MINHASH_SEED.randrange(0, _MINHASH_PRIME))
+    for _ in range(_MINHASH_PERM)
+]
+_NON_WORD_RE = re.compile(r"[\W_]+")
+_WHITESPACE_RE = re.compile(r"\s+")
 
 
 # ── Step 1: 收集碎片公理 ─────────────────────────────────────────
 def _warn(scope: str, detail: str, err: Exception | None = None):
     if err is None:
-        print(f"  ⚠️ [{scope}] {detail}")
+        _LOGGER.warning("  ⚠️ [%s] %s", scope, detail)
     else:
-        print(f"  ⚠️ [{scope}] {detail}: {err}")
+        _LOGGER.warning("  ⚠️ [%s] %s: %s", scope, detail, err)
 
 
 
-def collect_raw_axioms() -> list[dict]:
-    """
-    扫描 Inbox 中所有 BouncerDump / WebClip 笔记，
-    提取 [!abstract] callout 中的公理文本。
-    跳过已打标 synthesized: true 的笔记。
-    """
-    vault = get_vault()
-    inbox_dir = vault / INBOX_FOLDER
-    raw = []
-    seen_axioms: set[str] = set()
+def _dedup_key(text: str) -> str:
+    """精确去重键：小写 + 折叠空白后取前 80 字符。"""
+    return _WHITESPACE_RE.sub(" ", text.strip().lower())[:80]
 
-    def _try_extract(f: Path):
-        try:
-            content = f.read_text(encoding="utf-8")
-            fm, body = parse_frontmatter(content)
+
+def _minhash(text: str) -> tuple[int, ...]:
+    """文本 → MinHash 签名。忽略大小写、空白与标点；归一化后为空时返回空元组。"""
+    norm = _NON_WORD_RE.sub("", text.lower())
+    if not norm:
+        return ()
+    grams = {norm[i:i + 3] for i in range(max(1, len(norm) - 2))}
+    hashes = [
+        int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big")
+        for g in grams
+    ]
+    return tuple(min((a * h + b) % _MINHASH_PRIME for h in hashes) for a, b in _MINHASH_PARAMS)
+
+
+class _NearDupIndex:
+    """MinHash + LSH 近似去重索引：只与同桶候选比较签名，避免两两全量比对。"""
+
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD):
+        self.threshold = threshold
+        self._rows = _MINHASH_PERM // _LSH_BANDS
+        self._buckets: dict[tuple, list[int]] = {}
+        self._signatures: list[tuple[int, ...]] = []
+
+    def _bands(self, sig: tuple[int, ...]) -> list[tuple]:
+        r = self._rows
+        return [(i, sig[i * r:(i + 1) * r]) for i in range(_LSH_BANDS)]
+
+    def _is_duplicate(self, sig: tuple[int, ...]) -> bool:
+        candidates: set[int] = set()
+        for band in self._bands(sig):
+            candidates.update(self._buckets.get(band, ()))
+        for idx in candidates:
+            same = sum(1 for x, y in zip(sig, self._signatures[idx]) if x == y)
+            if same / _MINHASH_PERM >= self.threshold:
+                return True
+        return False
+
+    def add(self, text: str) -> bool:
+        """加入索引；若与已有文本近似重复则不加入并返回 False。"""
+        sig = _minhash(text)
+        if not sig:
+            return True
+        if self._is_duplicate(sig):
+            return False
+        idx = len(self._signatures)
+        self._signatures.append(sig)
+        for band in self._bands(sig):
+            self._buckets.setdefault(band, []).append(idx)
+        return True
+
+
+def _drop_near_duplicates(synthesized: list, existing_titles: set[str]) -> list:
+    """剔除与已有地图标题或彼此之间近似重复的合成结果。"""
+    index = _NearDupIndex()
+    for title in sorted(existing_titles):
+        index.add(title)
+    return [
+        a for a in synthesized
+        if not isinstance(a, dict) or index.add(str(a.get("name", "")))
+    ]
+
+
+def _extract_axiom(f: Path) -> dict | None:
+    """解析单篇笔记，返回公理碎片；不满足条件时返回 None（无共享状态，可并发调用）。"""
+    try:
+        with f.open("r", encoding="utf-8") as fh:
+            # 先只读 frontmatter：绝大多数笔记在这里就被淘汰，无需读正文
+            fm, header = read_frontmatter(fh)
 
             # 增量逻辑：跳过已合成笔记
             if fm.get("synthesized") is True:
-                return
+                return None
 
             tags = fm.get("tags", [])
             if isinstance(tags, str):
                 tags = [tags]
             if not any(t in tags for t in ["BouncerDump", "WebClip", "PDFIngested"]):
-                return
+                return None
             score = float(fm.get("score", 0))
             if score < MIN_AXIOM_SCORE:
-                return
-
-            # 匹配实际格式
-            axiom = ""
-            m = re.search(
-                r">\s*\[!abstract\][^\n]*\n>\s*(.+?)(?:\n|$)",
-                body
-            )
-            if m:
-                axiom = m.group(1).strip()
-
-            if not axiom:
-                m2 = re.search(r"\[!abstract\].*?\n>\s*(.+?)(?:\n|$)", content)
-                if m2:
-                    axiom = m2.group(1).strip()
-
-            if not axiom or axiom in ("待提炼", ""):
-                return
-
-            # 去重
-            key = axiom[:80]
-            if key in seen_axioms:
-                return
-            seen_axioms.add(key)
-
-            raw.append({
-                "axiom": axiom,
-                "score": score,
-                "source": str(fm.get("source", "")),
-                "title": str(fm.get("title", f.stem)),
-                "path": str(f)
-            })
-        except Exception as e:
-            _warn("synthesizer/collect", f"解析笔记失败: {f}", e)
+                return None
+
+            body = fh.read()
+        content = header + body
 
-    def _scan_dir(d: Path):
-        for f in d.iterdir():
-            if f.is_dir():
-                _scan_dir(f)
-            elif f.suffix == ".md":
-                _try_extract(f)
+        # 匹配实际格式
+        axiom = ""
+        m = _ABSTRACT_RE.search(body)
+        if m:
+            axiom = m.group(1).strip()
 
-    if inbox_dir.exists():
-        _scan_dir(inbox_dir)
+        if not axiom:
+            m2 = _ABSTRACT_FALLBACK_RE.search(content)
+            if m2:
+                axiom = m2.group(1).strip()
 
-    print(f"  📚 共收集到 {len(raw)} 条新公理碎片（score ≥ {MIN_AXIOM_SCORE}，增量扫描）")
+        if not axiom or axiom in ("待提炼", ""):
+            return None
+
+        return {
+            "axiom": axiom,
+            "score": score,
+            "source": str(fm.get("source", "")),
+            "title": str(fm.get("title", f.stem)),
+            "path": str(f)
+        }
+    except Exception as e:
+        _warn("synthesizer/collect", f"解析笔记失败: {f}", e)
+        return None
+
+
+def _iter_markdown_files(root: Path):
+    """用 os.scandir + 显式栈遍历目录，逐个产出 .md 文件；DirEntry 自带类型信息，无需额外 stat。"""
+    if not root.is_dir():
+        return
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".md"):
+                    yield Path(entry.path)
+
+
+def collect_raw_axioms(vault: Path | None = None) -> list[dict]:
+    """
+    扫描 Inbox 中所有 BouncerDump / WebClip 笔记，
+    提取 [!abstract] callout 中的公理文本。
+    跳过已打标 synthesized: true 的笔记。
+
+    读盘解析在线程池中并发执行；去重在主线程中按路径顺序归并，结果与遍历顺序无关。
+    """
+    vault = vault or get_vault()
+    inbox_dir = vault / INBOX_FOLDER
+    raw = []
+    seen_axioms: set[str] = set()
+    near_dups = _NearDupIndex()
+
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        candidates = [c for c in executor.map(_extract_axiom, _iter_markdown_files(inbox_dir)) if c]
+    candidates.sort(key=lambda c: c["path"])
+
+    for item in candidates:
+        # 去重：先精确键，再 MinHash 近似
+        key = _dedup_key(item["axiom"])
+        if key in seen_axioms:
+            continue
+        seen_axioms.add(key)
+        if not near_dups.add(item["axiom"]):
+            continue
+        raw.append(item)
+
+    _LOGGER.info("  📚 共收集到 %s 条新公理碎片（score ≥ %s，增量扫描）", len(raw), MIN_AXIOM_SCORE)
     return raw
 
 
 def mark_as_synthesized(paths: list[str]):
     """将已提取公理的笔记打上 synthesized: true 标记。"""
-    print(f"  标记 {len(paths)} 条笔记为已合成...")
-    for p in paths:
-        update_frontmatter(p, {"synthesized": True})
+    _LOGGER.info("  标记 %s 条笔记为已合成...", len(paths))
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        list(executor.map(lambda p: update_frontmatter(p, {"synthesized": True}), paths))
 
 
 # ── Step 2: 读取现有地图（防止重复追加）────────────────────────
 
-def read_map() -> str:
-    map_path = get_vault() / MAP_FILE
-    if map_path.exists():
-        return map_path.read_text(encoding="utf-8")
-    return ""
-
-
-def extract_existing_axiom_titles(map_content: str) -> set[str]:
-    return set(re.findall(r"\[\[Axiom - ([^\]]+)\]\]", map_content))
+def scan_map(map_path: Path) -> tuple[set[str], int]:
+    """
+    逐行流式扫描地图，返回 (已有 Axiom 标题, 编号条目数)。
+    先用 `in` / 首字符做廉价预筛，绝大多数行不会进入正则。
+    """
+    titles: set[str] = set()
+    bullets = 0
+    if not map_path.exists():
+        return titles, bullets
+    with map_path.open("r", encoding="utf-8") as fh:
+        for line in fh:
+            if line[:1].isdigit() and _BULLET_LINE_RE.match(line):
+                bullets += 1
+            if "[[Axiom - " in line:
+                titles.update(_AXIOM_TITLE_RE.findall(line))
+    return titles, bullets
 
 
 # ── Step 3: LLM 合成 ─────────────────────────────────────────────
@@ -182,8 +335,196 @@ def synthesize_with_llm(raw_axioms: list[dict], existing_titles: set[str]) -> tu
     return result["synthesized"], result["processed_paths"]
 
 
+def _build_prompt(shard: list[dict], existing_titles: set[str]) -> str:
+    llm_batch = [{"axiom": a["axiom"], "title": a["title"]} for a in shard]
+    return SYNTHESIS_PROMPT.format(
+        existing="\n".join(f"- {t}" for t in sorted(existing_titles)) or "(无)",
+        raw_axioms=fastjson.dumps(llm_batch, indent=True),
+    )
+
+
+def _parse_llm_content(raw_out: str) -> list:
+    """
+    LLM 文本输出 → 公理列表。兼容 {"items": [...]} 包裹；非法 JSON 抛 json.JSONDecodeError。
+    response_format=json_object 生效时直接解析；否则再从 ```json 代码块或正文中截取 JSON。
+    """
+    try:
+        parsed = fastjson.loads(raw_out)
+    except json.JSONDecodeError:
+        m = _JSON_EXTRACT_RE.search(raw_out)
+        if not m:
+            raise
+        parsed = fastjson.loads(m.group(1) or m.group(2))
+    if isinstance(parsed, dict):
+        for v in parsed.values():
+            if isinstance(v, list):
+                parsed = v
+                break
+        else:
+            parsed = []
+    return parsed if isinstance(parsed, list) else []
+
+
+def _build_shards(raw_axioms: list[dict]) -> list[list[dict]]:
+    """碎片已在 collect_raw_axioms 中去重，这里只按 MAX_AXIOMS_BATCH 切片。"""
+    size = max(1, MAX_AXIOMS_BATCH)
+    return [raw_axioms[i:i + size] for i in range(0, len(raw_axioms), size)] or [[]]
+
+
+def _merge_shard_results(results: list[dict], existing_titles: set[str]) -> dict:
+    """合并各分片结果：至少一个分片成功即视为成功，全部失败时返回首个分片的错误。"""
+    succeeded = [r for r in results if r["ok"]]
+    if not succeeded:
+        return results[0]
+    if len(succeeded) < len(results):
+        _warn("synthesizer/llm", f"{len(results) - len(succeeded)}/{len(results)} 个分片合成失败，下次运行重试")
+
+    synthesized = _drop_near_duplicates(
+        [a for r in succeeded for a in r["synthesized"]],
+        existing_titles,
+    )
+    _LOGGER.info("  ✅ 合成出 %s 条候选公理", len(synthesized))
+    return {
+        "ok": True,
+        "synthesized": synthesized,
+        "processed_paths": [p for r in succeeded for p in r["processed_paths"]],
+        "error_type": "",
+        "error_message": "",
+        "error_context": {},
+    }
+
+
+def _retry_delay(attempt: int) -> float:
+    """第 attempt 次重试前的等待秒数：指数退避 + 随机抖动，封顶 LLM_RETRY_MAX_DELAY。"""
+    delay = LLM_RETRY_BASE_DELAY * (2 ** (attempt - 1)) + random.uniform(0, LLM_RETRY_BASE_DELAY)
+    return min(delay, LLM_RETRY_MAX_DELAY)
+
+
+async def _synthesize_shard(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    shard: list[dict],
+    existing_titles: set[str],
+    api_key: str,
+    model: str,
+) -> dict:
+    """
+    提交单个分片给 LLM，返回与 synthesize_with_llm_result 相同结构的结果。
+    429 / 5xx / 网络错误 / 非法 JSON 输出会退避重试，最多 LLM_MAX_ATTEMPTS 次。
+    """
+    processed_paths = [a["path"] for a in shard if "path" in a]
+    prompt = _build_prompt(shard, existing_titles)
+
+    error: dict = {}
+    for attempt in range(LLM_MAX_ATTEMPTS):
+        if attempt:
+            await asyncio.sleep(_retry_delay(attempt))
+        try:
+            async with semaphore:
+                resp = await client.post(
+                    "https://openrouter.ai/api/v1/chat/completions",
+                    headers={
+                        "Authorization": f"Bearer {api_key}",
+                        "Content-Type": "application/json",
+                        "HTTP-Referer": "https://github.com/huanghuiqiang/AntigravityOS",
+                        "X-Title": "Antigravity Axiom Synthesizer",
+                    },
+                    json={
+                        "model": model,
+                        "messages": [{"role": "user", "content": prompt}],
+                        "response_format": {"type": "json_object"},
+                    },
+                )
+
+            if resp.status_code != 200:
+                msg = f"LLM 响应异常: HTTP {resp.status_code}"
+                _warn("synthesizer/llm", msg)
+                error = {
+                    "ok": False,
+                    "synthesized": [],
+                    "processed_paths": processed_paths,
+                    "error_type": "llm_http_error",
+                    "error_message": msg,
+                    "error_context": {"status_code": resp.status_code, "body": resp.text[:500]},
+                }
+                if resp.status_code == 429 or resp.status_code >= 500:
+                    continue
+                return error
+
+            raw_out = fastjson.loads(resp.content)["choices"][0]["message"]["content"]
+            try:
+                parsed = _parse_llm_content(raw_out)
+            except json.JSONDecodeError as e:
+                _warn("synthesizer/llm", "LLM 输出不是合法 JSON", e)
+                error = {
+                    "ok": False,
+                    "synthesized": [],
+                    "processed_paths": processed_paths,
+                    "error_type": "llm_invalid_json",
+                    "error_message": str(e),
+                    "error_context": {"body": raw_out[:500]},
+                }
+                continue
+
+            return {
+                "ok": True,
+                "synthesized": parsed,
+                "processed_paths": processed_paths,
+                "error_type": "",
+                "error_message": "",
+                "error_context": {},
+            }
+
+        except httpx.TransportError as e:
+            _warn("synthesizer/llm", f"LLM 请求失败（第 {attempt + 1}/{LLM_MAX_ATTEMPTS} 次）", e)
+            error = {
+                "ok": False,
+                "synthesized": [],
+                "processed_paths": processed_paths,
+                "error_type": "llm_request_exception",
+                "error_message": str(e),
+                "error_context": {},
+            }
+        except Exception as e:
+            _warn("synthesizer/llm", "LLM 合成出错", e)
+            return {
+                "ok": False,
+                "synthesized": [],
+                "processed_paths": processed_paths,
+                "error_type": "llm_request_exception",
+                "error_message": str(e),
+                "error_context": {},
+            }
+
+    return error
+
+
+async def _synthesize_shards(
+    shards: list[list[dict]],
+    existing_titles: set[str],
+    api_key: str,
+    model: str,
+) -> list[dict]:
+    """
+    共享一个 AsyncClient 并发提交所有分片，结果顺序与 shards 一致。
+    安装了 h2 时启用 HTTP/2，所有分片复用同一 TLS 连接多路传输。
+    """
+    semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+    limits = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+    async with httpx.AsyncClient(http2=_HTTP2_AVAILABLE, timeout=60.0, limits=limits) as client:
+        return await asyncio.gather(*[
+            _synthesize_shard(client, semaphore, shard, existing_titles, api_key, model)
+            for shard in shards
+        ])
+
+
 def synthesize_with_llm_result(raw_axioms: list[dict], existing_titles: set[str]) -> dict:
     """
+    按 MAX_AXIOMS_BATCH 将碎片切成多个分片，并发提交 LLM 后合并结果。
+
+    部分分片失败时仍返回 ok=True，processed_paths 只包含成功分片的笔记，
+    失败分片的碎片留待下次运行重试；全部失败时返回首个分片的错误。
+
     结构化返回：
       {
         "ok": bool,
@@ -206,115 +547,248 @@ def synthesize_with_llm_result(raw_axioms: list[dict], existing_titles: set[str]
             "error_context": {},
         }
 
-    unique_axioms = []
-    seen = set()
-    for a in raw_axioms:
-        key = a["axiom"][:60]
-        if key not in seen:
-            seen.add(key)
-            unique_axioms.append(a)
-
-    batch = unique_axioms[:MAX_AXIOMS_BATCH]
-    processed_paths = [a["path"] for a in batch if "path" in a]
+    shards = _build_shards(raw_axioms)
 
     model = model_synthesizer()
-    print(f"  🧠 提交 {len(batch)} 条碎片给 {model} 合成...")
+    _LOGGER.info("  🧠 提交 %s 条碎片（%s 个分片）给 %s 合成...", sum(len(x) for x in shards), len(shards), model)
 
-    llm_batch = [{"axiom": a["axiom"], "title": a["title"]} for a in batch]
+    results = asyncio.run(_synthesize_shards(shards, existing_titles, api_key, model))
+    return _merge_shard_results(results, existing_titles)
 
-    prompt = SYNTHESIS_PROMPT.format(
-        existing="\n".join(f"- {t}" for t in sorted(existing_titles)) or "(无)",
-        raw_axioms=json.dumps(llm_batch, ensure_ascii=False, indent=2),
-    )
 
-    try:
-        with httpx.Client(timeout=60.0) as client:
-            resp = client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "https://github.com/huanghuiqiang/AntigravityOS",
-                    "X-Title": "Antigravity Axiom Synthesizer",
-                },
-                json={
-                    "model": model,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "response_format": {"type": "json_object"},
-                },
-            )
+# ── Step 3b: Batch API（离线合成，成本减半，≤24h 回收）────────────
 
-        if resp.status_code != 200:
-            msg = f"LLM 响应异常: HTTP {resp.status_code}"
-            _warn("synthesizer/llm", msg)
-            return {
-                "ok": False,
-                "synthesized": [],
-                "processed_paths": processed_paths,
-                "error_type": "llm_http_error",
-                "error_message": msg,
-                "error_context": {"status_code": resp.status_code, "body": resp.text[:500]},
-            }
+def _openai_client():
+    # Batch 模式专用；延迟导入，常规同步路径不加载 openai SDK
+    from openai import OpenAI
+
+    return OpenAI(api_key=openai_api_key())
 
-        raw_out = resp.json()["choices"][0]["message"]["content"]
-        clean = raw_out.strip().lstrip("```json").lstrip("```").rstrip("```").strip()
 
-        parsed = json.loads(clean)
-        if isinstance(parsed, dict):
-            for v in parsed.values():
-                if isinstance(v, list):
-                    parsed = v
-                    break
-            else:
-                parsed = []
+def submit_batch(raw_axioms: list[dict], existing_titles: set[str], dry_run: bool = False) -> dict:
+    """
+    把所有分片写成一个 JSONL 提交到 OpenAI Batch API，并将 batch_id 与各分片
+    对应的笔记路径持久化到 synth_pending_batch_file()，由 collect_batch() 回收。
 
-        print(f"  ✅ 合成出 {len(parsed)} 条候选公理")
+    返回：{"ok": bool, "batch_id": str, "shards": int, "error_type": str, "error_message": str}
+    """
+    if not openai_api_key():
+        _warn("synthesizer/batch", "缺少 OPENAI_API_KEY")
         return {
-            "ok": True,
-            "synthesized": parsed if isinstance(parsed, list) else [],
-            "processed_paths": processed_paths,
-            "error_type": "",
-            "error_message": "",
-            "error_context": {},
+            "ok": False,
+            "batch_id": "",
+            "shards": 0,
+            "error_type": "missing_api_key",
+            "error_message": "未找到 OPENAI_API_KEY",
         }
 
+    shards = _build_shards(raw_axioms)
+    model = model_synthesizer_batch()
+    requests_jsonl = "\n".join(
+        fastjson.dumps(
+            {
+                "custom_id": f"shard-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "messages": [{"role": "user", "content": _build_prompt(shard, existing_titles)}],
+                    "response_format": {"type": "json_object"},
+                },
+            }
+        )
+        for i, shard in enumerate(shards)
+    )
+
+    if dry_run:
+        _LOGGER.info("  [DRY RUN] 将提交 %s 个分片到 Batch API（%s）", len(shards), model)
+        return {"ok": True, "batch_id": "", "shards": len(shards), "error_type": "", "error_message": ""}
+
+    try:
+        client = _openai_client()
+        uploaded = client.files.create(
+            file=("axiom_synthesizer_batch.jsonl", requests_jsonl.encode("utf-8")),
+            purpose="batch",
+        )
+        batch = client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
     except Exception as e:
-        _warn("synthesizer/llm", "LLM 合成出错", e)
+        _warn("synthesizer/batch", "提交 Batch 失败", e)
         return {
             "ok": False,
-            "synthesized": [],
-            "processed_paths": processed_paths,
-            "error_type": "llm_request_exception",
+            "batch_id": "",
+            "shards": len(shards),
+            "error_type": "llm_batch_submit_error",
             "error_message": str(e),
-            "error_context": {},
         }
 
+    pending = {
+        "batch_id": batch.id,
+        "model": model,
+        "submitted_at": datetime.now().isoformat(timespec="seconds"),
+        "total_raw": len(raw_axioms),
+        "shards": {
+            f"shard-{i}": [a["path"] for a in shard if "path" in a]
+            for i, shard in enumerate(shards)
+        },
+    }
+    synth_pending_batch_file().write_text(json.dumps(pending, ensure_ascii=False, indent=2), encoding="utf-8")
+    _LOGGER.info("  📤 已提交 Batch %s（%s 个分片），稍后运行 --collect-batch 回收", batch.id, len(shards))
+    return {"ok": True, "batch_id": batch.id, "shards": len(shards), "error_type": "", "error_message": ""}
+
+
+def collect_batch_result(existing_titles: set[str], dry_run: bool = False) -> tuple[dict | None, int]:
+    """
+    查询待回收的 Batch。仍在处理中（或没有待回收任务）时返回 (None, 0)；
+    否则返回 (与 synthesize_with_llm_result 同结构的结果, 原始碎片数)。
+    pending 文件由 collect_batch 在落盘完成后删除，中途失败可重新回收。
+    Batch 整体失败时 processed_paths 为空，碎片留待下次重新提交。
+    """
+    pending_file = synth_pending_batch_file()
+    if not pending_file.exists():
+        _LOGGER.info("  ℹ️  没有待回收的 Batch")
+        return None, 0
+
+    pending = json.loads(pending_file.read_text(encoding="utf-8"))
+    batch_id = pending["batch_id"]
+    total_raw = int(pending.get("total_raw", 0))
+    client = _openai_client()
+    batch = client.batches.retrieve(batch_id)
+
+    if batch.status in ("validating", "in_progress", "finalizing", "cancelling"):
+        _LOGGER.info("  ⏳ Batch %s 仍在处理中（status=%s）", batch_id, batch.status)
+        return None, 0
+
+    if not batch.output_file_id:
+        msg = f"Batch {batch_id} 未产出结果（status={batch.status}）"
+        _warn("synthesizer/batch", msg)
+        return {
+            "ok": False,
+            "synthesized": [],
+            "processed_paths": [],
+            "error_type": "llm_batch_failed",
+            "error_message": msg,
+            "error_context": {"batch_id": batch_id, "status": batch.status},
+        }, total_raw
+
+    # expired 的 Batch 也可能带有部分结果，统一按行解析
+    results = []
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            item = fastjson.loads(line)
+        except ValueError as e:
+            _warn("synthesizer/batch", "跳过无法解析的结果行", e)
+            continue
+        if not isinstance(item, dict):
+            _warn("synthesizer/batch", f"跳过非对象结果行: {line[:80]}")
+            continue
+        custom_id = item.get("custom_id", "")
+        paths = pending["shards"].get(custom_id, [])
+        response = item.get("response") or {}
+        try:
+            if response.get("status_code") != 200:
+                raise ValueError(f"HTTP {response.get('status_code')}: {item.get('error')}")
+            raw_out = response["body"]["choices"][0]["message"]["content"]
+            results.append({
+                "ok": True,
+                "synthesized": _parse_llm_content(raw_out),
+                "processed_paths": paths,
+                "error_type": "",
+                "error_message": "",
+                "error_context": {},
+            })
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            _warn("synthesizer/batch", f"分片 {custom_id} 结果无效", e)
+            results.append({
+                "ok": False,
+                "synthesized": [],
+                "processed_paths": [],
+                "error_type": "llm_batch_item_error",
+                "error_message": str(e),
+                "error_context": {"batch_id": batch_id, "custom_id": custom_id},
+            })
+
+    if not results:
+        results.append({
+            "ok": False,
+            "synthesized": [],
+            "processed_paths": [],
+            "error_type": "llm_batch_failed",
+            "error_message": f"Batch {batch_id} 输出为空",
+            "error_context": {"batch_id": batch_id, "status": batch.status},
+        })
+    return _merge_shard_results(results, existing_titles), total_raw
+
 
 # ── Step 4: 更新认知地图 ─────────────────────────────────────────
 
-def update_map(synthesized: list[dict], dry_run: bool = False) -> list[str]:
+class _TitleIndex:
+    """
+    已有标题的包含关系查询（忽略大小写）：name 是某个标题的子串，或某个标题是 name 的子串。
+    与逐个标题做双向 `in` 等价，但单次查询开销与已有标题数量基本无关。
+    """
+
+    def __init__(self, titles: set[str]):
+        self._norm = {t.lower() for t in titles}
+        self._lengths = sorted({len(t) for t in self._norm})
+        # \x00 不会出现在标题中，拼接后整体做一次子串搜索不会跨标题误匹配
+        self._joined = "\x00".join(self._norm)
+
+    def overlaps(self, name: str) -> bool:
+        if not self._norm:
+            return False
+        n = name.lower()
+        if n in self._norm or n in self._joined:
+            return True
+        for size in self._lengths:
+            if size > len(n):
+                break
+            if any(n[i:i + size] in self._norm for i in range(len(n) - size + 1)):
+                return True
+        return False
+
+
+def _append_once(path: Path, text: str):
+    """O_APPEND 打开并整块 os.write：不经 Python 缓冲层，写入位置由内核保证在文件末尾。"""
+    data = text.encode("utf-8")
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+
+
+def update_map(
+    synthesized: list[dict],
+    existing: set[str],
+    bullet_count: int,
+    map_path: Path,
+    dry_run: bool = False,
+) -> list[str]:
+    """existing / bullet_count 来自本次运行开头的 scan_map，不再读取地图。"""
     if not synthesized:
         return []
 
-    map_path = get_vault() / MAP_FILE
-    map_content = read_map()
-    existing = extract_existing_axiom_titles(map_content)
-
+    index = _TitleIndex(existing)
     new_ones = [
         a for a in synthesized
-        if a.get("is_new", True)
-        and not any(
-            a["name"].lower() in t.lower() or t.lower() in a["name"].lower()
-            for t in existing
-        )
+        if a.get("is_new", True) and not index.overlaps(a["name"])
     ]
 
     if not new_ones:
-        print("  ℹ️  所有合成公理已存在于地图，无需追加")
+        _LOGGER.info("  ℹ️  所有合成公理已存在于地图，无需追加")
         return []
 
     today = datetime.now().strftime("%Y-%m-%d")
-    num_start = len(re.findall(r"^\d+\.\s+\*\*", map_content, re.MULTILINE)) + 1
+    num_start = bullet_count + 1
     new_lines = [
         f"\n\n---\n\n## 🆕 Synthesizer 追加 ({today})\n"
         f"> 由 Axiom Synthesizer 从 Bouncer 输出中自动提炼\n"
@@ -340,27 +814,42 @@ def update_map(synthesized: list[dict], dry_run: bool = False) -> list[str]:
     append_block = "\n".join(new_lines)
 
     if dry_run:
-        print("\n[DRY RUN] 将追加以下内容到认知地图：")
-        print(append_block)
+        _LOGGER.info("\n[DRY RUN] 将追加以下内容到认知地图：")
+        _LOGGER.info("%s", append_block)
         return written
 
-    with map_path.open("a", encoding="utf-8") as f:
-        f.write(append_block)
+    _append_once(map_path, append_block)
 
-    print(f"  ✅ 已追加 {len(written)} 条新公理到认知地图")
+    _LOGGER.info("  ✅ 已追加 %s 条新公理到认知地图", len(written))
     return written
 
 
 # ── Step 5: 为每条新 Axiom 创建独立笔记 ──────────────────
 
-def create_axiom_notes(synthesized: list[dict], dry_run: bool = False) -> list[str]:
+def _list_filenames(d: Path) -> set[str]:
+    """目录下的文件名（casefold，兼容 macOS 等大小写不敏感文件系统）。"""
+    try:
+        with os.scandir(d) as it:
+            return {entry.name.casefold() for entry in it}
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
+
+
+def create_axiom_notes(synthesized: list[dict], dry_run: bool = False, vault: Path | None = None) -> list[str]:
     created = []
-    
+    vault = vault or get_vault()
+
     # 确定目标文件夹（00_inbox 下的独立文件夹）
-    target_dir = get_vault() / INBOX_FOLDER / "Axioms"
+    target_dir = vault / INBOX_FOLDER / "Axioms"
     if not dry_run:
         target_dir.mkdir(parents=True, exist_ok=True)
 
+    # 一次列目录代替逐条 exists()；同批次内同名公理也只写一次
+    # Backward compatibility: older versions wrote notes into vault root.
+    taken = _list_filenames(target_dir) | _list_filenames(vault)
+    today = datetime.now().strftime("%Y-%m-%d")
+    pending: list[tuple[Path, str]] = []
+
     for axiom in synthesized:
         name = axiom.get("name", "")
         meaning = axiom.get("meaning", "")
@@ -370,14 +859,10 @@ def create_axiom_notes(synthesized: list[dict], dry_run: bool = False) -> list[s
 
         safe_name = re.sub(r'[\\/*?:"<>|]', "", name)[:80].strip()
         filename = f"Axiom - {safe_name}.md"
-        note_path = target_dir / filename
-        legacy_note_path = get_vault() / filename
-
-        # Backward compatibility: older versions wrote notes into vault root.
-        if note_path.exists() or legacy_note_path.exists():
+        if filename.casefold() in taken:
             continue
+        taken.add(filename.casefold())
 
-        today = datetime.now().strftime("%Y-%m-%d")
         src_links = "\n".join(f"- {s}" for s in sources) if sources else "- (自动合成)"
 
         content = f"""---
@@ -405,14 +890,18 @@ created: "{today}"
 ---
 *由 AntigravityOS Axiom Synthesizer 自动生成 · {today}*
 """
-        if not dry_run:
-            note_path.write_text(content, encoding="utf-8")
-            print(f"  📄 创建 Axiom 笔记: {filename}")
-        else:
-            print(f"  [DRY RUN] 将创建: {filename}")
+        pending.append((target_dir / filename, content))
 
-        created.append(str(note_path))
+    if dry_run:
+        for note_path, _ in pending:
+            _LOGGER.info("  [DRY RUN] 将创建: %s", note_path.name)
+    else:
+        with ThreadPoolExecutor(max_workers=NOTE_WRITE_WORKERS) as executor:
+            list(executor.map(lambda pc: pc[0].write_text(pc[1], encoding="utf-8"), pending))
+        for note_path, _ in pending:
+            _LOGGER.info("  📄 创建 Axiom 笔记: %s", note_path.name)
 
+    created.extend(str(note_path) for note_path, _ in pending)
     return created
 
 
@@ -445,70 +934,113 @@ def notify(written: list[str], created_notes: list[str], total_raw: int, dry_run
 
 # ── 主流程 ────────────────────────────────────────────────────────
 
-def main(dry_run: bool = False, create_notes: bool = True):
-    print("=" * 55)
-    print("🧬 [Axiom Synthesizer] 启动...")
-    print(f"   Vault:    {get_vault()}")
-    print(f"   地图:     {MAP_FILE}")
-    print(f"   Dry Run:  {dry_run}")
-    print("=" * 55)
-
-    # 1. 采集碎片
-    raw_axioms = collect_raw_axioms()
-    if not raw_axioms:
-        print("\n⚠️  未收集到有效公理碎片，退出。")
-        return
-
-    # 2. 读现有地图，防重复
-    map_content = read_map()
-    existing_titles = extract_existing_axiom_titles(map_content)
-    print(f"  🗺️  认知地图已有 {len(existing_titles)} 条公理")
-
-    # 3. LLM 合成
-    llm_result = synthesize_with_llm_result(raw_axioms, existing_titles)
+def _print_banner(vault: Path, dry_run: bool):
+    _LOGGER.info("=" * 55)
+    _LOGGER.info("🧬 [Axiom Synthesizer] 启动...")
+    _LOGGER.info("   Vault:    %s", vault)
+    _LOGGER.info("   地图:     %s", MAP_FILE)
+    _LOGGER.info("   Dry Run:  %s", dry_run)
+    _LOGGER.info("=" * 55)
+
+
+def _apply_llm_result(
+    llm_result: dict,
+    total_raw: int,
+    dry_run: bool,
+    create_notes: bool,
+    vault: Path,
+    existing_titles: set[str],
+    bullet_count: int,
+):
+    """LLM 合成之后的落盘流程：更新地图 → 创建笔记 → 标记已合成 → 通知。"""
     synthesized = llm_result["synthesized"]
     processed_paths = llm_result["processed_paths"]
     if not llm_result["ok"]:
-        print(
-            f"\n⚠️  LLM 合成失败: "
-            f"type={llm_result['error_type']} "
-            f"message={llm_result['error_message']}"
+        _LOGGER.info(
+            "\n⚠️  LLM 合成失败: type=%s message=%s",
+            llm_result["error_type"],
+            llm_result["error_message"],
         )
         if not dry_run and processed_paths:
             mark_as_synthesized(processed_paths)
-        notify([], [], len(raw_axioms), dry_run)
+        notify([], [], total_raw, dry_run)
         return
     if not synthesized:
-        print("\n⚠️  LLM 未合成出新公理。")
+        _LOGGER.info("\n⚠️  LLM 未合成出新公理。")
         if not dry_run and processed_paths:
             mark_as_synthesized(processed_paths)
-        notify([], [], len(raw_axioms), dry_run)
+        notify([], [], total_raw, dry_run)
         return
 
     # 4. 更新地图
-    written = update_map(synthesized, dry_run=dry_run)
+    written = update_map(synthesized, existing_titles, bullet_count, vault / MAP_FILE, dry_run=dry_run)
 
     # 5. 创建独立笔记（可选）
     created_notes = []
     if create_notes and written:
-        created_notes = create_axiom_notes(synthesized, dry_run=dry_run)
+        created_notes = create_axiom_notes(synthesized, dry_run=dry_run, vault=vault)
 
     # 6. 标记为已合成（增量关键）
     if not dry_run and processed_paths:
         mark_as_synthesized(processed_paths)
 
     # 7. 推送通知
-    notify(written, created_notes, len(raw_axioms), dry_run)
+    notify(written, created_notes, total_raw, dry_run)
 
     # 8. 汇总输出
-    print("\n" + "=" * 55)
-    print(f"✅ 合成完成")
-    print(f"   原始碎片:  {len(raw_axioms)} 条")
-    print(f"   新增公理:  {len(written)} 条")
-    print(f"   独立笔记:  {len(created_notes)} 个")
-    print("=" * 55)
+    _LOGGER.info("\n" + "=" * 55)
+    _LOGGER.info("✅ 合成完成")
+    _LOGGER.info("   原始碎片:  %s 条", total_raw)
+    _LOGGER.info("   新增公理:  %s 条", len(written))
+    _LOGGER.info("   独立笔记:  %s 个", len(created_notes))
+    _LOGGER.info("=" * 55)
     for name in written:
-        print(f"   ✨ {name}")
+        _LOGGER.info("   ✨ %s", name)
+
+
+@_flush_log_on_return
+def main(dry_run: bool = False, create_notes: bool = True, batch: bool = False):
+    # Vault 与地图路径每次运行只解析一次，向下传递
+    vault = get_vault()
+    map_path = vault / MAP_FILE
+    _print_banner(vault, dry_run)
+
+    # 1. 采集碎片
+    raw_axioms = collect_raw_axioms(vault)
+    if not raw_axioms:
+        _LOGGER.info("\n⚠️  未收集到有效公理碎片，退出。")
+        return
+
+    # 2. 读现有地图，防重复
+    existing_titles, bullet_count = scan_map(map_path)
+    _LOGGER.info("  🗺️  认知地图已有 %s 条公理", len(existing_titles))
+
+    # 3. LLM 合成（--batch：只提交，结果由 collect_batch 回收）
+    if batch:
+        if synth_pending_batch_file().exists():
+            _LOGGER.info("\n⚠️  已有未回收的 Batch，请先运行 --collect-batch。")
+            return
+        submit_batch(raw_axioms, existing_titles, dry_run=dry_run)
+        return
+
+    llm_result = synthesize_with_llm_result(raw_axioms, existing_titles)
+    _apply_llm_result(llm_result, len(raw_axioms), dry_run, create_notes, vault, existing_titles, bullet_count)
+
+
+@_flush_log_on_return
+def collect_batch(dry_run: bool = False, create_notes: bool = True):
+    """回收 main(batch=True) 提交的 Batch 结果并继续后续落盘流程。"""
+    vault = get_vault()
+    _print_banner(vault, dry_run)
+
+    existing_titles, bullet_count = scan_map(vault / MAP_FILE)
+    llm_result, total_raw = collect_batch_result(existing_titles, dry_run=dry_run)
+    if llm_result is None:
+        return
+    _apply_llm_result(llm_result, total_raw, dry_run, create_notes, vault, existing_titles, bullet_count)
+    # 地图与笔记写完才删除 pending 文件；此前任何异常都保留它以便重新回收
+    if not dry_run:
+        synth_pending_batch_file().unlink(missing_ok=True)
 
 
 if __name__ == "__main__":
@@ -517,9 +1049,14 @@ if __name__ == "__main__":
     parser.add_argument("--no-notes", action="store_true", help="不创建独立 Axiom 笔记")
     parser.add_argument("--min-score", type=float, default=MIN_AXIOM_SCORE)
     parser.add_argument("--max-batch", type=int, default=MAX_AXIOMS_BATCH)
+    parser.add_argument("--batch", action="store_true", help="提交到 OpenAI Batch API（成本减半，≤24h 完成）后退出")
+    parser.add_argument("--collect-batch", action="store_true", help="回收已提交的 Batch 结果并写入地图")
     args = parser.parse_args()
 
     MIN_AXIOM_SCORE = args.min_score
     MAX_AXIOMS_BATCH = args.max_batch
 
-    main(dry_run=args.dry_run, create_notes=not args.no_notes)
+    if args.collect_batch:
+        collect_batch(dry_run=args.dry_run, create_notes=not args.no_notes)
+    else:
+        main(dry_run=args.dry_run, create_notes=not args.no_notes, batch=args.batch)
@@ -2,16 +2,23 @@ from __future__ import annotations
 
 import asyncio
 import argparse
-import json
+import logging
 import os
+import random
+import re
 import time
 import uuid
-from dataclasses import dataclass
-from datetime import UTC, datetime
+from collections import Counter
+from dataclasses import dataclass, replace
+from datetime import UTC, datetime, timedelta
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
-from typing import Protocol
+from typing import Mapping, Protocol
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+import httpx
+
 from agos.config import (
     commit_digest_alert_on_failure,
     commit_digest_authors,
@@ -21,6 +28,7 @@ from agos.config import (
     commit_digest_force_send,
     commit_digest_include_categories,
     commit_digest_include_risk,
+    commit_digest_incremental,
     commit_digest_max_classify_commits,
     commit_digest_max_report_commits,
     commit_digest_max_retries,
@@ -32,20 +40,37 @@ from agos.config import (
     feishu_bot_msg_type,
     feishu_bot_secret,
     feishu_bot_webhook,
-    state_dir,
 )
+from agos import fastjson
+from agos.log import CurrentStreamHandler
 from agos.notify import send_message
-from apps.tool_gateway.github_service import GitHubService, ToolGatewayError
+from apps.tool_gateway.github_service import GitHubPage, GitHubService, ToolGatewayError
 from agents.daily_briefing.commit_digest_renderer import (
     CommitItem,
     CommitDigestAnalytics,
+    build_empty_text,
     build_feishu_post_payload,
     build_feishu_text_payload,
     build_markdown_chunks,
     build_summary_text,
 )
-from agents.daily_briefing.commit_digest_state import CommitDigestStateStore, DigestRunState
-from skills.feishu_bot_sender import FeishuBotSendError, send_feishu_webhook
+from agents.daily_briefing.commit_digest_state import CommitDigestStateStore, DigestRunState, hash_digest_key
+from skills.feishu_bot_sender import FeishuBotSendError, send_feishu_webhook_async
+
+
+_LOGGER = logging.getLogger("commit_digest")
+if not _LOGGER.handlers:
+    _LOGGER.setLevel(logging.INFO)
+    _handler = CurrentStreamHandler("stderr")
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    _LOGGER.addHandler(_handler)
+    _LOGGER.propagate = False
+
+
+def _log_event(level: int, event: str, **fields: object) -> None:
+    # 每条日志是一行 JSON，便于按 trace_id 检索；未启用的级别不做序列化
+    if _LOGGER.isEnabledFor(level):
+        _LOGGER.log(level, "%s", fastjson.dumps({"event": event, **fields}))
 
 
 @dataclass(frozen=True)
@@ -66,8 +91,18 @@ class _GitHubRequester(Protocol):
     ) -> dict[str, object] | list[dict[str, object]]:
         ...
 
+    async def _request_page(
+        self,
+        *,
+        path: str,
+        params: dict[str, str] | None = None,
+        etag: str | None = None,
+    ) -> GitHubPage:
+        ...
+
 
 _CATEGORY_ORDER = ["revert", "feat", "fix", "refactor", "test", "docs", "ci", "perf", "chore", "mixed"]
+_CATEGORY_ORDER_INDEX = {name: idx for idx, name in enumerate(_CATEGORY_ORDER)}
 _PREFIX_TO_CATEGORY = {
     "revert": "revert",
     "feat": "feat",
@@ -103,12 +138,53 @@ _PATH_RULES: list[tuple[str, str]] = [
     ("dockerfile", "chore"),
 ]
 
+REPO_CONCURRENCY = 8
+DETAIL_CONCURRENCY = 15
+# 两段式重试：前几次快速重试应对瞬时抖动，之后按约 1 分钟间隔等待较长的故障恢复
+FAST_RETRY_ATTEMPTS = 3
+FAST_RETRY_MAX_SLEEP_SEC = 10.0
+SLOW_RETRY_SLEEP_SEC = 60.0
+MAX_SEND_RETRIES = 6
+FEISHU_TIMEOUT_SEC = 10.0
+# 飞书自定义机器人单个 webhook 限 5 次/秒，超出会被 429 限流
+FEISHU_MAX_SENDS_PER_SEC = 5.0
+_LINK_NEXT_RE = re.compile(r'<([^>]+)>;\s*rel="next"')
+# 取自系统熵源，多个进程同时启动也不会得到相同的退避序列
+_RETRY_RANDOM = random.SystemRandom()
+
+
+class _TokenMatcher:
+    """一次扫描找出文本中出现的全部规则词（含互相包含的词，如 hotfix/fix）。"""
+
+    def __init__(self, tokens: list[str]) -> None:
+        # 长词优先：同一起点只命中最长的词，被它包含的短词通过 _contained 补回
+        ordered = sorted(set(tokens), key=lambda t: (-len(t), t))
+        self._pattern = re.compile("(?=(" + "|".join(re.escape(t) for t in ordered) + "))")
+        self._contained = {t: frozenset(o for o in ordered if o in t) for t in ordered}
+
+    def find(self, text: str) -> set[str]:
+        found: set[str] = set()
+        for match in self._pattern.finditer(text):
+            token = match.group(1)
+            if token not in found:
+                found |= self._contained[token]
+        return found
+
+
+_KEYWORD_MATCHER = _TokenMatcher(list(_KEYWORD_TO_CATEGORY))
+_PATH_RULE_MATCHER = _TokenMatcher([rule for rule, _ in _PATH_RULES])
+_PATH_RULE_CATEGORIES: dict[str, list[str]] = {
+    rule: [category for other, category in _PATH_RULES if other == rule] for rule, _ in _PATH_RULES
+}
+
 
 def _trace_id() -> str:
     return uuid.uuid4().hex[:12]
 
 
+@lru_cache(maxsize=32)
 def _resolve_timezone(name: str) -> ZoneInfo:
+    # ZoneInfo 自带实例缓存，但无效名称每次都会重新查找时区文件；连同回退结果一起缓存
     try:
         return ZoneInfo(name)
     except ZoneInfoNotFoundError:
@@ -130,9 +206,12 @@ def _today_window(timezone_name: str) -> TimeWindow:
 def _digest_key(window: TimeWindow, repos: list[str], authors: list[str]) -> str:
     repos_key = ",".join(sorted(repos))
     authors_key = ",".join(sorted(authors)) if authors else "*"
-    return f"{window.date_label}|{window.timezone}|repo:{repos_key}|authors:{authors_key}"
+    raw = f"{window.date_label}|{window.timezone}|repo:{repos_key}|authors:{authors_key}"
+    # 仓库/作者多时原始串可达数百字节；索引里只存定长摘要，原始维度已在 date/timezone/repos/authors 列中
+    return hash_digest_key(raw)
 
 
+@lru_cache(maxsize=256)
 def _parse_repo(repo: str) -> tuple[str, str]:
     if "/" not in repo:
         raise ValueError(f"invalid repo format: {repo}, expected owner/repo")
@@ -150,6 +229,30 @@ def _normalize_message(raw: object) -> str:
     return "(no message)"
 
 
+def _parse_github_datetime(text: str) -> datetime | None:
+    # GitHub 固定返回 YYYY-MM-DDTHH:MM:SSZ，按位截取比 fromisoformat 省去 replace 与通用解析
+    if len(text) == 20 and text[19] == "Z" and text[10] == "T":
+        try:
+            return datetime(
+                int(text[0:4]),
+                int(text[5:7]),
+                int(text[8:10]),
+                int(text[11:13]),
+                int(text[14:16]),
+                int(text[17:19]),
+                tzinfo=UTC,
+            )
+        except ValueError:
+            pass
+    text = text.strip()
+    if not text:
+        return None
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).astimezone(UTC)
+    except ValueError:
+        return None
+
+
 def _commit_item_from_payload(repo: str, payload: dict[str, object]) -> CommitItem | None:
     sha = payload.get("sha")
     html_url = payload.get("html_url")
@@ -170,12 +273,7 @@ def _commit_item_from_payload(repo: str, payload: dict[str, object]) -> CommitIt
     if isinstance(name, str) and name.strip():
         author_name = name.strip()
 
-    committed_at = None
-    if isinstance(date_text, str) and date_text.strip():
-        try:
-            committed_at = datetime.fromisoformat(date_text.replace("Z", "+00:00")).astimezone(UTC)
-        except ValueError:
-            committed_at = None
+    committed_at = _parse_github_datetime(date_text) if isinstance(date_text, str) else None
     if committed_at is None:
         return None
 
@@ -190,51 +288,66 @@ def _commit_item_from_payload(repo: str, payload: dict[str, object]) -> CommitIt
 
 
 def _extract_commit_prefix(message: str) -> str:
-    first_line = message.splitlines()[0].strip().lower()
-    if ":" not in first_line:
+    # 只截取首行，避免 splitlines() 为整条 message 分配列表
+    newline = message.find("\n")
+    first_line = (message if newline < 0 else message[:newline]).strip().lower()
+    colon = first_line.find(":")
+    if colon < 0:
         return ""
-    head = first_line.split(":", 1)[0]
-    if "(" in head:
-        head = head.split("(", 1)[0]
-    head = head.replace("!", "").strip()
-    return head
+    head = first_line[:colon]
+    paren = head.find("(")
+    if paren >= 0:
+        head = head[:paren]
+    return head.replace("!", "").strip()
 
 
-def _classify_commit(item: CommitItem) -> str:
-    prefix = _extract_commit_prefix(item.message)
-    if prefix in _PREFIX_TO_CATEGORY:
-        return _PREFIX_TO_CATEGORY[prefix]
+@lru_cache(maxsize=32)
+def _compile_risk_prefixes(risk_paths: tuple[str, ...]) -> tuple[str, ...]:
+    # 被更短前缀覆盖的规则是冗余的，去掉后交给 str.startswith(tuple) 一次匹配
+    minimal: list[str] = []
+    for prefix in sorted(set(risk_paths)):
+        if not minimal or not prefix.startswith(minimal[-1]):
+            minimal.append(prefix)
+    return tuple(minimal)
+
+
+def _is_high_risk_change(item: CommitItem, risk_paths: list[str] | tuple[str, ...]) -> bool:
+    if not item.files or not risk_paths:
+        return False
+    prefixes = _compile_risk_prefixes(tuple(risk_paths))
+    return any(file_path.startswith(prefixes) for file_path in item.files)
+
+
+def _classify_and_risk(item: CommitItem, risk_prefixes: tuple[str, ...]) -> tuple[str, bool]:
+    """一次遍历 files 同时完成路径打分与高风险判断，返回 (category, is_high_risk)。"""
+    prefix_category = _PREFIX_TO_CATEGORY.get(_extract_commit_prefix(item.message))
+    if prefix_category is not None:
+        is_risk = bool(risk_prefixes) and any(path.startswith(risk_prefixes) for path in item.files)
+        return prefix_category, is_risk
 
     scores: dict[str, int] = {}
-    message_lower = item.message.lower()
-    for token, category in _KEYWORD_TO_CATEGORY.items():
-        if token in message_lower:
-            scores[category] = scores.get(category, 0) + 2
-
-    for changed in item.files:
-        changed_lower = changed.lower()
-        for prefix_rule, category in _PATH_RULES:
-            if changed_lower.startswith(prefix_rule) or prefix_rule in changed_lower:
+    for token in _KEYWORD_MATCHER.find(item.message_lower):
+        category = _KEYWORD_TO_CATEGORY[token]
+        scores[category] = scores.get(category, 0) + 2
+
+    is_risk = False
+    for changed, changed_lower in zip(item.files, item.files_lower):
+        if risk_prefixes and not is_risk and changed.startswith(risk_prefixes):
+            is_risk = True
+        for prefix_rule in _PATH_RULE_MATCHER.find(changed_lower):
+            for category in _PATH_RULE_CATEGORIES[prefix_rule]:
                 scores[category] = scores.get(category, 0) + 1
 
     if not scores:
-        return "chore"
+        return "chore", is_risk
 
-    top_score = max(scores.values())
-    top_categories = [name for name, score in scores.items() if score == top_score]
-    if len(top_categories) > 1:
-        return "mixed"
-    return top_categories[0]
+    top_category, top_score = max(scores.items(), key=itemgetter(1))
+    ties = sum(1 for score in scores.values() if score == top_score)
+    return ("mixed" if ties > 1 else top_category), is_risk
 
 
-def _is_high_risk_change(item: CommitItem, risk_paths: list[str]) -> bool:
-    if not item.files:
-        return False
-    for file_path in item.files:
-        for prefix in risk_paths:
-            if file_path.startswith(prefix):
-                return True
-    return False
+def _classify_commit(item: CommitItem) -> str:
+    return _classify_and_risk(item, ())[0]
 
 
 def _build_conclusion(
@@ -262,28 +375,21 @@ def _analyze_commits(
     exclude_types: set[str],
     risk_paths: list[str],
 ) -> CommitDigestAnalytics:
-    category_counts: dict[str, int] = {}
-    high_risk_changes = 0
-    effective_commits = 0
-    revert_count = 0
-
-    for item in commits:
-        category = _classify_commit(item)
-        category_counts[category] = category_counts.get(category, 0) + 1
-        if category == "revert":
-            revert_count += 1
-        if category not in exclude_types:
-            effective_commits += 1
-        if _is_high_risk_change(item, risk_paths):
-            high_risk_changes += 1
-
-    ordered_counts: dict[str, int] = {}
-    for name in _CATEGORY_ORDER:
-        if name in category_counts:
-            ordered_counts[name] = category_counts[name]
-    for name, count in sorted(category_counts.items()):
-        if name not in ordered_counts:
-            ordered_counts[name] = count
+    risk_prefixes = _compile_risk_prefixes(tuple(risk_paths))
+    results = [_classify_and_risk(item, risk_prefixes) for item in commits]
+    category_counts = Counter(category for category, _ in results)
+    high_risk_changes = sum(is_risk for _, is_risk in results)
+    revert_count = category_counts.get("revert", 0)
+    effective_commits = sum(count for name, count in category_counts.items() if name not in exclude_types)
+
+    # 已知类别按 _CATEGORY_ORDER 排，未知类别按名称排在最后
+    unknown_rank = len(_CATEGORY_ORDER_INDEX)
+    ordered_counts = dict(
+        sorted(
+            category_counts.items(),
+            key=lambda kv: (_CATEGORY_ORDER_INDEX.get(kv[0], unknown_rank), kv[0]),
+        )
+    )
 
     return CommitDigestAnalytics(
         total_commits=len(commits),
@@ -325,6 +431,173 @@ async def _fetch_changed_files(
     return tuple(out)
 
 
+def _trim_commit_payload(item: dict[str, object]) -> dict[str, object]:
+    # 只保留解析 CommitItem 需要的字段，缓存体积约为原始响应的几十分之一
+    commit_data = item.get("commit")
+    commit_data = commit_data if isinstance(commit_data, dict) else {}
+    author = commit_data.get("author")
+    author = author if isinstance(author, dict) else {}
+    return {
+        "sha": item.get("sha"),
+        "html_url": item.get("html_url"),
+        "commit": {
+            "message": commit_data.get("message"),
+            "author": {"name": author.get("name"), "date": author.get("date")},
+        },
+    }
+
+
+def _next_page_url(headers: Mapping[str, str]) -> str | None:
+    match = _LINK_NEXT_RE.search(headers.get("Link", ""))
+    return match.group(1) if match else None
+
+
+async def _fetch_commit_page(
+    *,
+    service: _GitHubRequester,
+    repo: str,
+    path: str,
+    params: dict[str, str] | None,
+    since_key: str,
+    page: int,
+    state_store: CommitDigestStateStore | None,
+) -> tuple[object, str | None]:
+    """返回 (本页 payload, 下一页 URL)；下一页以 GitHub 的 Link: rel="next" 为准。"""
+    if state_store is None:
+        result = await service._request_page(path=path, params=params)
+        return result.payload, _next_page_url(result.headers)
+
+    cached = state_store.cached_page(repo=repo, since=since_key, page=page)
+    result = await service._request_page(path=path, params=params, etag=cached[0] if cached else None)
+    if result.not_modified and cached is not None:
+        return cached[1], cached[2]
+    raw = result.payload
+    next_url = _next_page_url(result.headers)
+    etag = result.headers.get("ETag")
+    if etag and isinstance(raw, list):
+        state_store.save_page(
+            repo=repo,
+            since=since_key,
+            page=page,
+            etag=etag,
+            payload=[_trim_commit_payload(item) for item in raw],
+            next_url=next_url,
+        )
+    return raw, next_url
+
+
+def _item_to_record(item: CommitItem) -> dict[str, object]:
+    return {
+        "sha": item.sha,
+        "author": item.author,
+        "message": item.message,
+        "committed_at": item.committed_at.isoformat(),
+        "url": item.url,
+    }
+
+
+def _item_from_record(repo: str, record: dict[str, object]) -> CommitItem | None:
+    committed_at = record.get("committed_at")
+    parsed_at = _parse_github_datetime(committed_at) if isinstance(committed_at, str) else None
+    if parsed_at is None:
+        return None
+    return CommitItem(
+        repo=repo,
+        sha=str(record.get("sha", "")),
+        author=str(record.get("author", "unknown")),
+        message=str(record.get("message", "")),
+        committed_at=parsed_at,
+        url=str(record.get("url", "")),
+    )
+
+
+async def _collect_one_repo(
+    *,
+    service: _GitHubRequester,
+    repo: str,
+    wanted_authors: set[str],
+    since: datetime,
+    until: datetime,
+    max_total_commits: int,
+    state_store: CommitDigestStateStore | None = None,
+    incremental: bool = False,
+) -> list[CommitItem]:
+    owner, repo_name = _parse_repo(repo)
+    authors_key = ",".join(sorted(wanted_authors)) or "*"
+    fetch_since = since
+    seen: list[CommitItem] = []
+    use_watermark = incremental and state_store is not None
+    if use_watermark:
+        # 同一窗口内重跑：只拉水位线之后的新提交，再与上次采集结果合并
+        watermark = state_store.load_watermark(repo=repo, authors_key=authors_key, since=since.isoformat())
+        if watermark is not None:
+            last_seen, records = watermark
+            seen = [item for item in (_item_from_record(repo, r) for r in records) if item is not None]
+            last_seen_at = _parse_github_datetime(last_seen)
+            if last_seen_at is not None:
+                fetch_since = max(since, last_seen_at + timedelta(seconds=1))
+
+    items: list[CommitItem] = []
+    # 提交作者通常只有少数几人：按原始名字缓存过滤结果，每个作者只做一次 lower()
+    author_allowed: dict[str, bool] = {}
+    page = 1
+    path = f"/repos/{owner}/{repo_name}/commits"
+    params: dict[str, str] | None = {
+        "since": fetch_since.isoformat(),
+        "until": until.isoformat(),
+        "per_page": "100",
+    }
+    while fetch_since <= until and len(items) < max_total_commits:
+        raw, next_url = await _fetch_commit_page(
+            service=service,
+            repo=repo,
+            path=path,
+            params=params,
+            since_key=fetch_since.isoformat(),
+            page=page,
+            state_store=state_store,
+        )
+        if not isinstance(raw, list) or not raw:
+            break
+        for item in raw:
+            if len(items) >= max_total_commits:
+                break
+            if not isinstance(item, dict):
+                continue
+            parsed = _commit_item_from_payload(repo, item)
+            if parsed is None:
+                continue
+            if wanted_authors:
+                allowed = author_allowed.get(parsed.author)
+                if allowed is None:
+                    allowed = author_allowed[parsed.author] = parsed.author.lower() in wanted_authors
+                if not allowed:
+                    continue
+            items.append(parsed)
+        if next_url is None:
+            break
+        # 下一页 URL 已带全部查询参数
+        path, params = next_url, None
+        page += 1
+
+    if not use_watermark:
+        return items
+
+    merged = {item.sha: item for item in seen}
+    merged.update((item.sha, item) for item in items)
+    all_items = sorted(merged.values(), key=lambda x: x.committed_at)
+    del all_items[: max(0, len(all_items) - max(0, max_total_commits))]
+    if all_items:
+        state_store.save_watermark(
+            repo=repo,
+            authors_key=authors_key,
+            since=since.isoformat(),
+            last_seen=max(item.committed_at for item in all_items).isoformat(),
+            items=[_item_to_record(item) for item in all_items],
+        )
+    return all_items
+
+
 async def _collect_commits_async(
     *,
     service: _GitHubRequester,
@@ -335,69 +608,71 @@ async def _collect_commits_async(
     include_changed_files: bool,
     max_detail_commits: int,
     max_total_commits: int,
+    state_store: CommitDigestStateStore | None = None,
+    incremental: bool = False,
 ) -> list[CommitItem]:
     wanted_authors = {a.strip().lower() for a in authors if a.strip()}
-    all_items: list[CommitItem] = []
-    detail_budget = max(0, max_detail_commits)
-
-    for repo in repos:
-        owner, repo_name = _parse_repo(repo)
-        page = 1
-        while len(all_items) < max_total_commits:
-            raw = await service._request(
-                method="GET",
-                path=f"/repos/{owner}/{repo_name}/commits",
-                params={
-                    "since": since.isoformat(),
-                    "until": until.isoformat(),
-                    "per_page": "100",
-                    "page": str(page),
-                },
+    semaphore = asyncio.Semaphore(REPO_CONCURRENCY)
+
+    async def _bounded(repo: str) -> list[CommitItem]:
+        async with semaphore:
+            return await _collect_one_repo(
+                service=service,
+                repo=repo,
+                wanted_authors=wanted_authors,
+                since=since,
+                until=until,
+                max_total_commits=max_total_commits,
+                state_store=state_store,
+                incremental=incremental,
             )
-            if not isinstance(raw, list) or not raw:
-                break
-            for item in raw:
-                if len(all_items) >= max_total_commits:
-                    break
-                if not isinstance(item, dict):
-                    continue
-                parsed = _commit_item_from_payload(repo, item)
-                if parsed is None:
-                    continue
-                if wanted_authors and parsed.author.lower() not in wanted_authors:
-                    continue
-                if include_changed_files and detail_budget > 0:
-                    try:
-                        files = await _fetch_changed_files(
-                            service=service,
-                            owner=owner,
-                            repo_name=repo_name,
-                            sha=parsed.sha,
-                        )
-                    except ToolGatewayError:
-                        files = ()
-                    parsed = CommitItem(
-                        repo=parsed.repo,
-                        sha=parsed.sha,
-                        author=parsed.author,
-                        message=parsed.message,
-                        committed_at=parsed.committed_at,
-                        url=parsed.url,
-                        files=files,
-                    )
-                    detail_budget -= 1
-                all_items.append(parsed)
-            if len(raw) < 100:
-                break
-            page += 1
 
+    # 各仓库并发拉取，共享同一个 service；结果汇总后统一排序再截断，与仓库完成顺序无关
+    # 任一仓库失败时 TaskGroup 会取消其余仓库的请求，不再白白消耗 API 配额；向上抛出原始异常，保持调用方的错误分类
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(_bounded(repo)) for repo in repos]
+    except ExceptionGroup as eg:
+        raise eg.exceptions[0]
+    per_repo = [task.result() for task in tasks]
+    all_items = [item for items in per_repo for item in items]
     all_items.sort(key=lambda x: x.committed_at)
+    # 超出总量时保留最新的 N 条（列表仍按时间升序）
+    del all_items[: max(0, len(all_items) - max(0, max_total_commits))]
+
+    if include_changed_files:
+        # 明细预算按排序后的顺序一次切片，优先给最新的提交，保证每次运行取到同一批
+        detail_start = len(all_items) - min(len(all_items), max(0, max_detail_commits))
+        detail_items = all_items[detail_start:]
+        detail_semaphore = asyncio.Semaphore(DETAIL_CONCURRENCY)
+
+        async def _bounded_files(item: CommitItem) -> tuple[str, ...]:
+            owner, repo_name = _parse_repo(item.repo)
+            async with detail_semaphore:
+                return await _fetch_changed_files(
+                    service=service,
+                    owner=owner,
+                    repo_name=repo_name,
+                    sha=item.sha,
+                )
+
+        details = await asyncio.gather(
+            *[_bounded_files(item) for item in detail_items],
+            return_exceptions=True,
+        )
+        for idx, (parsed, files) in enumerate(zip(detail_items, details), start=detail_start):
+            if isinstance(files, ToolGatewayError):
+                files = ()
+            elif isinstance(files, BaseException):
+                raise files
+            all_items[idx] = replace(parsed, files=files)
+
     return all_items
 
 
-def _collect_commits(
+async def _collect_commits(
     *,
-    service: _GitHubRequester,
+    service: GitHubService,
     repos: list[str],
     authors: list[str],
     since: datetime,
@@ -405,9 +680,12 @@ def _collect_commits(
     include_changed_files: bool,
     max_detail_commits: int,
     max_total_commits: int,
+    state_store: CommitDigestStateStore | None = None,
+    incremental: bool = False,
 ) -> list[CommitItem]:
-    return asyncio.run(
-        _collect_commits_async(
+    # 整次采集共享一个连接池，所有仓库分页与明细请求复用 keep-alive 连接
+    async with service:
+        return await _collect_commits_async(
             service=service,
             repos=repos,
             authors=authors,
@@ -416,11 +694,46 @@ def _collect_commits(
             include_changed_files=include_changed_files,
             max_detail_commits=max_detail_commits,
             max_total_commits=max_total_commits,
+            state_store=state_store,
+            incremental=incremental,
         )
-    )
 
 
-def _send_with_retry(
+class _RateLimiter:
+    """按固定间隔放行：占位在 await 之前完成，并发调用也不会挤进同一时间片。"""
+
+    def __init__(self, rate_per_sec: float) -> None:
+        self._interval = 1.0 / rate_per_sec
+        self._next_at = 0.0
+
+    async def wait(self) -> None:
+        now = time.monotonic()
+        slot = max(now, self._next_at)
+        self._next_at = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def _retry_sleep_seconds(idx: int, prev_sleep: float, backoff_sec: float, exc: Exception) -> float:
+    # 服务端给了 Retry-After 就按它等（封顶慢速阶段上限，异常大的值不至于挂住任务）；
+    # 快速阶段用去相关抖动 min(cap, U(base, prev*3))，慢速阶段固定间隔 ±25%
+    retry_after = getattr(exc, "retry_after", None)
+    if isinstance(retry_after, (int, float)):
+        return min(float(retry_after), SLOW_RETRY_SLEEP_SEC * 1.25)
+    if idx < FAST_RETRY_ATTEMPTS:
+        return min(FAST_RETRY_MAX_SLEEP_SEC, _RETRY_RANDOM.uniform(backoff_sec, max(backoff_sec, prev_sleep * 3)))
+    return _RETRY_RANDOM.uniform(SLOW_RETRY_SLEEP_SEC * 0.75, SLOW_RETRY_SLEEP_SEC * 1.25)
+
+
+def _write_dead_letter(dead_letter_dir: Path, *, trace_id: str, payloads: list[dict[str, object]]) -> Path:
+    """把未送达的消息落盘，运维可直接重放而不必重跑整次采集；不含 webhook 地址与签名。"""
+    dead_letter_dir.mkdir(parents=True, exist_ok=True)
+    path = dead_letter_dir / f"{trace_id}.json"
+    path.write_text(fastjson.dumps({"trace_id": trace_id, "payloads": payloads}, indent=True), encoding="utf-8")
+    return path
+
+
+async def _send_with_retry_async(
     *,
     webhook: str,
     secret: str,
@@ -428,19 +741,33 @@ def _send_with_retry(
     max_retries: int,
     backoff_sec: int,
     trace_id: str,
+    client: httpx.AsyncClient | None = None,
+    limiter: _RateLimiter | None = None,
 ) -> None:
     last_error: Exception | None = None
+    prev_sleep = float(backoff_sec)
+    max_retries = min(max_retries, MAX_SEND_RETRIES)
     for idx in range(max_retries + 1):
+        if limiter is not None:
+            await limiter.wait()
         try:
-            send_feishu_webhook(webhook=webhook, payload=payload, secret=secret)
+            await send_feishu_webhook_async(webhook=webhook, payload=payload, secret=secret, client=client)
             return
         except Exception as exc:
             last_error = exc
             if idx >= max_retries:
                 break
-            sleep_sec = backoff_sec * (2 ** idx)
-            print(f"[commit-digest] trace_id={trace_id} retry={idx+1} sleep={sleep_sec}s error={exc}")
-            time.sleep(sleep_sec)
+            sleep_sec = _retry_sleep_seconds(idx, prev_sleep, backoff_sec, exc)
+            prev_sleep = sleep_sec
+            _log_event(
+                logging.WARNING,
+                "send_retry",
+                trace_id=trace_id,
+                retry=idx + 1,
+                sleep_sec=round(sleep_sec, 2),
+                error=str(exc),
+            )
+            await asyncio.sleep(sleep_sec)
     raise RuntimeError(f"send webhook failed after retries: {last_error}")
 
 
@@ -456,63 +783,57 @@ def _send_failure_alert(*, trace_id: str, error: str, digest_key: str) -> None:
     send_message(text)
 
 
-def _metrics_file_path() -> Path:
-    return state_dir() / "commit_digest_metrics.json"
-
-
 def _record_metrics(
+    store: CommitDigestStateStore,
     *,
     date_label: str,
     success: bool,
     sample_size: int = 0,
     sample_correct: int = 0,
 ) -> None:
-    path = _metrics_file_path()
-    data: dict[str, dict[str, object]] = {}
-    if path.exists():
-        try:
-            raw = json.loads(path.read_text(encoding="utf-8"))
-            if isinstance(raw, dict):
-                for key, value in raw.items():
-                    if isinstance(key, str) and isinstance(value, dict):
-                        data[key] = value
-        except (OSError, ValueError):
-            data = {}
-
-    entry = data.get(date_label, {})
-    total_runs = int(entry.get("total_runs", 0)) + 1
-    success_runs = int(entry.get("success_runs", 0)) + (1 if success else 0)
-    if sample_size <= 0:
-        sample_size = int(entry.get("sample_size", 0))
-    if sample_correct <= 0:
-        sample_correct = int(entry.get("sample_correct", 0))
-    accuracy = round((sample_correct / sample_size), 4) if sample_size > 0 else 0.0
-    data[date_label] = {
-        "date": date_label,
-        "total_runs": total_runs,
-        "success_runs": success_runs,
-        "sample_size": sample_size,
-        "sample_correct": sample_correct,
-        "accuracy": accuracy,
-    }
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    store.begin()
+    store.record_metrics(
+        date=date_label,
+        success=success,
+        sample_size=sample_size,
+        sample_correct=sample_correct,
+    )
+    store.commit()
 
 
 def run_commit_digest(*, dry_run: bool = False, force_send_override: bool | None = None) -> int:
     if not commit_digest_enabled():
-        print("[commit-digest] disabled by COMMIT_DIGEST_ENABLED")
+        _log_event(logging.INFO, "disabled", reason="COMMIT_DIGEST_ENABLED")
         return 0
 
     webhook = feishu_bot_webhook()
     if not webhook:
-        print("[commit-digest] FEISHU_BOT_WEBHOOK 未配置")
+        _log_event(logging.ERROR, "config_missing", key="FEISHU_BOT_WEBHOOK")
         return 1
 
     github_token = os.getenv("GITHUB_TOKEN", "").strip()
     if not github_token:
-        print("[commit-digest] GITHUB_TOKEN 未配置")
+        _log_event(logging.ERROR, "config_missing", key="GITHUB_TOKEN")
         return 1
 
+    # 采集与发送跑在同一个事件循环里，GitHub 与飞书请求共用一个连接池
+    return asyncio.run(
+        _run_commit_digest_async(
+            webhook=webhook,
+            github_token=github_token,
+            dry_run=dry_run,
+            force_send_override=force_send_override,
+        )
+    )
+
+
+async def _run_commit_digest_async(
+    *,
+    webhook: str,
+    github_token: str,
+    dry_run: bool,
+    force_send_override: bool | None,
+) -> int:
     started = time.perf_counter()
     trace_id = _trace_id()
     repos = commit_digest_repos()
@@ -529,9 +850,11 @@ def run_commit_digest(*, dry_run: bool = False, force_send_override: bool | None
     include_changed_files = include_categories or include_risk
 
     store = CommitDigestStateStore(commit_digest_state_db_file())
+    previous_status: str | None = None
     try:
         force_send = commit_digest_force_send() if force_send_override is None else force_send_override
-        if store.is_success(digest_key) and not force_send:
+        already_success, previous_status = store.load_run_context(digest_key)
+        if already_success and not force_send:
             store.begin()
             store.record(
                 DigestRunState(
@@ -549,89 +872,135 @@ def run_commit_digest(*, dry_run: bool = False, force_send_override: bool | None
                 force_send=force_send,
             )
             store.commit()
-            print(f"[commit-digest] skipped, already sent digest_key={digest_key}")
+            _log_event(logging.INFO, "skipped", trace_id=trace_id, digest_key=digest_key)
             return 0
 
-        service = GitHubService(token=github_token)
-        commits = _collect_commits(
-            service=service,
-            repos=repos,
-            authors=authors,
-            since=window.since,
-            until=window.until,
-            include_changed_files=include_changed_files,
-            max_detail_commits=max_detail_commits,
-            max_total_commits=max_total_commits,
+        limits = httpx.Limits(
+            max_keepalive_connections=REPO_CONCURRENCY + DETAIL_CONCURRENCY,
+            max_connections=REPO_CONCURRENCY + DETAIL_CONCURRENCY,
         )
-        analytics = (
-            _analyze_commits(commits=commits, exclude_types=exclude_types, risk_paths=risk_paths)
-            if include_categories or include_risk
-            else None
-        )
-
-        chunks = build_markdown_chunks(
-            date_label=window.date_label,
-            timezone=window.timezone,
-            commits=commits,
-            analytics=analytics,
-        )
-
-        msg_type = feishu_bot_msg_type()
-        secret = feishu_bot_secret()
-        chunk_count = len(chunks)
-        if dry_run:
-            print(f"[commit-digest] dry-run trace_id={trace_id} chunks={chunk_count} commits={len(commits)}")
-            print(chunks[0][:1000] if chunks else "(empty)")
-            store.begin()
-            store.record(
-                DigestRunState(
-                    digest_key=digest_key,
-                    date=window.date_label,
-                    timezone=window.timezone,
-                    repos=",".join(repos),
-                    authors=",".join(authors) if authors else "*",
-                    status="skipped",
-                    trace_id=trace_id,
-                    commit_count=len(commits),
-                    chunk_count=chunk_count,
-                    error_message="dry-run",
-                ),
-                force_send=force_send,
+        async with httpx.AsyncClient(timeout=FEISHU_TIMEOUT_SEC, limits=limits) as http_client:
+            service = GitHubService(token=github_token, http_client=http_client)
+            commits = await _collect_commits(
+                service=service,
+                repos=repos,
+                authors=authors,
+                since=window.since,
+                until=window.until,
+                include_changed_files=include_changed_files,
+                max_detail_commits=max_detail_commits,
+                max_total_commits=max_total_commits,
+                state_store=store,
+                incremental=commit_digest_incremental(),
             )
-            store.commit()
-            return 0
-
-        for idx, chunk in enumerate(chunks, 1):
-            if msg_type == "text":
-                payload: dict[str, object] = build_feishu_text_payload(chunk)
+            if commits or dry_run:
+                analytics = (
+                    _analyze_commits(commits=commits, exclude_types=exclude_types, risk_paths=risk_paths)
+                    if include_categories or include_risk
+                    else None
+                )
+
+                # dry-run 只预览第一块，不必渲染全部分块；压缩重试最多渲染 4 遍，放到工作线程以免阻塞事件循环
+                chunks = await asyncio.to_thread(
+                    build_markdown_chunks,
+                    date_label=window.date_label,
+                    timezone=window.timezone,
+                    commits=commits,
+                    analytics=analytics,
+                    limit=1 if dry_run else None,
+                )
+
+                chunk_count = len(chunks)
+                if dry_run:
+                    _log_event(
+                        logging.INFO,
+                        "dry_run",
+                        trace_id=trace_id,
+                        preview_chunks=chunk_count,
+                        commits=len(commits),
+                    )
+                    print(chunks[0][:1000] if chunks else "(empty)")
+                    store.begin()
+                    store.record(
+                        DigestRunState(
+                            digest_key=digest_key,
+                            date=window.date_label,
+                            timezone=window.timezone,
+                            repos=",".join(repos),
+                            authors=",".join(authors) if authors else "*",
+                            status="skipped",
+                            trace_id=trace_id,
+                            commit_count=len(commits),
+                            chunk_count=chunk_count,
+                            error_message="dry-run",
+                        ),
+                        force_send=force_send,
+                    )
+                    store.commit()
+                    return 0
+
+                msg_type = feishu_bot_msg_type()
+                payloads: list[dict[str, object]] = []
+                if len(chunks) > 1:
+                    # 多块时摘要先发，会话预览即可看到结论；单块的头部已含同样的统计，不再多发一条
+                    summary = build_summary_text(
+                        date_label=window.date_label,
+                        timezone=window.timezone,
+                        commits=commits,
+                        analytics=analytics,
+                    )
+                    payloads.append(build_feishu_text_payload(summary))
+                for idx, chunk in enumerate(chunks, 1):
+                    if msg_type == "text":
+                        payloads.append(build_feishu_text_payload(chunk))
+                    else:
+                        title = f"【Commit日报】每日 Commit 日报（{window.date_label}）[{idx}/{len(chunks)}]"
+                        payloads.append(build_feishu_post_payload(title, chunk))
             else:
-                title = f"【Commit日报】每日 Commit 日报（{window.date_label}）[{idx}/{len(chunks)}]"
-                payload = build_feishu_post_payload(title, chunk)
-            _send_with_retry(
-                webhook=webhook,
-                secret=secret,
-                payload=payload,
-                max_retries=commit_digest_max_retries(),
-                backoff_sec=commit_digest_retry_backoff_sec(),
-                trace_id=trace_id,
-            )
-
-        summary = build_summary_text(date_label=window.date_label, timezone=window.timezone, commits=commits)
-        if analytics is not None:
-            summary = build_summary_text(
-                date_label=window.date_label,
-                timezone=window.timezone,
-                commits=commits,
-                analytics=analytics,
-            )
-        _send_with_retry(
-            webhook=webhook,
-            secret=secret,
-            payload=build_feishu_text_payload(summary),
-            max_retries=commit_digest_max_retries(),
-            backoff_sec=commit_digest_retry_backoff_sec(),
-            trace_id=trace_id,
-        )
+                # 空窗口不必跑分块渲染与压缩重试；一条短文本本身就是摘要，也不再追加汇总
+                payloads = [
+                    build_feishu_text_payload(build_empty_text(date_label=window.date_label, timezone=window.timezone))
+                ]
+
+            secret = feishu_bot_secret()
+            max_retries = commit_digest_max_retries()
+            if max_retries > MAX_SEND_RETRIES:
+                _log_event(
+                    logging.WARNING,
+                    "max_retries_clamped",
+                    trace_id=trace_id,
+                    configured=max_retries,
+                    limit=MAX_SEND_RETRIES,
+                )
+                max_retries = MAX_SEND_RETRIES
+            backoff_sec = commit_digest_retry_backoff_sec()
+            # 分块必须按序到达，保持串行；沿用采集时的连接池，并按 webhook 限速避免分块多时触发 429
+            limiter = _RateLimiter(FEISHU_MAX_SENDS_PER_SEC)
+            for pos, payload in enumerate(payloads):
+                try:
+                    await _send_with_retry_async(
+                        webhook=webhook,
+                        secret=secret,
+                        payload=payload,
+                        max_retries=max_retries,
+                        backoff_sec=backoff_sec,
+                        trace_id=trace_id,
+                        client=http_client,
+                        limiter=limiter,
+                    )
+                except RuntimeError:
+                    # 死信落盘失败（磁盘满、权限）不能盖过发送失败本身，否则本次运行不会记为失败
+                    try:
+                        dead_letter = _write_dead_letter(
+                            commit_digest_state_db_file().parent / "dlq",
+                            trace_id=trace_id,
+                            payloads=payloads[pos:],
+                        )
+                    except OSError as exc:
+                        _log_event(logging.ERROR, "dead_letter_failed", trace_id=trace_id, error=str(exc))
+                    else:
+                        _log_event(logging.ERROR, "dead_letter", trace_id=trace_id, path=str(dead_letter))
+                    raise
 
         store.begin()
         store.record(
@@ -644,18 +1013,22 @@ def run_commit_digest(*, dry_run: bool = False, force_send_override: bool | None
                 status="success",
                 trace_id=trace_id,
                 commit_count=len(commits),
-                chunk_count=chunk_count + 1,
+                chunk_count=len(payloads),
                 error_message=None,
             ),
             force_send=force_send,
         )
         store.commit()
         elapsed_ms = int((time.perf_counter() - started) * 1000)
-        print(
-            "[commit-digest] success "
-            f"trace_id={trace_id} commits={len(commits)} chunks={chunk_count + 1} latency_ms={elapsed_ms}"
+        _log_event(
+            logging.INFO,
+            "success",
+            trace_id=trace_id,
+            commits=len(commits),
+            chunks=len(payloads),
+            latency_ms=elapsed_ms,
         )
-        _record_metrics(date_label=window.date_label, success=True)
+        _record_metrics(store, date_label=window.date_label, success=True)
         return 0
 
     except (ValueError, ToolGatewayError, FeishuBotSendError, RuntimeError) as exc:
@@ -677,10 +1050,11 @@ def run_commit_digest(*, dry_run: bool = False, force_send_override: bool | None
             force_send=commit_digest_force_send() if force_send_override is None else force_send_override,
         )
         store.commit()
-        if store.recent_failures(limit=2) == 2:
+        # 本次失败且上一次也失败 = 连续两次失败
+        if previous_status == "failed":
             _send_failure_alert(trace_id=trace_id, error=str(exc), digest_key=digest_key)
-        print(f"[commit-digest] failed trace_id={trace_id} error={exc}")
-        _record_metrics(date_label=window.date_label, success=False)
+        _log_event(logging.ERROR, "failed", trace_id=trace_id, error=str(exc))
+        _record_metrics(store, date_label=window.date_label, success=False)
         return 1
     finally:
         store.close()
@@ -2,9 +2,10 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from datetime import datetime
+from operator import attrgetter
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CommitItem:
     repo: str
     sha: str
@@ -13,9 +14,28 @@ class CommitItem:
     committed_at: datetime
     url: str
     files: tuple[str, ...] = ()
-
-
-@dataclass(frozen=True)
+    # 分类时反复用到的小写形式，首次访问时计算并缓存在槽位上；replace() 产生的新实例会重新计算
+    _message_lower: str | None = field(default=None, init=False, repr=False, compare=False)
+    _files_lower: tuple[str, ...] | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def message_lower(self) -> str:
+        cached = self._message_lower
+        if cached is None:
+            cached = self.message.lower()
+            object.__setattr__(self, "_message_lower", cached)
+        return cached
+
+    @property
+    def files_lower(self) -> tuple[str, ...]:
+        cached = self._files_lower
+        if cached is None:
+            cached = tuple(path.lower() for path in self.files)
+            object.__setattr__(self, "_files_lower", cached)
+        return cached
+
+
+@dataclass(frozen=True, slots=True)
 class CommitDigestAnalytics:
     total_commits: int
     effective_commits: int
@@ -39,13 +59,12 @@ def build_summary_text(
     commits: list[CommitItem],
     analytics: CommitDigestAnalytics | None = None,
 ) -> str:
-    repos = sorted({item.repo for item in commits})
     if analytics is None:
         lines = [
             f"【Commit日报】每日 Commit 日报（{date_label}）",
             f"时区：{timezone}",
             f"总提交数：{len(commits)}",
-            f"仓库数：{len(repos)}",
+            f"仓库数：{len({item.repo for item in commits})}",
         ]
         return "\n".join(lines)
 
@@ -61,14 +80,20 @@ def build_summary_text(
     return "\n".join(lines)
 
 
+def build_empty_text(*, date_label: str, timezone: str) -> str:
+    return f"【Commit日报】{date_label}（{timezone}）无新增提交"
+
+
 def _build_repo_lines(repo: str, items: list[CommitItem]) -> list[str]:
+    """items 须已按 committed_at 升序（由 build_markdown_chunks 分组时保证）。"""
     lines = [f"### {repo}"]
-    sorted_items = sorted(items, key=lambda x: x.committed_at)
-    for item in sorted_items:
-        short_sha = item.sha[:7]
-        msg = item.message.splitlines()[0].strip()
-        ts = item.committed_at.strftime("%H:%M")
-        lines.append(f"- `{short_sha}` {msg} · {item.author} · {ts} · [链接]({item.url})")
+    for item in items:
+        # 只截首行；时间直接取 hour/minute 格式化，比逐条 strftime 省去格式串解析
+        message = item.message
+        newline = message.find("\n")
+        msg = (message if newline < 0 else message[:newline]).strip()
+        at = item.committed_at
+        lines.append(f"- `{item.sha[:7]}` {msg} · {item.author} · {at.hour:02d}:{at.minute:02d} · [链接]({item.url})")
     lines.append("")
     return lines
 
@@ -76,21 +101,27 @@ def _build_repo_lines(repo: str, items: list[CommitItem]) -> list[str]:
 def _append_line_with_split(
     *,
     chunks: list[str],
-    current: str,
+    parts: list[str],
+    size: int,
     line: str,
     header: str,
     max_chars: int,
-) -> str:
-    candidate = f"{current}{line}\n"
-    if len(candidate) <= max_chars:
-        return candidate
+) -> int:
+    """把 line 追加进 parts（就地修改）并返回当前块长度；只在切块时拼接一次，避免逐行 += 的平方级拷贝。"""
+    piece = f"{line}\n"
+    if size + len(piece) <= max_chars:
+        parts.append(piece)
+        return size + len(piece)
+    current = "".join(parts)
     if current.strip():
         chunks.append(current.strip() + "\n")
-    retry = f"{header}{line}\n"
-    if len(retry) <= max_chars:
-        return retry
-    chunks.append(retry[:max_chars].rstrip() + "\n")
-    return header
+    parts.clear()
+    parts.append(header)
+    if len(header) + len(piece) <= max_chars:
+        parts.append(piece)
+        return len(header) + len(piece)
+    chunks.append(f"{header}{piece}"[:max_chars].rstrip() + "\n")
+    return len(header)
 
 
 def _render_category_lines(category_counts: dict[str, int], *, top_n: int | None = None) -> list[str]:
@@ -113,8 +144,9 @@ def _render_header_lines(
     commits: list[CommitItem],
     analytics: CommitDigestAnalytics | None,
     compact_level: int,
+    repo_count: int,
+    top_categories: str,
 ) -> list[str]:
-    repo_count = len({item.repo for item in commits})
     if analytics is None:
         return [
             f"【Commit日报】每日 Commit 日报（{date_label}）",
@@ -128,7 +160,7 @@ def _render_header_lines(
         f"【Commit日报】{date_label}",
         f"- 时区：{timezone}",
         f"- 总提交：{analytics.total_commits}（有效提交：{analytics.effective_commits}）",
-        f"- Top 类别：{_top_categories_text(analytics.category_counts)}",
+        f"- Top 类别：{top_categories}",
     ]
     if compact_level <= 2:
         lines.extend(_render_category_lines(analytics.category_counts, top_n=None if compact_level == 0 else 3))
@@ -171,10 +203,16 @@ def build_markdown_chunks(
     commits: list[CommitItem],
     analytics: CommitDigestAnalytics | None = None,
     max_chars: int = 2000,
+    limit: int | None = None,
 ) -> list[str]:
+    """limit：只需前几块（如 dry-run 预览）时提前停止；被截断时总数未知，序号记为 [i/?]。"""
+    # 采集结果已按时间排好序，Timsort 对有序输入是线性的；全局排一次后分组，每个仓库的列表天然有序
     by_repo: dict[str, list[CommitItem]] = {}
-    for item in commits:
+    for item in sorted(commits, key=attrgetter("committed_at")):
         by_repo.setdefault(item.repo, []).append(item)
+    # 正文行与 Top 类别不随 compact_level 变化，重试前只排序/渲染一次
+    body_lines = [line for repo in sorted(by_repo) for line in _build_repo_lines(repo, by_repo[repo])]
+    top_categories = _top_categories_text(analytics.category_counts) if analytics is not None else "-"
 
     for compact_level in range(0, 4):
         header_lines = _render_header_lines(
@@ -183,29 +221,40 @@ def build_markdown_chunks(
             commits=commits,
             analytics=analytics,
             compact_level=compact_level,
+            repo_count=len(by_repo),
+            top_categories=top_categories,
         )
         chunks: list[str] = []
         header = "\n".join(header_lines)
-        current = header
-
-        for repo in sorted(by_repo.keys()):
-            for line in _build_repo_lines(repo, by_repo[repo]):
-                current = _append_line_with_split(
-                    chunks=chunks,
-                    current=current,
-                    line=line,
-                    header=header,
-                    max_chars=max_chars,
-                )
-
-        if current.strip():
-            chunks.append(current.strip() + "\n")
+        parts = [header]
+        size = len(header)
+        truncated = False
+
+        for line in body_lines:
+            size = _append_line_with_split(
+                chunks=chunks,
+                parts=parts,
+                size=size,
+                line=line,
+                header=header,
+                max_chars=max_chars,
+            )
+            if limit is not None and len(chunks) >= limit:
+                truncated = True
+                break
+
+        if truncated:
+            chunks = chunks[:limit]
+        else:
+            current = "".join(parts)
+            if current.strip():
+                chunks.append(current.strip() + "\n")
         if not chunks:
             chunks = ["\n".join(header_lines).strip() + "\n"]
 
         too_long = any(len(chunk) > max_chars for chunk in chunks)
         if not too_long:
-            total = len(chunks)
+            total = "?" if truncated else str(len(chunks))
             with_index: list[str] = []
             for idx, chunk in enumerate(chunks, 1):
                 first_line, sep, tail = chunk.partition("\n")
@@ -1,12 +1,29 @@
 from __future__ import annotations
 
+import hashlib
 import sqlite3
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from pathlib import Path
 
+from agos import fastjson
 
-@dataclass(frozen=True)
+# 固定的 SQL 文本：sqlite3 按语句文本缓存已编译的语句，同一连接上的重复 record() 不再重新解析
+_INSERT_RUN_SQL = """
+    INSERT INTO digest_runs (
+        digest_key, date, timezone, repos, authors,
+        status, trace_id, commit_count, chunk_count, force_send,
+        created_at, updated_at, error_message
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def hash_digest_key(raw: str) -> str:
+    """digest_key 统一存 BLAKE2b-128 的 32 位十六进制摘要，索引条目定长。"""
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
 class DigestRunState:
     digest_key: str
     date: str
@@ -32,6 +49,13 @@ class CommitDigestStateStore:
         self._conn.close()
 
     def _init_schema(self) -> None:
+        # WAL：日报任务写入时不阻塞并发读取（如人工查询指标）
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL 下 NORMAL 只在检查点时 fsync，单次运行的几次小写入不再各自落盘
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # 库很小（几 MB 以内），8MB 页缓存与内存临时表足以让查询全程不落盘
+        self._conn.execute("PRAGMA cache_size=-8000")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
         self._conn.execute(
             """
             CREATE TABLE IF NOT EXISTS digest_runs (
@@ -58,12 +82,68 @@ class CommitDigestStateStore:
         self._conn.execute(
             "CREATE INDEX IF NOT EXISTS idx_digest_status ON digest_runs(status)"
         )
+        # is_success 按 (digest_key, status) 点查，复合索引可直接覆盖，不必回表过滤
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_digest_key_status ON digest_runs(digest_key, status)"
+        )
         columns = {
             str(row[1])
             for row in self._conn.execute("PRAGMA table_info(digest_runs)").fetchall()
         }
         if "chunk_count" not in columns:
             self._conn.execute("ALTER TABLE digest_runs ADD COLUMN chunk_count INTEGER NOT NULL DEFAULT 0")
+        # 旧版本直接存原始 "date|tz|repo:...|authors:..." 串；就地换成摘要，部署当天不会重发已成功的日报
+        legacy = self._conn.execute(
+            "SELECT id, digest_key FROM digest_runs WHERE instr(digest_key, '|') > 0"
+        ).fetchall()
+        if legacy:
+            self._conn.executemany(
+                "UPDATE digest_runs SET digest_key = ? WHERE id = ?",
+                ((hash_digest_key(row["digest_key"]), row["id"]) for row in legacy),
+            )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS commit_page_cache (
+                repo TEXT NOT NULL,
+                since TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                etag TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                next_url TEXT,
+                PRIMARY KEY (repo, since, page)
+            )
+            """
+        )
+        page_columns = {
+            str(row[1])
+            for row in self._conn.execute("PRAGMA table_info(commit_page_cache)").fetchall()
+        }
+        if "next_url" not in page_columns:
+            self._conn.execute("ALTER TABLE commit_page_cache ADD COLUMN next_url TEXT")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS commit_watermarks (
+                repo TEXT NOT NULL,
+                authors_key TEXT NOT NULL,
+                since TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                items TEXT NOT NULL,
+                PRIMARY KEY (repo, authors_key)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS digest_metrics (
+                date TEXT PRIMARY KEY,
+                total_runs INTEGER NOT NULL,
+                success_runs INTEGER NOT NULL,
+                sample_size INTEGER NOT NULL DEFAULT 0,
+                sample_correct INTEGER NOT NULL DEFAULT 0,
+                accuracy REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
         self._conn.commit()
 
     def begin(self) -> None:
@@ -82,16 +162,22 @@ class CommitDigestStateStore:
         ).fetchone()
         return row is not None
 
+    def load_run_context(self, digest_key: str) -> tuple[bool, str | None]:
+        """一次查询取回 (今日是否已成功, 上一次运行状态)，替代 is_success + recent_failures 两趟查询。"""
+        row = self._conn.execute(
+            """
+            SELECT
+                EXISTS(SELECT 1 FROM digest_runs WHERE digest_key = ? AND status = 'success'),
+                (SELECT status FROM digest_runs ORDER BY id DESC LIMIT 1)
+            """,
+            (digest_key,),
+        ).fetchone()
+        return bool(row[0]), (str(row[1]) if row[1] is not None else None)
+
     def record(self, state: DigestRunState, *, force_send: bool) -> None:
         now = datetime.now(UTC).isoformat()
         self._conn.execute(
-            """
-            INSERT INTO digest_runs (
-                digest_key, date, timezone, repos, authors,
-                status, trace_id, commit_count, chunk_count, force_send,
-                created_at, updated_at, error_message
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
+            _INSERT_RUN_SQL,
             (
                 state.digest_key,
                 state.date,
@@ -118,3 +204,118 @@ class CommitDigestStateStore:
         if len(statuses) < limit:
             return 0
         return limit if all(status == "failed" for status in statuses) else 0
+
+    def record_metrics(
+        self,
+        *,
+        date: str,
+        success: bool,
+        sample_size: int = 0,
+        sample_correct: int = 0,
+    ) -> None:
+        """按日累加运行次数；sample_* 传 0 表示沿用当日已有的抽样数据。"""
+        self._conn.execute(
+            """
+            INSERT INTO digest_metrics (date, total_runs, success_runs, sample_size, sample_correct)
+            VALUES (?, 1, ?, ?, ?)
+            ON CONFLICT(date) DO UPDATE SET
+                total_runs = total_runs + 1,
+                success_runs = success_runs + excluded.success_runs,
+                sample_size = CASE WHEN excluded.sample_size > 0 THEN excluded.sample_size ELSE sample_size END,
+                sample_correct = CASE WHEN excluded.sample_correct > 0 THEN excluded.sample_correct ELSE sample_correct END
+            """,
+            (date, 1 if success else 0, max(sample_size, 0), max(sample_correct, 0)),
+        )
+        self._conn.execute(
+            """
+            UPDATE digest_metrics
+            SET accuracy = CASE WHEN sample_size > 0 THEN ROUND(CAST(sample_correct AS REAL) / sample_size, 4) ELSE 0.0 END
+            WHERE date = ?
+            """,
+            (date,),
+        )
+
+    def metrics(self, date: str) -> dict[str, object] | None:
+        row = self._conn.execute(
+            "SELECT date, total_runs, success_runs, sample_size, sample_correct, accuracy "
+            "FROM digest_metrics WHERE date = ?",
+            (date,),
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def cached_page(
+        self,
+        *,
+        repo: str,
+        since: str,
+        page: int,
+    ) -> tuple[str, list[dict[str, object]], str | None] | None:
+        row = self._conn.execute(
+            "SELECT etag, payload, next_url FROM commit_page_cache WHERE repo = ? AND since = ? AND page = ?",
+            (repo, since, page),
+        ).fetchone()
+        if row is None:
+            return None
+        payload = fastjson.loads(row["payload"])
+        if not isinstance(payload, list):
+            return None
+        return str(row["etag"]), payload, row["next_url"]
+
+    def save_page(
+        self,
+        *,
+        repo: str,
+        since: str,
+        page: int,
+        etag: str,
+        payload: list[dict[str, object]],
+        next_url: str | None = None,
+    ) -> None:
+        """缓存一页 commits 及其 ETag；同仓库旧窗口的缓存顺带清掉，表只保留当天数据。"""
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM commit_page_cache WHERE repo = ? AND since <> ?",
+                (repo, since),
+            )
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO commit_page_cache (repo, since, page, etag, payload, next_url)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (repo, since, page, etag, fastjson.dumps(payload), next_url),
+            )
+
+    def load_watermark(
+        self,
+        *,
+        repo: str,
+        authors_key: str,
+        since: str,
+    ) -> tuple[str, list[dict[str, object]]] | None:
+        """返回同一时间窗口内上次看到的最新提交时间及已采集的提交；窗口变化（跨天）视为无水位。"""
+        row = self._conn.execute(
+            "SELECT last_seen, items FROM commit_watermarks WHERE repo = ? AND authors_key = ? AND since = ?",
+            (repo, authors_key, since),
+        ).fetchone()
+        if row is None:
+            return None
+        items = fastjson.loads(row["items"])
+        return (str(row["last_seen"]), items) if isinstance(items, list) else None
+
+    def save_watermark(
+        self,
+        *,
+        repo: str,
+        authors_key: str,
+        since: str,
+        last_seen: str,
+        items: list[dict[str, object]],
+    ) -> None:
+        with self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO commit_watermarks (repo, authors_key, since, last_seen, items)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (repo, authors_key, since, last_seen, fastjson.dumps(items)),
+            )
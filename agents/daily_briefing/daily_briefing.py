@@ -5,11 +5,14 @@ Antigravity OS  |  Daily Briefing Agent
 """
 
 import argparse
+import heapq
 import os
+import re
+from bisect import bisect_right
 from datetime import datetime, timedelta
-from urllib.parse import urlparse
+from operator import attrgetter, itemgetter
 
-from scripts.stats import collect
+from scripts.stats import collect_cached
 from agos.config import backlog_threshold_days
 from agos.notify import send_message
 from skills.feishu_bridge import FeishuBridgeError, build_bridge_from_env
@@ -20,48 +23,58 @@ BACKLOG_THRESHOLD_DAYS = backlog_threshold_days()
 
 # ── 格式化工具 ────────────────────────────────────────────────────
 
+_SPARK_BARS = " ▁▂▃▄▅▆▇█"
+_WEEKDAY_NAMES = ("月", "火", "水", "木", "金", "土", "日")
+# 推送失败时本地输出用：去掉报告里用到的 Telegram HTML 标签（含 <a href=...>）
+_HTML_TAG_RE = re.compile(r"</?(?:b|i|code|a)(?:\s[^>]*)?>")
+
+
 def sparkline(values: list[int]) -> str:
-    bars = " ▁▂▃▄▅▆▇█"
-    if not values or max(values) == 0:
+    m = max(values, default=0)
+    if m == 0:
         return "─" * 7
-    m = max(values)
-    return "".join(bars[min(int(v / m * 8), 8)] for v in values)
+    # 计数都是非负整数：v * 8 // m 与 int(v / m * 8) 结果相同，省去浮点除法
+    return "".join(_SPARK_BARS[min(v * 8 // m, 8)] for v in values)
+
+# 阈值升序；bisect_right 得到 >= 的档位数，直接索引图标
+_HEALTH_THRESHOLDS = (60, 85)
+_HEALTH_EMOJIS = ("🔴", "🟡", "🟢")
+_MEDAL_THRESHOLDS = (8.5, 9.0, 9.5)
+_MEDALS = ("⭐️", "🥇", "🏆", "💎")
 
 def health_emoji(score: float) -> str:
-    if score >= 85: return "🟢"
-    if score >= 60: return "🟡"
-    return "🔴"
+    return _HEALTH_EMOJIS[bisect_right(_HEALTH_THRESHOLDS, score)]
 
 def score_medal(score: float) -> str:
-    if score >= 9.5: return "💎"
-    if score >= 9.0: return "🏆"
-    if score >= 8.5: return "🥇"
-    return "⭐️"
+    return _MEDALS[bisect_right(_MEDAL_THRESHOLDS, score)]
 
-def fmt_cron_time(dt, idle_hours: float | None = None) -> str:
+def fmt_cron_time(dt, idle_hours: float | None = None, now: datetime | None = None) -> str:
     if not dt: return "❌ 从未运行"
     h = idle_hours
     if h is None:
-        delta = datetime.now() - dt
+        delta = (now or datetime.now()) - dt
         h = delta.total_seconds() / 3600
     status = "✅" if h < 26 else "⚠️"
     return f"{status} {dt.strftime('%H:%M')} ({h:.0f}h 前)"
 
 
-def is_cron_stale(dt, max_hours: int = 26, idle_hours: float | None = None) -> bool:
+def is_cron_stale(
+    dt, max_hours: int = 26, idle_hours: float | None = None, now: datetime | None = None
+) -> bool:
     if not dt:
         return True
     if idle_hours is not None:
         return idle_hours >= max_hours
-    return (datetime.now() - dt).total_seconds() / 3600 >= max_hours
+    return ((now or datetime.now()) - dt).total_seconds() / 3600 >= max_hours
 
 
 # ── 报告生成 ──────────────────────────────────────────────────────
 
 def build_report(r) -> str:
-    today = datetime.now().strftime("%Y-%m-%d")
-    weekday_names = ["月", "火", "水", "木", "金", "土", "日"]
-    weekday = weekday_names[datetime.now().weekday()]
+    # 整份报告共用同一个时间点，避免跨零点时日期/星期/时刻不一致
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    weekday = _WEEKDAY_NAMES[now.weekday()]
 
     # ── 1. 健康分析 & 审计警报 ───────────────────────────────────
     he = health_emoji(r.health_score)
@@ -79,9 +92,9 @@ def build_report(r) -> str:
     bouncer_idle = getattr(r, "bouncer_idle_hours", None)
     inbox_idle = getattr(r, "inbox_idle_hours", None)
 
-    if is_cron_stale(r.last_bouncer_run, idle_hours=bouncer_idle):
+    if is_cron_stale(r.last_bouncer_run, idle_hours=bouncer_idle, now=now):
         alerts.append("🤖 <b>Cron 异常</b>：Bouncer 超过 26h 未成功运行")
-    if is_cron_stale(r.last_inbox_run, idle_hours=inbox_idle):
+    if is_cron_stale(r.last_inbox_run, idle_hours=inbox_idle, now=now):
         alerts.append("🧠 <b>Cron 异常</b>：Inbox Processor 超过 26h 未成功运行")
 
     alert_section = ""
@@ -109,28 +122,32 @@ def build_report(r) -> str:
 
     if r.error_types:
         lines.append("🧩 <b>失败类型 Top</b>")
-        top_errors = sorted(r.error_types.items(), key=lambda x: x[1], reverse=True)[:3]
-        for err_type, count in top_errors:
-            lines.append(f"  • <code>{err_type}</code>: {count}")
+        top_errors = heapq.nlargest(3, r.error_types.items(), key=itemgetter(1))
+        lines.extend(f"  • <code>{err_type}</code>: {count}" for err_type, count in top_errors)
         lines.append("")
 
     # ── 3. 今日/昨日 Top 5 ───────────────────────────────────────
-    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-    today_notes = sorted(
-        [n for n in r.notes if n.created in (today, yesterday)],
-        key=lambda n: n.score, reverse=True,
-    )[:5]
+    # 一次遍历分出近期与 pending 两组，再各取 Top N（nlargest 与 sorted(...)[:n] 结果一致）
+    yesterday = (now - timedelta(days=1)).strftime("%Y-%m-%d")
+    recent_days = frozenset((today, yesterday))
+    recent_notes, pending_notes = [], []
+    for n in r.notes:
+        if n.created in recent_days:
+            recent_notes.append(n)
+        if n.status == "pending":
+            pending_notes.append(n)
+    by_score = attrgetter("score")
+    today_notes = heapq.nlargest(5, recent_notes, key=by_score)
+    top_pending = heapq.nlargest(3, pending_notes, key=by_score)
 
     if today_notes:
         lines.append("🔥 <b>近期高价值入库</b>")
         for n in today_notes:
             medal = score_medal(n.score)
             title = (n.title or n.filename)[:40]
-            host = urlparse(n.source).netloc[:20] if n.source else "─"
-            lines.append(f'  {medal} [{n.score:.1f}] <a href="{n.source}">{title}</a> <code>{host}</code>')
+            lines.append(f'  {medal} [{n.score:.1f}] <a href="{n.source}">{title}</a> <code>{n.host or "─"}</code>')
         lines.append("")
     elif r.pending > 0:
-        top_pending = sorted([n for n in r.notes if n.status == "pending"], key=lambda n: n.score, reverse=True)[:3]
         if top_pending:
             lines.append("⏳ <b>待处理积压 (Top 3)</b>")
             for n in top_pending:
@@ -138,32 +155,30 @@ def build_report(r) -> str:
             lines.append("")
 
     # ── 4. Cron & 7d 趋势 ────────────────────────────────────────
-    lines += [
+    lines.extend((
         "⏰ <b>Cron 状态</b>",
-        f"  🤖 Bouncer: {fmt_cron_time(r.last_bouncer_run, idle_hours=bouncer_idle)}",
-        f"  🧠 Inbox:   {fmt_cron_time(r.last_inbox_run, idle_hours=inbox_idle)}",
+        f"  🤖 Bouncer: {fmt_cron_time(r.last_bouncer_run, idle_hours=bouncer_idle, now=now)}",
+        f"  🧠 Inbox:   {fmt_cron_time(r.last_inbox_run, idle_hours=inbox_idle, now=now)}",
         "",
         "📊 <b>本周趋势（7天）</b>",
         f"  入库: <code>{sparkline(r.bouncer_7day)}</code>  {sum(r.bouncer_7day)} 条",
         f"  完成: <code>{sparkline(r.throughput_7day)}</code>  {sum(r.throughput_7day)} 条",
         "",
-    ]
+    ))
 
     # ── 5. 合成建议 ────────────────────────────────────────────
-    pending_high = [n for n in r.notes if n.status == "pending" and n.score >= 9.0]
-
-    if pending_high:
-        top = max(pending_high, key=lambda n: n.score)
-        lines += [
+    if top_pending and top_pending[0].score >= 9.0:
+        top = top_pending[0]
+        lines.extend((
             "🎯 <b>今日重点阅读</b>",
             f'  {score_medal(top.score)} [{top.score:.1f}] <a href="{top.source}">{(top.title or top.filename)[:50]}</a>',
             "",
-        ]
+        ))
 
-    lines += [
+    lines.extend((
         "─────────────────────",
-        f"<i>Antigravity OS · {datetime.now().strftime('%H:%M')}</i>",
-    ]
+        f"<i>Antigravity OS · {now.strftime('%H:%M')}</i>",
+    ))
 
     return "\n".join(lines)
 
@@ -180,10 +195,9 @@ def build_feishu_log_entry(r) -> str:
     if r.bottleneck:
         lines.append(f"- 当前瓶颈：{r.bottleneck}")
     if r.error_types:
-        top_errors = sorted(r.error_types.items(), key=lambda x: x[1], reverse=True)[:3]
+        top_errors = heapq.nlargest(3, r.error_types.items(), key=itemgetter(1))
         lines.append("- 错误类型 Top:")
-        for err_type, count in top_errors:
-            lines.append(f"  - `{err_type}`: {count}")
+        lines.extend(f"  - `{err_type}`: {count}" for err_type, count in top_errors)
     return "\n".join(lines)
 
 
@@ -213,9 +227,9 @@ def sync_to_feishu_daily_log(r, *, bridge=None) -> bool:
             active_bridge.close()
 
 
-def main(mock: bool = False):
+def main(mock: bool = False, force_refresh: bool = False):
     print(f"🌅 [Daily Briefing] 生成早报...")
-    r = collect()
+    r = collect_cached(force_refresh=force_refresh)
 
     if mock and r.total == 0:
         r.total, r.pending, r.done, r.health_score = 50, 5, 45, 92.0
@@ -226,10 +240,12 @@ def main(mock: bool = False):
     if send_message(report):
         print("✅ Daily Briefing 推送成功")
     else:
-        print("⚠️ 推送失败，本地输出：\n" + report.replace("<b>", "").replace("</b>", ""))
+        print("⚠️ 推送失败，本地输出：\n" + _HTML_TAG_RE.sub("", report))
     sync_to_feishu_daily_log(r)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--mock", action="store_true")
-    main(mock=parser.parse_args().mock)
+    parser.add_argument("--force-refresh", action="store_true", help="忽略统计快照，重新扫描")
+    args = parser.parse_args()
+    main(mock=args.mock, force_refresh=args.force_refresh)
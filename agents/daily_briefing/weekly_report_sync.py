@@ -7,10 +7,12 @@ Antigravity OS  |  Weekly Feishu Report Sync
 from __future__ import annotations
 
 import argparse
+import heapq
 import os
 from datetime import datetime, timedelta
+from operator import itemgetter
 
-from scripts.stats import collect
+from scripts.stats import collect_cached
 from skills.feishu_bridge import FeishuBridgeError, build_bridge_from_env
 
 
@@ -37,19 +39,17 @@ def _build_weekly_markdown(r, *, today: datetime | None = None) -> str:
     if r.bottleneck:
         lines.append(f"- 当前瓶颈：{r.bottleneck}")
     if r.error_types:
-        top_errors = sorted(r.error_types.items(), key=lambda x: x[1], reverse=True)[:5]
-        lines.append("")
-        lines.append("## 错误类型 Top")
-        for err_type, count in top_errors:
-            lines.append(f"- `{err_type}`: {count}")
+        top_errors = heapq.nlargest(5, r.error_types.items(), key=itemgetter(1))
+        lines.extend(("", "## 错误类型 Top"))
+        lines.extend(f"- `{err_type}`: {count}" for err_type, count in top_errors)
     return "\n".join(lines)
 
 
-def sync_weekly_report(*, bridge=None, today: datetime | None = None) -> dict:
+def sync_weekly_report(*, bridge=None, today: datetime | None = None, force_refresh: bool = False) -> dict:
     if os.getenv("FEISHU_WEEKLY_REPORT_ENABLED", "true").strip().lower() in {"0", "false", "off"}:
         return {"success": False, "message": "FEISHU_WEEKLY_REPORT_ENABLED=false，跳过同步"}
 
-    r = collect()
+    r = collect_cached(force_refresh=force_refresh)
     start, end = _week_range(today)
     title = f"周报 - {start} ~ {end}"
     section_title = os.getenv("FEISHU_WEEKLY_SECTION", "5. 周报 & 复盘区（留空，Claude以后生成）").strip()
@@ -66,11 +66,12 @@ def sync_weekly_report(*, bridge=None, today: datetime | None = None) -> dict:
         weekly_url = created.get("url", "")
 
         markdown = _build_weekly_markdown(r, today=today)
-        active_bridge.append_markdown(markdown, document_id=weekly_doc_id)
-        active_bridge.append_markdown(
-            f"- [{title}]({weekly_url})\n  - 健康度 {r.health_score:.0f}/100，入库 {r.total}，完成 {r.done}，待处理 {r.pending}",
-            section_title=section_title or None,
+        link_markdown = (
+            f"- [{title}]({weekly_url})\n  - 健康度 {r.health_score:.0f}/100，入库 {r.total}，完成 {r.done}，待处理 {r.pending}"
         )
+        # 正文写入成功后才在主文档挂索引链接，避免链接指向空的周报子文档
+        active_bridge.append_markdown(markdown, document_id=weekly_doc_id)
+        active_bridge.append_markdown(link_markdown, section_title=section_title or None)
         return {
             "success": True,
             "title": title,
@@ -87,14 +88,15 @@ def sync_weekly_report(*, bridge=None, today: datetime | None = None) -> dict:
 def main() -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--force-refresh", action="store_true", help="忽略统计快照，重新扫描")
     args = parser.parse_args()
 
     if args.dry_run:
-        r = collect()
+        r = collect_cached(force_refresh=args.force_refresh)
         print(_build_weekly_markdown(r))
         return 0
 
-    result = sync_weekly_report()
+    result = sync_weekly_report(force_refresh=args.force_refresh)
     if result.get("success"):
         print(f"✅ 周报同步成功: {result.get('url')}")
         return 0
@@ -17,15 +17,18 @@ Antigravity OS | Inbox 消费者 Agent
 """
 
 import os
-import json
-import time
+import random
+import asyncio
 import argparse
-import subprocess
+import tempfile
+from collections import Counter
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 
 from agos.config import min_score_threshold
 from agos.notify import send_message
+from scripts.stats import invalidate_snapshot
 
 from skills.obsidian_bridge.bridge import (
     scan_pending,
@@ -39,6 +42,11 @@ from skills.obsidian_bridge.bridge import (
 MIN_SCORE = float(os.getenv("INBOX_MIN_SCORE", str(min_score_threshold())))
 NLM_TIMEOUT = int(os.getenv("NLM_TIMEOUT", "900"))
 ARCHIVE_DONE = os.getenv("INBOX_ARCHIVE_DONE", "true").lower() == "true"
+# 单条笔记大部分时间在等 NotebookLM 轮询，多条并发处理；上限避免压垮 NotebookLM 配额
+INBOX_CONCURRENCY = max(1, int(os.getenv("INBOX_CONCURRENCY", "4")))
+# source / artifact 就绪轮询：进程内指数退避 1s, 2s, 4s … 封顶 30s
+NLM_POLL_INITIAL_SEC = 1.0
+NLM_POLL_MAX_SEC = 30.0
 
 # ── NotebookLM 集成 ───────────────────────────────────────────────
 def _warn(scope: str, detail: str):
@@ -54,25 +62,27 @@ def _set_error(result: dict, error_type: str, message: str, note_path: str = "",
     return result
 
 
-def _run(cmd: list[str], timeout: int = 60) -> tuple[int, str, str]:
-    """运行子命令，返回 (returncode, stdout, stderr)。"""
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-        )
-        return result.returncode, result.stdout.strip(), result.stderr.strip()
-    except subprocess.TimeoutExpired as e:
-        return 2, "", f"命令超时({timeout}s): {' '.join(cmd)} | {e}"
-    except FileNotFoundError:
-        return 127, "", f"命令不存在: {cmd[0]}"
-    except Exception as e:
-        return 1, "", f"命令执行异常: {' '.join(cmd)} | {e}"
+@asynccontextmanager
+async def _open_notebooklm():
+    """整批笔记共用一个进程内 NotebookLM 客户端，替代逐步 fork `notebooklm` CLI。"""
+    from notebooklm import NotebookLMClient
+
+    async with NotebookLMClient.from_storage() as client:
+        yield client
+
+
+class _UnavailableNotebookLM:
+    """客户端初始化失败时的替身：创建 notebook 即抛出原始异常，走 notebook_create_failed 分支。"""
+
+    def __init__(self, exc: Exception):
+        self._exc = exc
+        self.notebooks = self
 
+    async def create(self, title):
+        raise self._exc
 
-def process_with_notebooklm(title: str, source_url: str, note_path: str) -> dict:
+
+async def process_with_notebooklm(title: str, source_url: str, note_path: str, client) -> dict:
     """
     对单篇文章：
       1. 创建 NotebookLM notebook
@@ -93,97 +103,90 @@ def process_with_notebooklm(title: str, source_url: str, note_path: str) -> dict
     }
 
     safe_name = title[:50].replace('"', "'")
-    rc, out, err = _run(["notebooklm", "create", f"Bouncer: {safe_name}", "--json"], timeout=30)
-    if rc != 0:
-        return _set_error(result, "notebook_create_failed", f"创建 notebook 失败: {err}", note_path, source_url)
-
     try:
-        nb_data = json.loads(out)
-        notebook_id = nb_data["id"]
-        result["notebook_id"] = notebook_id
-        print(f"    📓 Notebook 创建成功: {notebook_id[:8]}...")
-    except (json.JSONDecodeError, KeyError) as e:
-        return _set_error(result, "notebook_create_parse_failed", f"解析 notebook ID 失败: {e} | 原始输出: {out}", note_path, source_url)
+        notebook = await client.notebooks.create(f"Bouncer: {safe_name}")
+    except Exception as e:
+        return _set_error(result, "notebook_create_failed", f"创建 notebook 失败: {e}", note_path, source_url)
+
+    notebook_id = getattr(notebook, "id", "") or ""
+    if not notebook_id:
+        return _set_error(result, "notebook_create_parse_failed", f"解析 notebook ID 失败: {notebook!r}", note_path, source_url)
+    result["notebook_id"] = notebook_id
+    print(f"    📓 Notebook 创建成功: {notebook_id[:8]}...")
 
     if source_url:
-        rc, out, err = _run(
-            ["notebooklm", "source", "add", source_url, "--notebook", notebook_id, "--json"],
-            timeout=30
-        )
-        if rc != 0:
-            print(f"    ⚠️  添加 source 失败（继续）: {err[:100]}")
+        try:
+            source = await client.sources.add_url(notebook_id, source_url)
+        except Exception as e:
+            print(f"    ⚠️  添加 source 失败（继续）: {str(e)[:100]}")
         else:
-            try:
-                src_data = json.loads(out)
-                source_id = src_data.get("source_id", "")
-                print(f"    🔗 Source 添加中: {source_id[:8]}...")
-
-                if source_id:
-                    rc2, _, _ = _run(
-                        ["notebooklm", "source", "wait", source_id,
-                         "--notebook", notebook_id, "--timeout", "120"],
-                        timeout=130
+            source_id = getattr(source, "id", "") or ""
+            print(f"    🔗 Source 添加中: {source_id[:8]}...")
+            if source_id:
+                try:
+                    await client.sources.wait_until_ready(
+                        notebook_id,
+                        source_id,
+                        timeout=120,
+                        initial_interval=NLM_POLL_INITIAL_SEC,
+                        max_interval=NLM_POLL_MAX_SEC,
+                        backoff_factor=2.0,
                     )
-                    if rc2 == 0:
-                        print(f"    ✅ Source 处理完毕")
-                    else:
-                        print(f"    ⚠️  Source 处理超时，继续生成...")
-            except (json.JSONDecodeError, KeyError) as e:
-                _warn("inbox/source_add", f"解析 source 响应失败，继续后续流程: {e}")
+                    print(f"    ✅ Source 处理完毕")
+                except Exception as e:
+                    _warn("inbox/source_wait", f"Source 未就绪，继续生成: {e}")
     else:
         print(f"    ⚠️  无源 URL，直接生成报告...")
 
-    rc, out, err = _run(
-        ["notebooklm", "generate", "report",
-         "--format", "study-guide",
-         "--notebook", notebook_id,
-         "--json"],
-        timeout=60
-    )
-    if rc != 0:
-        return _set_error(result, "report_generate_failed", f"生成报告失败: {err}", note_path, source_url)
-
     try:
-        gen_data = json.loads(out)
-        task_id = gen_data.get("task_id", "")
-        print(f"    🔄 报告生成中，task_id: {task_id[:8]}...")
-    except (json.JSONDecodeError, KeyError) as e:
-        return _set_error(result, "report_task_parse_failed", f"解析 task_id 失败: {e}", note_path, source_url)
-
-    rc, out, err = _run(
-        ["notebooklm", "artifact", "wait", task_id,
-         "--notebook", notebook_id,
-         "--timeout", str(NLM_TIMEOUT)],
-        timeout=NLM_TIMEOUT + 30
-    )
-    if rc == 2:
-        return _set_error(result, "report_wait_timeout", f"报告生成超时（>{NLM_TIMEOUT}s）", note_path, source_url)
-    if rc != 0:
-        return _set_error(result, "report_wait_failed", f"等待报告失败: {err}", note_path, source_url)
-
-    tmp_path = f"/tmp/nlm_report_{notebook_id[:8]}.md"
-    rc, out, err = _run(
-        ["notebooklm", "download", "report", tmp_path,
-         "--notebook", notebook_id],
-        timeout=30
-    )
-    if rc != 0:
-        return _set_error(result, "report_download_failed", f"下载报告失败: {err}", note_path, source_url)
+        status = await client.artifacts.generate_report(
+            notebook_id, report_format="study_guide", language=None
+        )
+    except Exception as e:
+        return _set_error(result, "report_generate_failed", f"生成报告失败: {e}", note_path, source_url)
 
-    try:
-        report_content = Path(tmp_path).read_text(encoding="utf-8")
-        result["success"] = True
-        result["report"] = report_content
-        print(f"    📄 报告下载成功（{len(report_content)} 字符）")
-    except FileNotFoundError:
-        return _set_error(result, "report_file_missing", "报告文件未找到", note_path, source_url)
+    task_id = getattr(status, "task_id", "") or ""
+    if not task_id:
+        return _set_error(result, "report_task_parse_failed", f"解析 task_id 失败: {status!r}", note_path, source_url)
+    print(f"    🔄 报告生成中，task_id: {task_id[:8]}...")
 
+    try:
+        status = await client.artifacts.wait_for_completion(
+            notebook_id,
+            task_id,
+            initial_interval=NLM_POLL_INITIAL_SEC,
+            max_interval=NLM_POLL_MAX_SEC,
+            timeout=NLM_TIMEOUT,
+        )
+    except TimeoutError:
+        return _set_error(result, "report_wait_timeout", f"报告生成超时（>{NLM_TIMEOUT}s）", note_path, source_url)
+    except Exception as e:
+        return _set_error(result, "report_wait_failed", f"等待报告失败: {e}", note_path, source_url)
+    if not status.is_complete:
+        return _set_error(result, "report_wait_failed", f"等待报告失败: {status.error or status.status}", note_path, source_url)
+
+    # download_report 只支持落盘；用临时目录承接并在读取后立即清理，不在 /tmp 留文件
+    with tempfile.TemporaryDirectory(prefix="nlm_report_") as tmp_dir:
+        tmp_path = Path(tmp_dir) / f"{notebook_id[:8]}.md"
+        try:
+            await client.artifacts.download_report(notebook_id, str(tmp_path), artifact_id=task_id)
+        except Exception as e:
+            return _set_error(result, "report_download_failed", f"下载报告失败: {e}", note_path, source_url)
+
+        try:
+            report_content = tmp_path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return _set_error(result, "report_file_missing", "报告文件未找到", note_path, source_url)
+
+    result["success"] = True
+    result["report"] = report_content
+    print(f"    📄 报告下载成功（{len(report_content)} 字符）")
     return result
 
 
 # ── 主流水线 ──────────────────────────────────────────────────────
 
-def process_note(note: dict, dry_run: bool = False) -> dict:
+async def process_note(note: dict, dry_run: bool = False, client=None) -> dict:
     """处理单个 pending 笔记。"""
     path = note["path"]
     title = note["title"]
@@ -209,7 +212,7 @@ def process_note(note: dict, dry_run: bool = False) -> dict:
         outcome["success"] = True
         return outcome
 
-    nlm_result = process_with_notebooklm(title, source, path)
+    nlm_result = await process_with_notebooklm(title, source, path, client)
     outcome["notebook_id"] = nlm_result.get("notebook_id", "")
     outcome["error_type"] = nlm_result.get("error_type", "")
 
@@ -248,13 +251,33 @@ def process_note(note: dict, dry_run: bool = False) -> dict:
     return outcome
 
 
+async def process_all(pending: list[dict], dry_run: bool = False) -> list[dict]:
+    """按 INBOX_CONCURRENCY 并发处理，结果顺序与 pending 一致。"""
+    semaphore = asyncio.Semaphore(INBOX_CONCURRENCY)
+
+    async def _guarded(note: dict, client) -> dict:
+        async with semaphore:
+            outcome = await process_note(note, dry_run=dry_run, client=client)
+            # 短暂错开下一条的启动，平滑对 NotebookLM 的请求
+            await asyncio.sleep(random.uniform(0.2, 0.5))
+            return outcome
+
+    if dry_run:
+        return await asyncio.gather(*[_guarded(note, None) for note in pending])
+    async with AsyncExitStack() as stack:
+        try:
+            client = await stack.enter_async_context(_open_notebooklm())
+        except Exception as e:
+            # 登录态过期 / 未安装 notebooklm：逐条标记失败，保证 frontmatter 与 Telegram 汇报照常产出
+            _warn("inbox/notebooklm_open", f"NotebookLM 客户端初始化失败: {e}")
+            client = _UnavailableNotebookLM(e)
+        return await asyncio.gather(*[_guarded(note, client) for note in pending])
+
+
 def build_telegram_report(results: list[dict], total_pending: int) -> str:
     success_list = [r for r in results if r["success"]]
     fail_list = [r for r in results if not r["success"]]
-    fail_type_counter = {}
-    for r in fail_list:
-        key = r.get("error_type", "") or "unknown_error"
-        fail_type_counter[key] = fail_type_counter.get(key, 0) + 1
+    fail_type_counter = Counter(r.get("error_type", "") or "unknown_error" for r in fail_list)
 
     lines = [
         "🧠 <b>Inbox Processor 报告</b>",
@@ -299,11 +322,7 @@ def main(dry_run: bool = False, limit: int = 0):
         pending = pending[:limit]
         print(f"\n⚡ 本次限制处理前 {limit} 条（共 {total_pending} 条待处理）")
 
-    results = []
-    for note in pending:
-        result = process_note(note, dry_run=dry_run)
-        results.append(result)
-        time.sleep(2)
+    results = asyncio.run(process_all(pending, dry_run=dry_run))
 
     success_count = sum(1 for r in results if r["success"])
     print("\n" + "=" * 55)
@@ -311,6 +330,8 @@ def main(dry_run: bool = False, limit: int = 0):
     print("=" * 55)
 
     if not dry_run:
+        # 笔记状态已改写，让早报/周报下次重新扫描
+        invalidate_snapshot()
         tg_text = build_telegram_report(results, total_pending)
         ok = send_message(tg_text)
         if ok:
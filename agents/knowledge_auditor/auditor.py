@@ -4,19 +4,31 @@ auditor.py
 Antigravity OS  |  Knowledge Auditor Agent
 """
 
+import os
 import re
+import sqlite3
 import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Tuple
 
-from agos.config import vault_path, backlog_threshold_days, inbox_folder
-from agos.frontmatter import parse_frontmatter
+from agos.config import auditor_scan_cache_db_file, vault_path, backlog_threshold_days, inbox_folder
+from agos.frontmatter import parse_frontmatter, read_frontmatter_block
 from agos.notify import send_message
 
+from agents.knowledge_auditor.scan_cache import AuditScanCache, ScanEntry
+
 # ── 配置 ─────────────────────────────────────────────────────────
 INBOX_FOLDER = inbox_folder()
 BACKLOG_THRESHOLD_DAYS = backlog_threshold_days()
+SCAN_WORKERS = 16
+PROCESS_SCAN_MIN_FILES = 2000
+PROCESS_SCAN_CHUNK = 256
+_LINK_RE = re.compile(r"\[\[([^\]|#]+)(?:[|#][^\]]*)?\]\]")
+# frontmatter 顶层 status 行（可带引号与行尾注释）
+_STATUS_LINE_RE = re.compile(r"""^status\s*:\s*['"]?([\w-]+)['"]?\s*(?:#.*)?$""", re.M)
+_AUDITED_STATUSES = frozenset({"pending", "done"})
 
 # ── 核心逻辑 ──────────────────────────────────────────────────────
 def _warn(scope: str, detail: str, err: Exception | None = None):
@@ -25,53 +37,153 @@ def _warn(scope: str, detail: str, err: Exception | None = None):
     else:
         print(f"  ⚠️ [{scope}] {detail}: {err}")
 
+
+def _iter_vault_notes(root: Path):
+    """os.scandir + 显式栈遍历 vault，在 DirEntry 层跳过 . 开头的目录/文件，逐个产出 .md。"""
+    if not root.is_dir():
+        return
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".md"):
+                    yield Path(entry.path)
+
+
+def _scan_note(f: Path, want_fm: bool) -> Tuple[dict, List[str]] | None:
+    """
+    逐行读取单篇笔记，返回 (frontmatter, 原始链接列表)；读取失败返回 None。
+
+    审计只用到 status 为 pending/done 的笔记的 frontmatter：先按行扫出 status，
+    其余笔记（及 want_fm=False 的笔记）跳过完整 YAML 解析，返回空 dict。
+    """
+    try:
+        with f.open(encoding="utf-8", errors="ignore") as fh:
+            header = read_frontmatter_block(fh)
+            links = [m.group(1) for m in _LINK_RE.finditer(header)]
+            for line in fh:
+                # 绝大多数行不含链接：先用 C 层子串查找挡掉，再交给正则
+                if "[[" in line:
+                    links.extend(m.group(1) for m in _LINK_RE.finditer(line))
+    except Exception as e:
+        _warn("auditor/scan", f"读取失败: {f}", e)
+        return None
+
+    fm: dict = {}
+    if want_fm:
+        m = _STATUS_LINE_RE.search(header)
+        if m and m.group(1) in _AUDITED_STATUSES:
+            parsed, _ = parse_frontmatter(header)
+            fm = parsed if isinstance(parsed, dict) else {}
+    return fm, links
+
+
 class Auditor:
-    def __init__(self, vault: Path = None):
+    def __init__(self, vault: Path = None, cache_db: Path | None = None):
         self.vault_path = vault or vault_path()
-        self.all_files = list(self.vault_path.rglob("*.md"))
-        self.all_files = [f for f in self.all_files if not any(part.startswith(".") for part in f.parts)]
-        self.link_map: Dict[str, Set[str]] = {}
-        self._build_link_map()
-
-    def _build_link_map(self):
+        self.cache_db = cache_db or auditor_scan_cache_db_file()
+        self.all_files = list(_iter_vault_notes(self.vault_path))
+        # 孤岛审计只关心 Axiom：记录 Axiom 名与被非地图笔记引用过的 Axiom
+        self._axiom_stems: Set[str] = {f.stem for f in self.all_files if f.stem.startswith("Axiom -")}
+        self._axiom_referenced: Set[str] = set()
+        # 扫描引用时顺带解析 frontmatter，后续审计不再重复读盘
+        self._frontmatter: Dict[Path, dict] = {}
+        self._scan_vault()
+
+    def _scan_vault(self):
+        try:
+            cache = AuditScanCache(self.cache_db)
+        except sqlite3.Error as e:
+            _warn("auditor/scan_cache", f"缓存不可用，全量扫描: {self.cache_db}", e)
+            cache = None
+        try:
+            cached = cache.load(self.vault_path) if cache else {}
+            results, fresh = self._scan_changed(cached)
+            if cache:
+                current = {str(f) for f in self.all_files}
+                cache.sync(self.vault_path, fresh, (p for p in cached if p not in current))
+        except sqlite3.Error as e:
+            _warn("auditor/scan_cache", f"缓存读写失败: {self.cache_db}", e)
+            results, _ = self._scan_changed({})
+        finally:
+            if cache:
+                cache.close()
+
+        # 合并按文件顺序在主线程完成
         for f in self.all_files:
-            self.link_map[f.stem] = set()
-        link_pattern = re.compile(r"\[\[([^\]|#]+)(?:[|#][^\]]*)?\]\]")
+            result = results.get(f)
+            if result is None:
+                continue
+            fm, links = result
+            self._frontmatter[f] = fm
+            if "认知架构地图" in f.stem:
+                continue
+            for link in links:
+                link = link.strip()
+                if link in self._axiom_stems:
+                    self._axiom_referenced.add(link)
+
+    def _scan_changed(self, cached: Dict[str, ScanEntry]) -> Tuple[Dict[Path, Tuple[dict, List[str]]], List[ScanEntry]]:
+        """mtime/size 未变的笔记直接复用缓存，其余并发重读；返回 (全部结果, 新扫描条目)。"""
+        results: Dict[Path, Tuple[dict, List[str]]] = {}
+        todo: List[Tuple[Path, bool, os.stat_result | None]] = []
         for f in self.all_files:
+            want_fm = self._in_metadata_scope(f)
             try:
-                content = f.read_text(encoding="utf-8", errors="ignore")
-                links = link_pattern.findall(content)
-                for link in links:
-                    link = link.strip()
-                    if link in self.link_map:
-                        self.link_map[link].add(f.stem)
-            except Exception as e:
-                _warn("auditor/link_map", f"读取失败: {f}", e)
+                st = f.stat()
+            except OSError:
+                todo.append((f, want_fm, None))
                 continue
+            hit = cached.get(str(f))
+            if hit is not None and hit.stamp == (st.st_mtime_ns, st.st_size, want_fm):
+                results[f] = (hit.fm, hit.links)
+            else:
+                todo.append((f, want_fm, st))
+
+        # 大批量且多核时扫描以正则/YAML 的 CPU 开销为主，改用进程池绕开 GIL；
+        # 少量文件时进程启动与结果序列化得不偿失，仍用线程池
+        if len(todo) >= PROCESS_SCAN_MIN_FILES and (os.cpu_count() or 1) > 1:
+            executor, map_kwargs = ProcessPoolExecutor(), {"chunksize": PROCESS_SCAN_CHUNK}
+        else:
+            executor, map_kwargs = ThreadPoolExecutor(max_workers=SCAN_WORKERS), {}
+        fresh: List[ScanEntry] = []
+        with executor:
+            paths = [f for f, _, _ in todo]
+            flags = [w for _, w, _ in todo]
+            for (f, want_fm, st), result in zip(todo, executor.map(_scan_note, paths, flags, **map_kwargs)):
+                if result is None:
+                    continue
+                results[f] = result
+                if st is not None:
+                    fresh.append(ScanEntry(str(f), st.st_mtime_ns, st.st_size, want_fm, *result))
+        return results, fresh
+
+    def _in_metadata_scope(self, f: Path) -> bool:
+        """backlog / metadata 审计只看 Inbox 下与 vault 根目录的笔记。"""
+        return INBOX_FOLDER in str(f) or f.parent == self.vault_path
 
     def audit_orphans(self) -> List[str]:
-        orphans = []
-        for name, sources in self.link_map.items():
-            if name.startswith("Axiom -"):
-                real_sources = {s for s in sources if "认知架构地图" not in s}
-                if not real_sources:
-                    orphans.append(name)
-        return sorted(orphans)
+        return sorted(self._axiom_stems - self._axiom_referenced)
 
     def audit_backlog(self) -> List[Dict]:
         backlog = []
-        limit_date = datetime.now() - timedelta(days=BACKLOG_THRESHOLD_DAYS)
+        now = datetime.now()
+        limit_date = now - timedelta(days=BACKLOG_THRESHOLD_DAYS)
         inbox_path = self.vault_path / INBOX_FOLDER
-        for f in inbox_path.rglob("*.md"):
+        for f, fm in self._frontmatter.items():
+            if not f.is_relative_to(inbox_path):
+                continue
             try:
-                content = f.read_text()
-                fm, _ = parse_frontmatter(content)
                 if fm.get("status") == "pending":
                     created_dt = datetime.strptime(str(fm.get("created", "")), "%Y-%m-%d")
                     if created_dt < limit_date:
                         backlog.append({
                             "title": fm.get("title", f.stem),
-                            "days": (datetime.now() - created_dt).days,
+                            "days": (now - created_dt).days,
                             "score": fm.get("score", 0),
                         })
             except Exception as e:
@@ -81,17 +193,12 @@ class Auditor:
 
     def audit_metadata(self) -> List[str]:
         issues = []
-        for f in self.all_files:
-            if INBOX_FOLDER not in str(f) and f.parent != self.vault_path:
-                continue
-            try:
-                fm, _ = parse_frontmatter(f.read_text())
-                if fm.get("status") == "done":
-                    if not fm.get("tags") or not fm.get("source"):
-                        issues.append(f.stem)
-            except Exception as e:
-                _warn("auditor/metadata", f"解析失败: {f}", e)
+        for f, fm in self._frontmatter.items():
+            if not self._in_metadata_scope(f):
                 continue
+            if fm.get("status") == "done":
+                if not fm.get("tags") or not fm.get("source"):
+                    issues.append(f.stem)
         return issues
 
 
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+
+@dataclass(frozen=True, slots=True)
+class ScanEntry:
+    """单篇笔记的扫描结果；stamp 不变即可直接复用 frontmatter 与链接。"""
+
+    path: str
+    mtime_ns: int
+    size: int
+    want_fm: bool
+    fm: dict
+    links: list[str]
+
+    @property
+    def stamp(self) -> tuple[int, int, bool]:
+        return self.mtime_ns, self.size, self.want_fm
+
+
+def _str_keys(value):
+    """YAML 允许日期/数字作键，json.dumps 不接受；递归转成 str 键再落盘。"""
+    if isinstance(value, dict):
+        return {str(k): _str_keys(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_str_keys(v) for v in value]
+    return value
+
+
+class AuditScanCache:
+    """Auditor 的增量扫描缓存：按 (vault, path) 记录 mtime/size 与扫描结果。"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path)
+        self._init_schema()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _init_schema(self) -> None:
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scan_entries (
+                vault TEXT NOT NULL,
+                path TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                want_fm INTEGER NOT NULL,
+                fm TEXT NOT NULL,
+                links TEXT NOT NULL,
+                PRIMARY KEY (vault, path)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def load(self, vault: Path) -> dict[str, ScanEntry]:
+        rows = self._conn.execute(
+            "SELECT path, mtime_ns, size, want_fm, fm, links FROM scan_entries WHERE vault = ?",
+            (str(vault),),
+        )
+        return {
+            path: ScanEntry(path, mtime_ns, size, bool(want_fm), json.loads(fm), json.loads(links))
+            for path, mtime_ns, size, want_fm, fm, links in rows
+        }
+
+    def sync(self, vault: Path, fresh: Iterable[ScanEntry], stale_paths: Iterable[str]) -> None:
+        """写入新扫描的条目并删除已不存在的笔记，单个事务提交。"""
+        key = str(vault)
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM scan_entries WHERE vault = ? AND path = ?",
+                ((key, path) for path in stale_paths),
+            )
+            self._conn.executemany(
+                """
+                INSERT OR REPLACE INTO scan_entries (vault, path, mtime_ns, size, want_fm, fm, links)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    (
+                        key,
+                        e.path,
+                        e.mtime_ns,
+                        e.size,
+                        int(e.want_fm),
+                        # YAML 里的日期等非 JSON 类型按 str() 落盘，与审计时的 str(...) 用法一致
+                        json.dumps(_str_keys(e.fm), ensure_ascii=False, default=str),
+                        json.dumps(e.links, ensure_ascii=False),
+                    )
+                    for e in fresh
+                ),
+            )
@@ -42,15 +42,15 @@ def inbox_folder() -> str:
 
 
 def log_dir() -> Path:
-    """日志目录。"""
-    d = _PROJECT_ROOT / "data" / "logs"
+    """日志目录。环境变量 AGOS_LOG_DIR 可覆盖。"""
+    d = Path(os.getenv("AGOS_LOG_DIR", "") or _PROJECT_ROOT / "data" / "logs")
     d.mkdir(parents=True, exist_ok=True)
     return d
 
 
 def state_dir() -> Path:
-    """运行时状态目录（如去重缓存、游标等）。"""
-    d = _PROJECT_ROOT / "data" / "state"
+    """运行时状态目录（如去重缓存、游标等）。环境变量 AGOS_STATE_DIR 可覆盖。"""
+    d = Path(os.getenv("AGOS_STATE_DIR", "") or _PROJECT_ROOT / "data" / "state")
     d.mkdir(parents=True, exist_ok=True)
     return d
 
@@ -97,6 +97,11 @@ def openrouter_api_key() -> str:
     return value if isinstance(value, str) else ""
 
 
+def openai_api_key() -> str:
+    """OpenAI API Key（Axiom Synthesizer --batch 模式使用 OpenAI Batch API）。"""
+    return os.getenv("OPENAI_API_KEY", "")
+
+
 # ── Telegram ──────────────────────────────────────────────────────
 
 def telegram_bot_token() -> str:
@@ -162,6 +167,11 @@ def model_synthesizer() -> str:
     return os.getenv("MODEL_SYNTHESIZER", "google/gemini-pro-1.5")
 
 
+def model_synthesizer_batch() -> str:
+    """Axiom Synthesizer Batch 模式使用的 OpenAI 模型。"""
+    return os.getenv("MODEL_SYNTHESIZER_BATCH", "gpt-4o-mini")
+
+
 # ── 阈值 ──────────────────────────────────────────────────────────
 
 def min_score_threshold() -> float:
@@ -241,6 +251,16 @@ def commit_digest_state_db_file() -> Path:
     return state_dir() / "commit_digest.sqlite3"
 
 
+def auditor_scan_cache_db_file() -> Path:
+    """Knowledge Auditor 增量扫描缓存（按 mtime 复用笔记解析结果）。"""
+    return Path(os.getenv("AUDITOR_SCAN_CACHE_DB_FILE", "") or state_dir() / "auditor_scan.sqlite3")
+
+
+def feishu_token_cache_file() -> Path:
+    """飞书 tenant_access_token 跨进程缓存文件。"""
+    return Path(os.getenv("FEISHU_TOKEN_CACHE_FILE", "") or state_dir() / "feishu_tenant_token.json")
+
+
 def commit_digest_include_categories() -> bool:
     return os.getenv("COMMIT_DIGEST_INCLUDE_CATEGORIES", "true").strip().lower() not in {"0", "false", "off"}
 
@@ -270,6 +290,10 @@ def commit_digest_max_report_commits() -> int:
     return max(1, int(os.getenv("COMMIT_DIGEST_MAX_REPORT_COMMITS", "200")))
 
 
+def commit_digest_incremental() -> bool:
+    return os.getenv("COMMIT_DIGEST_INCREMENTAL", "false").strip().lower() in {"1", "true", "on"}
+
+
 def feishu_bot_webhook() -> str:
     return os.getenv("FEISHU_BOT_WEBHOOK", "").strip()
 
@@ -287,5 +311,10 @@ def synth_max_batch() -> int:
     return int(os.getenv("SYNTH_MAX_BATCH", "40"))
 
 
+def synth_pending_batch_file() -> Path:
+    """Axiom Synthesizer 已提交、待回收的 Batch 记录。"""
+    return state_dir() / "synth_pending_batch.json"
+
+
 def backlog_threshold_days() -> int:
     return int(os.getenv("BACKLOG_THRESHOLD_DAYS", "10"))
@@ -0,0 +1,32 @@
+"""
+agos.fastjson
+───────────────────────
+JSON 编解码的统一入口：安装了 orjson 时走 C 实现，否则回退标准库 json。
+
+输出约定与 json.dumps(obj, ensure_ascii=False) 一致（UTF-8 原样保留）；
+解析失败统一抛 json.JSONDecodeError（orjson.JSONDecodeError 是其子类）。
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # 可选加速依赖：pip install orjson
+    orjson = None
+
+
+def dumps(obj, *, indent: bool = False) -> str:
+    """序列化为 str。indent=True 时两空格缩进。"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None)
+
+
+def loads(data: str | bytes):
+    """从 str / bytes 反序列化。"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -5,8 +5,15 @@ YAML Frontmatter 解析/构建的唯一实现。
 消灭 bridge.py 和 stats.py 中的重复 _parse_frontmatter。
 """
 
+from typing import TextIO
+
 import yaml
 
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # PyYAML 未编译 libyaml 时回退纯 Python 实现
+    from yaml import SafeLoader as _SafeLoader
+
 
 def parse_frontmatter(content: str) -> tuple[dict, str]:
     """
@@ -27,13 +34,48 @@ def parse_frontmatter(content: str) -> tuple[dict, str]:
     body = content[end + 4:].lstrip("\n")
 
     try:
-        fm = yaml.safe_load(yaml_str) or {}
+        fm = yaml.load(yaml_str, Loader=_SafeLoader) or {}
     except yaml.YAMLError:
         fm = {}
 
     return fm, body
 
 
+def read_frontmatter_block(fh: TextIO) -> str:
+    """
+    从文本流开头逐行读取 frontmatter 原文（含分隔符），读到结束分隔符即停，不解析 YAML。
+
+    无 frontmatter 时只消费并返回第一行。
+    """
+    first = fh.readline()
+    if not first.startswith("---"):
+        return first
+
+    lines = [first]
+    while True:
+        line = fh.readline()
+        if not line:
+            break
+        lines.append(line)
+        if line.startswith("---"):
+            break
+    return "".join(lines)
+
+
+def read_frontmatter(fh: TextIO) -> tuple[dict, str]:
+    """
+    从文本流开头逐行读取 frontmatter，读到结束分隔符即停，不读取正文。
+
+    Returns:
+        (frontmatter_dict, consumed_text)
+        consumed_text 为已读取的原文；调用方需要正文时继续 fh.read() 即可。
+        解析规则与 parse_frontmatter 一致。
+    """
+    consumed = read_frontmatter_block(fh)
+    fm, _ = parse_frontmatter(consumed)
+    return fm, consumed
+
+
 def build_content(frontmatter: dict, body: str) -> str:
     """把 frontmatter dict + body 重新组合成完整笔记字符串。"""
     if not frontmatter:
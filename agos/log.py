@@ -0,0 +1,29 @@
+"""
+agos.log
+───────────────────────
+日志输出的共享 Handler。
+
+cron/scheduler 会重定向 stdout/stderr，测试也会在运行期替换它们；
+CurrentStreamHandler 每次写出时才解析 sys.<name>，而不是绑定构造时的流对象。
+"""
+
+import logging
+import sys
+
+
+class CurrentStreamHandler(logging.StreamHandler):
+    """始终写到当前的 sys.stdout / sys.stderr。"""
+
+    def __init__(self, stream_name: str = "stderr"):
+        if stream_name not in ("stdout", "stderr"):
+            raise ValueError(f"unsupported stream: {stream_name}")
+        self.stream_name = stream_name
+        super().__init__(getattr(sys, stream_name))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.stream = getattr(sys, self.stream_name)
+        super().emit(record)
+
+    def flush(self) -> None:
+        self.stream = getattr(sys, self.stream_name)
+        super().flush()
@@ -8,6 +8,7 @@ from __future__ import annotations
 import json
 import sqlite3
 import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
@@ -28,7 +29,12 @@ from agos.config import (
 from skills.feishu_bot_sender import FeishuBotSendError, send_feishu_webhook
 
 _START_TS = int(time.time())
-_AUDIT_LOG_FILE = log_dir() / "notify_audit.log"
+# Telegram sendMessage 单条文本上限
+TELEGRAM_MAX_TEXT_LEN = 4096
+
+
+def _audit_log_file() -> Path:
+    return log_dir() / "notify_audit.log"
 
 
 def _now_ts() -> int:
@@ -61,7 +67,7 @@ def _connect_db() -> sqlite3.Connection:
 
 def _audit(payload: dict[str, Any]) -> None:
     line = json.dumps(payload, ensure_ascii=False)
-    with _AUDIT_LOG_FILE.open("a", encoding="utf-8") as fp:
+    with _audit_log_file().open("a", encoding="utf-8") as fp:
         fp.write(line + "\n")
 
 
@@ -81,20 +87,55 @@ def _send_telegram(text: str) -> bool:
     if not cid:
         print("  ⚠️  [Telegram] 未配置 Chat ID，跳过推送")
         return False
+    return _post_telegram(token, cid, text, "HTML")
+
+
+@lru_cache(maxsize=1)
+def _telegram_session() -> requests.Session:
+    """进程内复用同一 HTTPS 连接池，避免每条消息重新 TLS 握手。"""
+    return requests.Session()
+
+
+def _split_telegram_text(text: str, limit: int = TELEGRAM_MAX_TEXT_LEN) -> list[str]:
+    """按行合并为不超过 limit 字符的若干段；单行超长时硬切。"""
+    chunks: list[str] = []
+    buf: list[str] = []
+    size = 0
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if buf:
+                chunks.append("\n".join(buf))
+                buf, size = [], 0
+            chunks.append(line[:limit])
+            line = line[limit:]
+        extra = len(line) + (1 if buf else 0)
+        if buf and size + extra > limit:
+            chunks.append("\n".join(buf))
+            buf, size, extra = [], 0, len(line)
+        buf.append(line)
+        size += extra
+    if buf:
+        chunks.append("\n".join(buf))
+    return chunks
+
+
+def _post_telegram(token: str, cid: str, text: str, parse_mode: str) -> bool:
     url = f"https://api.telegram.org/bot{token}/sendMessage"
-    try:
-        resp = requests.post(
-            url,
-            json={"chat_id": cid, "text": text, "parse_mode": "HTML"},
-            timeout=15,
-        )
-    except Exception as exc:
-        print(f"  ❌ [Telegram] 异常: {exc}")
-        return False
-    if resp.status_code == 200 and resp.json().get("ok"):
-        return True
-    print(f"  ❌ [Telegram] HTTP {resp.status_code}: {resp.text}")
-    return False
+    session = _telegram_session()
+    for chunk in _split_telegram_text(text):
+        try:
+            resp = session.post(
+                url,
+                json={"chat_id": cid, "text": chunk, "parse_mode": parse_mode},
+                timeout=15,
+            )
+        except Exception as exc:
+            print(f"  ❌ [Telegram] 异常: {exc}")
+            return False
+        if not (resp.status_code == 200 and resp.json().get("ok")):
+            print(f"  ❌ [Telegram] HTTP {resp.status_code}: {resp.text}")
+            return False
+    return True
 
 
 def _send_feishu(text: str) -> bool:
@@ -140,25 +181,7 @@ def send_message(
         print("  ⚠️  [Telegram] 未配置 Chat ID，跳过推送")
         return False
 
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    try:
-        resp = requests.post(
-            url,
-            json={
-                "chat_id": cid,
-                "text": text,
-                "parse_mode": parse_mode,
-            },
-            timeout=15,
-        )
-    except Exception as exc:
-        print(f"  ❌ [Telegram] 异常: {exc}")
-        return False
-
-    if resp.status_code == 200 and resp.json().get("ok"):
-        return True
-    print(f"  ❌ [Telegram] HTTP {resp.status_code}: {resp.text}")
-    return False
+    return _post_telegram(token, cid, text, parse_mode)
 
 
 def send_system_alert(
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 from pathlib import Path
 
 _LOGGER_NAME = "tool_gateway.audit"
@@ -14,7 +15,7 @@ def _build_logger() -> logging.Logger:
     if logger.handlers:
         return logger
 
-    log_dir = Path("logs")
+    log_dir = Path(os.getenv("TOOL_GATEWAY_LOG_DIR", "") or "logs")
     log_dir.mkdir(parents=True, exist_ok=True)
     handler = logging.FileHandler(log_dir / "tool_gateway.log", encoding="utf-8")
     formatter = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
@@ -4,12 +4,16 @@ from __future__ import annotations
 
 import hashlib
 import asyncio
-from dataclasses import dataclass
+import importlib.util
+from dataclasses import dataclass, field
 from datetime import UTC, datetime, timedelta
 from typing import Mapping
+from urllib.parse import urlsplit
 
 import httpx
 
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 
 class ToolGatewayError(Exception):
     def __init__(self, message: str, status_code: int = 500) -> None:
@@ -18,6 +22,17 @@ class ToolGatewayError(Exception):
         self.status_code = status_code
 
 
+@dataclass(frozen=True, slots=True)
+class GitHubPage:
+    status_code: int
+    payload: dict[str, object] | list[dict[str, object]] | None
+    headers: Mapping[str, str]
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
+
 @dataclass(slots=True)
 class GitHubService:
     token: str
@@ -25,6 +40,30 @@ class GitHubService:
     timeout_seconds: float = 15.0
     max_retries: int = 2
     retry_delay_seconds: float = 0.2
+    max_connections: int = 20
+    # 调用方注入的共享连接池（如与飞书发送共用）；由调用方负责关闭
+    http_client: httpx.AsyncClient | None = field(default=None, repr=False)
+    _client: httpx.AsyncClient | None = field(default=None, init=False, repr=False)
+
+    async def __aenter__(self) -> GitHubService:
+        if self.http_client is not None:
+            self._client = self.http_client
+            return self
+        # 在 async with 作用域内复用同一连接池，省去每个请求的 TCP/TLS 握手
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout_seconds,
+            limits=httpx.Limits(
+                max_keepalive_connections=self.max_connections,
+                max_connections=self.max_connections,
+            ),
+            http2=_HTTP2_AVAILABLE,
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        client, self._client = self._client, None
+        if client is not None and client is not self.http_client:
+            await client.aclose()
 
     async def _request(
         self,
@@ -34,29 +73,69 @@ class GitHubService:
         params: dict[str, str] | None = None,
         json_body: Mapping[str, object] | None = None,
     ) -> dict[str, object] | list[dict[str, object]]:
+        response = await self._send(method=method, path=path, params=params, json_body=json_body)
+        if response.status_code >= 400:
+            message = self._build_error_message(response)
+            raise ToolGatewayError(message=message, status_code=response.status_code)
+        return self._decode_payload(response)
+
+    async def _request_page(
+        self,
+        *,
+        path: str,
+        params: dict[str, str] | None = None,
+        etag: str | None = None,
+    ) -> GitHubPage:
+        """条件 GET：带上次的 ETag，未变化时 GitHub 返回 304 且不计入限流配额。"""
+        extra_headers = {"If-None-Match": etag} if etag else None
+        response = await self._send(method="GET", path=path, params=params, extra_headers=extra_headers)
+        if response.status_code == 304:
+            return GitHubPage(status_code=304, payload=None, headers=response.headers)
+        if response.status_code >= 400:
+            message = self._build_error_message(response)
+            raise ToolGatewayError(message=message, status_code=response.status_code)
+        return GitHubPage(
+            status_code=response.status_code,
+            payload=self._decode_payload(response),
+            headers=response.headers,
+        )
+
+    async def _send(
+        self,
+        *,
+        method: str,
+        path: str,
+        params: dict[str, str] | None = None,
+        json_body: Mapping[str, object] | None = None,
+        extra_headers: Mapping[str, str] | None = None,
+    ) -> httpx.Response:
         headers = {
             "Authorization": f"Bearer {self.token}",
             "Accept": "application/vnd.github+json",
             "X-GitHub-Api-Version": "2022-11-28",
         }
-        url = f"{self.base_url}{path}"
-        response: httpx.Response | None = None
-        for attempt in range(self.max_retries + 1):
+        if extra_headers:
+            headers.update(extra_headers)
+        if path.startswith(("https://", "http://")):
+            # 分页 Link 给出的是完整 URL；只跟随同一 API 域名，避免把 token 发往别处
+            target, base = urlsplit(path), urlsplit(self.base_url)
+            if (target.scheme, target.netloc) != (base.scheme, base.netloc):
+                raise ToolGatewayError(f"refusing to follow non-GitHub URL: {path}", status_code=502)
+            url = path
+        else:
+            url = f"{self.base_url}{path}"
+        if self._client is not None:
+            response = await self._send_with_retries(self._client, method, url, headers, params, json_body)
+        else:
             async with httpx.AsyncClient(timeout=self.timeout_seconds) as client:
-                response = await client.request(method, url, headers=headers, params=params, json=json_body)
-
-            retryable = method == "GET" and response.status_code in {429, 500, 502, 503, 504}
-            if not retryable or attempt >= self.max_retries:
-                break
-            await asyncio.sleep(self.retry_delay_seconds * (attempt + 1))
+                response = await self._send_with_retries(client, method, url, headers, params, json_body)
 
         if response is None:
             raise ToolGatewayError("GitHub request failed before response", status_code=502)
+        return response
 
-        if response.status_code >= 400:
-            message = self._build_error_message(response)
-            raise ToolGatewayError(message=message, status_code=response.status_code)
-
+    @staticmethod
+    def _decode_payload(response: httpx.Response) -> dict[str, object] | list[dict[str, object]]:
         payload = response.json()
         if isinstance(payload, dict):
             return payload
@@ -68,6 +147,27 @@ class GitHubService:
             return normalized
         raise ToolGatewayError("GitHub returned unsupported payload", status_code=502)
 
+    async def _send_with_retries(
+        self,
+        client: httpx.AsyncClient,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        params: dict[str, str] | None,
+        json_body: Mapping[str, object] | None,
+    ) -> httpx.Response | None:
+        response: httpx.Response | None = None
+        for attempt in range(self.max_retries + 1):
+            # 显式带上超时：注入的共享 client 可能按其他服务配置了默认超时
+            response = await client.request(
+                method, url, headers=headers, params=params, json=json_body, timeout=self.timeout_seconds
+            )
+            retryable = method == "GET" and response.status_code in {429, 500, 502, 503, 504}
+            if not retryable or attempt >= self.max_retries:
+                break
+            await asyncio.sleep(self.retry_delay_seconds * (attempt + 1))
+        return response
+
     @staticmethod
     def _build_error_message(response: httpx.Response) -> str:
         try:
@@ -8,10 +8,12 @@ dashboard.py ── Antigravity OS 终端仪表盘 (方案 A)
 """
 
 import sys
+import heapq
 import time
 import argparse
 from pathlib import Path
 from datetime import datetime
+from operator import itemgetter
 
 _ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(_ROOT))
@@ -217,7 +219,7 @@ def build_audit_panel(r: StatsReport) -> Panel:
 
     if r.error_types:
         tbl.add_row("─" * 12, "─" * 8)
-        top_errors = sorted(r.error_types.items(), key=lambda x: x[1], reverse=True)[:3]
+        top_errors = heapq.nlargest(3, r.error_types.items(), key=itemgetter(1))
         for err_type, count in top_errors:
             short_err = err_type[:20]
             tbl.add_row(f"  • {short_err}", f"[red]{count}[/red]", style="dim")
@@ -234,7 +236,7 @@ def build_error_panel(r: StatsReport) -> Panel:
     if not r.error_types:
         tbl.add_row("[dim]暂无错误类型[/dim]", "0")
     else:
-        top_errors = sorted(r.error_types.items(), key=lambda x: (-x[1], x[0]))[:5]
+        top_errors = heapq.nsmallest(5, r.error_types.items(), key=lambda x: (-x[1], x[0]))
         for err_type, count in top_errors:
             tbl.add_row(f"[code]{err_type}[/code]", str(count))
 
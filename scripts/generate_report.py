@@ -3,11 +3,13 @@ generate_report.py ── Antigravity OS 静态 HTML 报告生成器 (方案 B)
 """
 
 import sys
+import heapq
 import json
 import argparse
 import subprocess
 from pathlib import Path
 from datetime import datetime, timedelta
+from operator import itemgetter
 
 _ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(_ROOT))
@@ -89,7 +91,7 @@ def render_html(r: StatsReport) -> str:
 
     error_type_rows = ""
     if r.error_types:
-        top_errors = sorted(r.error_types.items(), key=lambda x: x[1], reverse=True)[:5]
+        top_errors = heapq.nlargest(5, r.error_types.items(), key=itemgetter(1))
         for err_type, count in top_errors:
             error_type_rows += (
                 f"<tr>"
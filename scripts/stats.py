@@ -5,12 +5,15 @@ A/B 两种仪表盘都从这里读数据，保持逻辑统一。
 
 import re
 import json
+import pickle
 import sys
+import time
 from pathlib import Path
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
 from dataclasses import dataclass, field
 from typing import Optional
+from urllib.parse import urlparse
 
 from agos.config import (
     project_root,
@@ -20,6 +23,7 @@ from agos.config import (
     inbox_path,
     bouncer_log_file,
     inbox_processor_log_file,
+    state_dir,
 )
 from agos.frontmatter import parse_frontmatter
 
@@ -30,6 +34,9 @@ if str(ROOT) not in sys.path:
 
 INBOX_FOLDER = inbox_folder()
 
+# collect() 快照的有效期：同一小时内的早报 / 周报等入口共用一次扫描结果
+SNAPSHOT_MAX_AGE_SEC = 3600
+
 
 # ── 数据结构 ──────────────────────────────────────────────────────
 
@@ -45,6 +52,7 @@ class NoteRecord:
     error_type:   str
     tags:         list[str]
     is_clip:      bool       # True = WebClip, False = Bouncer
+    host:         str = ""   # source 的域名（截断 20 字符），扫描时算好供报告直接使用
 
 @dataclass
 class CronRun:
@@ -190,17 +198,19 @@ def collect() -> StatsReport:
                     if not any(t in tags for t in ["BouncerDump", "WebClip", "PDFIngested"]):
                         continue
 
+                    source = str(fm.get("source", ""))
                     notes.append(NoteRecord(
                         filename=f.name,
                         status=str(fm.get("status", "unknown")),
                         score=float(fm.get("score", 0)),
-                        source=str(fm.get("source", "")),
+                        source=source,
                         title=str(fm.get("title", f.stem)),
                         created=str(fm.get("created", "")),
                         processed_at=str(fm.get("processed_at", "")),
                         error_type=str(fm.get("error_type", "")),
                         tags=tags,
                         is_clip="WebClip" in tags,
+                        host=urlparse(source).netloc[:20] if source else "",
                     ))
                 except Exception as e:
                     _warn("stats/scan_note", f"解析失败: {f}", e)
@@ -302,6 +312,56 @@ def collect() -> StatsReport:
     return report
 
 
+# ── 快照缓存 ──────────────────────────────────────────────────────
+
+def _snapshot_path() -> Path:
+    return state_dir() / "stats_snapshot.pkl"
+
+
+def _snapshot_key() -> tuple[str, int]:
+    """
+    快照归属：Vault 路径 + Inbox 目录 mtime。
+    换 Vault 不会读到别的库的报告；Bouncer 等写入方新增 / 移走笔记会改变目录 mtime，无需各自调用 invalidate_snapshot()。
+    """
+    try:
+        inbox_mtime = inbox_path().stat().st_mtime_ns
+    except OSError:
+        inbox_mtime = 0
+    return str(vault_path()), inbox_mtime
+
+
+def collect_cached(*, max_age_sec: float = SNAPSHOT_MAX_AGE_SEC, force_refresh: bool = False) -> StatsReport:
+    """优先返回未过期且归属一致的 collect() 快照；过期、损坏、归属不符或 force_refresh 时重新扫描并覆盖快照。"""
+    path = _snapshot_path()
+    key = _snapshot_key()
+    if not force_refresh:
+        try:
+            if time.time() - path.stat().st_mtime < max_age_sec:
+                with path.open("rb") as fh:
+                    snapshot = pickle.load(fh)
+                if isinstance(snapshot, dict) and snapshot.get("key") == key:
+                    return snapshot["report"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            _warn("stats/snapshot", f"快照读取失败，重新扫描: {path}", e)
+
+    report = collect()
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        with tmp_path.open("wb") as fh:
+            pickle.dump({"key": key, "report": report}, fh, protocol=5)
+        tmp_path.replace(path)
+    except OSError as e:
+        _warn("stats/snapshot", f"快照写入失败: {path}", e)
+    return report
+
+
+def invalidate_snapshot() -> None:
+    """笔记状态被改写后调用，下一次 collect_cached() 会重新扫描。"""
+    _snapshot_path().unlink(missing_ok=True)
+
+
 # ── CLI ──────────────────────────────────────────────────────────
 if __name__ == "__main__":
     report = collect()
@@ -1,3 +1,3 @@
-from .sender import FeishuBotSendError, build_feishu_signature, send_feishu_webhook
+from .sender import FeishuBotSendError, build_feishu_signature, send_feishu_webhook, send_feishu_webhook_async
 
-__all__ = ["FeishuBotSendError", "build_feishu_signature", "send_feishu_webhook"]
+__all__ = ["FeishuBotSendError", "build_feishu_signature", "send_feishu_webhook", "send_feishu_webhook_async"]
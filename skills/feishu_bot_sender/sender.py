@@ -10,7 +10,10 @@ import httpx
 
 
 class FeishuBotSendError(RuntimeError):
-    pass
+    def __init__(self, message: str, *, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        # 服务端通过 Retry-After 要求的最短等待秒数（无则为 None）
+        self.retry_after = retry_after
 
 
 def build_feishu_signature(secret: str, timestamp: str) -> str:
@@ -27,6 +30,43 @@ def _redact_webhook(webhook: str) -> str:
     return f"{prefix}/hook/{masked}"
 
 
+def _parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        seconds = float(value.strip())
+    except ValueError:
+        return None
+    return seconds if seconds >= 0 else None
+
+
+def _signed_payload(payload: dict[str, Any], secret: str) -> dict[str, Any]:
+    request_payload: dict[str, Any] = dict(payload)
+    if secret:
+        timestamp = str(int(time.time()))
+        request_payload["timestamp"] = timestamp
+        request_payload["sign"] = build_feishu_signature(secret, timestamp)
+    return request_payload
+
+
+def _check_response(resp: httpx.Response, webhook: str) -> dict[str, Any]:
+    if resp.status_code != 200:
+        raise FeishuBotSendError(
+            f"飞书 webhook HTTP {resp.status_code}: {_redact_webhook(webhook)}",
+            retry_after=_parse_retry_after(resp.headers.get("Retry-After")),
+        )
+
+    data = resp.json()
+    if not isinstance(data, dict):
+        raise FeishuBotSendError("飞书 webhook 返回格式异常")
+
+    code = data.get("code")
+    if code != 0:
+        msg = str(data.get("msg", "unknown error"))
+        raise FeishuBotSendError(f"飞书 webhook code={code} msg={msg}")
+    return data
+
+
 def send_feishu_webhook(
     *,
     webhook: str,
@@ -38,28 +78,11 @@ def send_feishu_webhook(
     if not webhook:
         raise FeishuBotSendError("FEISHU_BOT_WEBHOOK 未配置")
 
-    request_payload: dict[str, Any] = dict(payload)
-    if secret:
-        timestamp = str(int(time.time()))
-        request_payload["timestamp"] = timestamp
-        request_payload["sign"] = build_feishu_signature(secret, timestamp)
-
+    request_payload = _signed_payload(payload, secret)
     close_client = client is None
     active_client = client or httpx.Client(timeout=timeout_sec)
     try:
-        resp = active_client.post(webhook, json=request_payload)
-        if resp.status_code != 200:
-            raise FeishuBotSendError(f"飞书 webhook HTTP {resp.status_code}: {_redact_webhook(webhook)}")
-
-        data = resp.json()
-        if not isinstance(data, dict):
-            raise FeishuBotSendError("飞书 webhook 返回格式异常")
-
-        code = data.get("code")
-        if code != 0:
-            msg = str(data.get("msg", "unknown error"))
-            raise FeishuBotSendError(f"飞书 webhook code={code} msg={msg}")
-        return data
+        return _check_response(active_client.post(webhook, json=request_payload), webhook)
     except httpx.TimeoutException as exc:
         raise FeishuBotSendError(f"飞书 webhook 超时: {_redact_webhook(webhook)}") from exc
     except httpx.HTTPError as exc:
@@ -67,3 +90,28 @@ def send_feishu_webhook(
     finally:
         if close_client:
             active_client.close()
+
+
+async def send_feishu_webhook_async(
+    *,
+    webhook: str,
+    payload: dict[str, Any],
+    secret: str = "",
+    timeout_sec: float = 10.0,
+    client: httpx.AsyncClient | None = None,
+) -> dict[str, Any]:
+    if not webhook:
+        raise FeishuBotSendError("FEISHU_BOT_WEBHOOK 未配置")
+
+    request_payload = _signed_payload(payload, secret)
+    close_client = client is None
+    active_client = client or httpx.AsyncClient(timeout=timeout_sec)
+    try:
+        return _check_response(await active_client.post(webhook, json=request_payload), webhook)
+    except httpx.TimeoutException as exc:
+        raise FeishuBotSendError(f"飞书 webhook 超时: {_redact_webhook(webhook)}") from exc
+    except httpx.HTTPError as exc:
+        raise FeishuBotSendError(f"飞书 webhook 请求失败: {_redact_webhook(webhook)}") from exc
+    finally:
+        if close_client:
+            await active_client.aclose()
@@ -14,11 +14,12 @@ import time
 import uuid
 from datetime import datetime, timezone
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
 import httpx
 from dotenv import load_dotenv
-from agos.config import agent_log_file
+from agos.config import agent_log_file, feishu_token_cache_file
 
 DEFAULT_BASE_URL = "https://open.feishu.cn"
 DEFAULT_DOC_TOKEN = "H6ZfwwCcGiTMC2k5YgBcTBO3nKe"
@@ -87,6 +88,8 @@ class BridgeConfig:
     base_url: str = DEFAULT_BASE_URL
     retry_count: int = 3
     retry_delay_seconds: float = 1.0
+    # 非空时 tenant_access_token 落盘复用，cron 各进程不必每次重新换取
+    token_cache_file: Path | None = None
 
     @classmethod
     def from_env(cls) -> "BridgeConfig":
@@ -100,6 +103,7 @@ class BridgeConfig:
             app_secret=app_secret,
             document_id=os.getenv("FEISHU_DOC_TOKEN", DEFAULT_DOC_TOKEN),
             base_url=os.getenv("FEISHU_BASE_URL", DEFAULT_BASE_URL),
+            token_cache_file=feishu_token_cache_file(),
         )
 
 
@@ -111,6 +115,7 @@ class FeishuDocBridge:
         self._tenant_access_token = ""
         self._token_expire_at = 0.0
         self._section_cache: dict[tuple[str, str], str] = {}
+        self._load_cached_token()
 
     def close(self) -> None:
         self._client.close()
@@ -125,6 +130,54 @@ class FeishuDocBridge:
     def _needs_token_refresh(self) -> bool:
         return (not self._tenant_access_token) or (time.time() >= self._token_expire_at)
 
+    def _load_cached_token(self) -> None:
+        path = self.config.token_cache_file
+        if path is None:
+            return
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            _LOGGER.warning(
+                json.dumps({"event": "token_cache_read_failed", "path": str(path), "error": str(exc)}, ensure_ascii=False)
+            )
+            return
+        if data.get("app_id") != self.config.app_id or data.get("base_url") != self.config.base_url:
+            return
+        expire_at = float(data.get("expires_at", 0))
+        if data.get("access_token") and time.time() < expire_at:
+            self._tenant_access_token = data["access_token"]
+            self._token_expire_at = expire_at
+
+    def _drop_token(self) -> None:
+        self._tenant_access_token = ""
+        self._token_expire_at = 0.0
+
+    def _store_token(self, token: str, expire: int) -> None:
+        self._tenant_access_token = token
+        self._token_expire_at = time.time() + max(expire - 60, 60)
+        path = self.config.token_cache_file
+        if path is None:
+            return
+        payload = {
+            "app_id": self.config.app_id,
+            "base_url": self.config.base_url,
+            "access_token": token,
+            "expires_at": self._token_expire_at,
+        }
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as fp:
+                json.dump(payload, fp)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            _LOGGER.warning(
+                json.dumps({"event": "token_cache_write_failed", "path": str(path), "error": str(exc)}, ensure_ascii=False)
+            )
+
     def _refresh_tenant_token(self) -> None:
         url = f"{self.config.base_url}/open-apis/auth/v3/tenant_access_token/internal"
         resp = self._client.post(
@@ -143,8 +196,7 @@ class FeishuDocBridge:
         if not token:
             raise FeishuBridgeError(f"tenant_access_token 缺失: {data}")
 
-        self._tenant_access_token = token
-        self._token_expire_at = time.time() + max(expire - 60, 60)
+        self._store_token(token, expire)
 
     async def _refresh_tenant_token_async(self) -> None:
         url = f"{self.config.base_url}/open-apis/auth/v3/tenant_access_token/internal"
@@ -164,8 +216,7 @@ class FeishuDocBridge:
         if not token:
             raise FeishuBridgeError(f"tenant_access_token 缺失: {data}")
 
-        self._tenant_access_token = token
-        self._token_expire_at = time.time() + max(expire - 60, 60)
+        self._store_token(token, expire)
 
     def _auth_headers(self) -> dict[str, str]:
         if self._needs_token_refresh():
@@ -266,8 +317,14 @@ class FeishuDocBridge:
                 continue
 
             data = self._decode_json(resp)
+            # 99991663：token 已失效（如重置 app secret 后磁盘缓存仍未过期），与 401 同样丢弃并重新换取
+            if data.get("code") == 99991663 and not refreshed and attempt < self.config.retry_count:
+                self._drop_token()
+                self._refresh_tenant_token()
+                refreshed = True
+                continue
             # Feishu 业务错误码；同样触发率限重试。
-            if data.get("code") in {99991663, 99991400} and attempt < self.config.retry_count:
+            if data.get("code") == 99991400 and attempt < self.config.retry_count:
                 time.sleep(self.config.retry_delay_seconds)
                 continue
 
@@ -385,7 +442,12 @@ class FeishuDocBridge:
                 continue
 
             data = self._decode_json(resp)
-            if data.get("code") in {99991663, 99991400} and attempt < self.config.retry_count:
+            if data.get("code") == 99991663 and not refreshed and attempt < self.config.retry_count:
+                self._drop_token()
+                await self._refresh_tenant_token_async()
+                refreshed = True
+                continue
+            if data.get("code") == 99991400 and attempt < self.config.retry_count:
                 time.sleep(self.config.retry_delay_seconds)
                 continue
 
@@ -1,9 +1,22 @@
 """测试共享 fixtures。"""
 
 import os
+import shutil
+import tempfile
 import pytest
 from pathlib import Path
 
+# 模块导入期就绑定路径的日志 handler（feishu_bridge、tool_gateway 审计）需要在被测模块导入前重定向；
+# 每个用例再由 env_override 指向各自的 tmp_path，测试运行不写工作区的 data/ 与 logs/
+_SESSION_DIR = Path(tempfile.mkdtemp(prefix="agos-tests-"))
+os.environ["AGOS_LOG_DIR"] = str(_SESSION_DIR / "logs")
+os.environ["AGOS_STATE_DIR"] = str(_SESSION_DIR / "state")
+os.environ["TOOL_GATEWAY_LOG_DIR"] = str(_SESSION_DIR / "gateway_logs")
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_SESSION_DIR, ignore_errors=True)
+
 
 @pytest.fixture
 def tmp_vault(tmp_path):
@@ -41,5 +54,8 @@ created: "2026-02-21"
 
 @pytest.fixture(autouse=True)
 def env_override(tmp_vault, monkeypatch):
-    """测试时自动将 OBSIDIAN_VAULT 指向临时目录。"""
+    """测试时自动将 OBSIDIAN_VAULT、日志/状态目录及 Auditor 扫描缓存指向临时目录。"""
     monkeypatch.setenv("OBSIDIAN_VAULT", str(tmp_vault))
+    monkeypatch.setenv("AGOS_LOG_DIR", str(tmp_vault / "_logs"))
+    monkeypatch.setenv("AGOS_STATE_DIR", str(tmp_vault / "_state"))
+    monkeypatch.setenv("AUDITOR_SCAN_CACHE_DB_FILE", str(tmp_vault / "auditor_scan.sqlite3"))
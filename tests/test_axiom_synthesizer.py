@@ -3,6 +3,8 @@
 import json
 from pathlib import Path
 
+import pytest
+
 import agents.axiom_synthesizer.synthesizer as synth
 
 
@@ -11,6 +13,7 @@ class _FakeResp:
         self.status_code = status_code
         self._payload = payload
         self.text = text
+        self.content = json.dumps(payload).encode("utf-8")
 
     def json(self):
         return self._payload
@@ -20,13 +23,13 @@ class _FakeClient:
     def __init__(self, resp):
         self._resp = resp
 
-    def __enter__(self):
+    async def __aenter__(self):
         return self
 
-    def __exit__(self, exc_type, exc, tb):
+    async def __aexit__(self, exc_type, exc, tb):
         return False
 
-    def post(self, *args, **kwargs):
+    async def post(self, *args, **kwargs):
         return self._resp
 
 
@@ -39,8 +42,9 @@ def test_synthesize_result_missing_api_key(monkeypatch):
 
 def test_synthesize_result_http_error(monkeypatch):
     monkeypatch.setattr(synth, "openrouter_api_key", lambda: "sk-test")
+    monkeypatch.setattr(synth, "LLM_RETRY_BASE_DELAY", 0.0)
     fake_resp = _FakeResp(503, {}, text="upstream unavailable")
-    monkeypatch.setattr(synth.httpx, "Client", lambda timeout=60.0: _FakeClient(fake_resp))
+    monkeypatch.setattr(synth.httpx, "AsyncClient", lambda **kwargs: _FakeClient(fake_resp))
 
     raw = [{"axiom": "x", "title": "t", "path": "/tmp/a.md"}]
     result = synth.synthesize_with_llm_result(raw, set())
@@ -68,7 +72,7 @@ def test_synthesize_result_success_with_dict_payload(monkeypatch):
         200,
         {"choices": [{"message": {"content": content}}]},
     )
-    monkeypatch.setattr(synth.httpx, "Client", lambda timeout=60.0: _FakeClient(fake_resp))
+    monkeypatch.setattr(synth.httpx, "AsyncClient", lambda **kwargs: _FakeClient(fake_resp))
 
     raw = [{"axiom": "x", "title": "t", "path": "/tmp/a.md"}]
     result = synth.synthesize_with_llm_result(raw, set())
@@ -91,3 +95,293 @@ def test_create_axiom_notes_skips_when_legacy_root_note_exists(tmp_path: Path, m
 
     assert created == []
     assert not (tmp_path / "00_inbox" / "Axioms" / "Axiom - Existing.md").exists()
+
+
+def _write_clip(path: Path, axiom: str, score: float = 9.0, tags: str = "BouncerDump", extra: str = ""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        f"---\ntags:\n  - {tags}\nscore: {score}\ntitle: {path.stem}\n{extra}---\n\n"
+        f"> [!abstract] 核心公理\n> {axiom}\n",
+        encoding="utf-8",
+    )
+
+
+def test_collect_raw_axioms_scans_nested_dirs_and_dedups(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(synth, "get_vault", lambda: tmp_path)
+    monkeypatch.setattr(synth, "INBOX_FOLDER", "00_inbox")
+    monkeypatch.setattr(synth, "MIN_AXIOM_SCORE", 8.0)
+
+    inbox = tmp_path / "00_inbox"
+    _write_clip(inbox / "a.md", "Feedback loops compound")
+    _write_clip(inbox / "sub" / "b.md", "Feedback loops compound")
+    _write_clip(inbox / "sub" / "deep" / "c.md", "Constraints create focus")
+    _write_clip(inbox / "low.md", "Low score axiom", score=5.0)
+    _write_clip(inbox / "other.md", "Wrong tag axiom", tags="Misc")
+    _write_clip(inbox / "done.md", "Already synthesized", extra="synthesized: true\n")
+
+    raw = synth.collect_raw_axioms()
+
+    assert [r["axiom"] for r in raw] == ["Feedback loops compound", "Constraints create focus"]
+    assert raw[0]["path"] == str(inbox / "a.md")
+
+
+def test_near_dup_index_ignores_case_whitespace_and_punctuation():
+    index = synth._NearDupIndex()
+    assert index.add("Feedback loops compound over time.") is True
+    assert index.add("feedback  loops compound over time!") is False
+    assert index.add("Constraints create focus") is True
+
+
+def test_synthesize_result_drops_near_duplicates_of_existing_titles(monkeypatch):
+    monkeypatch.setattr(synth, "openrouter_api_key", lambda: "sk-test")
+    content = json.dumps(
+        [
+            {"name": "Feedback Loop (闭环)", "meaning": "m1", "sources": [], "is_new": True},
+            {"name": "Compounding (复利)", "meaning": "m2", "sources": [], "is_new": True},
+        ],
+        ensure_ascii=False,
+    )
+    fake_resp = _FakeResp(200, {"choices": [{"message": {"content": content}}]})
+    monkeypatch.setattr(synth.httpx, "AsyncClient", lambda **kwargs: _FakeClient(fake_resp))
+
+    raw = [{"axiom": "x", "title": "t", "path": "/tmp/a.md"}]
+    result = synth.synthesize_with_llm_result(raw, {"feedback loop (闭环)"})
+    assert [a["name"] for a in result["synthesized"]] == ["Compounding (复利)"]
+
+
+class _ShardClient(_FakeClient):
+    def __init__(self, responses):
+        self._responses = list(responses)
+        self.prompts = []
+
+    async def post(self, *args, **kwargs):
+        self.prompts.append(kwargs["json"]["messages"][0]["content"])
+        return self._responses.pop(0)
+
+
+def test_synthesize_result_shards_and_keeps_failed_shard_unprocessed(monkeypatch):
+    monkeypatch.setattr(synth, "openrouter_api_key", lambda: "sk-test")
+    monkeypatch.setattr(synth, "MAX_AXIOMS_BATCH", 2)
+    ok_content = json.dumps([{"name": "Leverage (杠杆)", "meaning": "m", "sources": [], "is_new": True}])
+    client = _ShardClient([
+        _FakeResp(200, {"choices": [{"message": {"content": ok_content}}]}),
+        _FakeResp(400, {}, text="bad request"),
+    ])
+    monkeypatch.setattr(synth.httpx, "AsyncClient", lambda **kwargs: client)
+
+    raw = [{"axiom": f"axiom {i}", "title": f"t{i}", "path": f"/tmp/{i}.md"} for i in range(3)]
+    result = synth.synthesize_with_llm_result(raw, set())
+
+    assert len(client.prompts) == 2
+    assert result["ok"] is True
+    assert [a["name"] for a in result["synthesized"]] == ["Leverage (杠杆)"]
+    assert result["processed_paths"] == ["/tmp/0.md", "/tmp/1.md"]
+
+
+def test_synthesize_result_retries_rate_limit_and_invalid_json(monkeypatch):
+    monkeypatch.setattr(synth, "openrouter_api_key", lambda: "sk-test")
+    monkeypatch.setattr(synth, "LLM_RETRY_BASE_DELAY", 0.0)
+    ok_content = json.dumps([{"name": "Leverage (杠杆)", "meaning": "m", "sources": [], "is_new": True}])
+    client = _ShardClient([
+        _FakeResp(429, {}, text="slow down"),
+        _FakeResp(200, {"choices": [{"message": {"content": "not json"}}]}),
+        _FakeResp(200, {"choices": [{"message": {"content": ok_content}}]}),
+    ])
+    monkeypatch.setattr(synth.httpx, "AsyncClient", lambda **kwargs: client)
+
+    result = synth.synthesize_with_llm_result([{"axiom": "x", "title": "t", "path": "/tmp/a.md"}], set())
+
+    assert len(client.prompts) == 3
+    assert result["ok"] is True
+    assert result["synthesized"][0]["name"] == "Leverage (杠杆)"
+
+
+class _FakeOpenAI:
+    def __init__(self, output_text: str, status: str = "completed"):
+        self.uploaded = b""
+        self._output_text = output_text
+        self._status = status
+        self.files = self
+        self.batches = self
+
+    # files.create / batches.create share the name `create`; dispatch on kwargs
+    def create(self, **kwargs):
+        if "purpose" in kwargs:
+            self.uploaded = kwargs["file"][1]
+            return type("F", (), {"id": "file-in"})()
+        return type("B", (), {"id": "batch-1"})()
+
+    def retrieve(self, batch_id):
+        output = "file-out" if self._status in {"completed", "expired"} else None
+        return type("B", (), {"id": batch_id, "status": self._status, "output_file_id": output})()
+
+    def content(self, file_id):
+        return type("C", (), {"text": self._output_text})()
+
+
+def test_batch_submit_then_collect_roundtrip(tmp_path: Path, monkeypatch):
+    pending_file = tmp_path / "synth_pending_batch.json"
+    monkeypatch.setattr(synth, "synth_pending_batch_file", lambda: pending_file)
+    monkeypatch.setattr(synth, "openai_api_key", lambda: "sk-test")
+    monkeypatch.setattr(synth, "MAX_AXIOMS_BATCH", 1)
+    ok_body = {"choices": [{"message": {"content": json.dumps({"items": [{"name": "Leverage (杠杆)"}]})}}]}
+    output = "\n".join([
+        json.dumps({"custom_id": "shard-0", "response": {"status_code": 200, "body": ok_body}}),
+        json.dumps({"custom_id": "shard-1", "response": {"status_code": 500, "body": {}}, "error": "boom"}),
+    ])
+    fake = _FakeOpenAI(output)
+    monkeypatch.setattr(synth, "_openai_client", lambda: fake)
+
+    raw = [{"axiom": f"axiom {i}", "title": f"t{i}", "path": f"/tmp/{i}.md"} for i in range(2)]
+    submitted = synth.submit_batch(raw, set())
+    assert submitted["ok"] is True
+    assert len(fake.uploaded.decode("utf-8").splitlines()) == 2
+    assert json.loads(pending_file.read_text(encoding="utf-8"))["batch_id"] == "batch-1"
+
+    result, total_raw = synth.collect_batch_result(set())
+    assert total_raw == 2
+    assert result["ok"] is True
+    assert [a["name"] for a in result["synthesized"]] == ["Leverage (杠杆)"]
+    assert result["processed_paths"] == ["/tmp/0.md"]
+    assert pending_file.exists()
+
+
+def test_collect_batch_skips_bad_lines_and_removes_pending_after_apply(tmp_path: Path, monkeypatch):
+    pending_file = tmp_path / "synth_pending_batch.json"
+    shards = {"shard-0": ["/tmp/0.md"], "shard-1": ["/tmp/1.md"]}
+    pending_file.write_text(json.dumps({"batch_id": "batch-1", "total_raw": 2, "shards": shards}), encoding="utf-8")
+    ok_body = {"choices": [{"message": {"content": json.dumps({"items": [{"name": "Leverage (杠杆)"}]})}}]}
+    output = "\n".join([
+        '{"custom_id": "shard-1", "respon',
+        json.dumps({"custom_id": "shard-0", "response": {"status_code": 200, "body": ok_body}}),
+    ])
+    monkeypatch.setattr(synth, "synth_pending_batch_file", lambda: pending_file)
+    monkeypatch.setattr(synth, "_openai_client", lambda: _FakeOpenAI(output))
+    monkeypatch.setattr(synth, "get_vault", lambda: tmp_path)
+    monkeypatch.setattr(synth, "scan_map", lambda path: (set(), 0))
+    applied = []
+
+    def _apply(llm_result, *args):
+        assert pending_file.exists()
+        applied.append(llm_result)
+
+    monkeypatch.setattr(synth, "_apply_llm_result", _apply)
+    synth.collect_batch()
+    assert applied[0]["processed_paths"] == ["/tmp/0.md"]
+    assert not pending_file.exists()
+
+
+def test_collect_batch_result_waits_while_in_progress(tmp_path: Path, monkeypatch):
+    pending_file = tmp_path / "synth_pending_batch.json"
+    pending_file.write_text(json.dumps({"batch_id": "batch-1", "total_raw": 1, "shards": {}}), encoding="utf-8")
+    monkeypatch.setattr(synth, "synth_pending_batch_file", lambda: pending_file)
+    monkeypatch.setattr(synth, "_openai_client", lambda: _FakeOpenAI("", status="in_progress"))
+
+    assert synth.collect_batch_result(set()) == (None, 0)
+    assert pending_file.exists()
+
+
+def test_main_resolves_vault_once_and_appends_map(tmp_path: Path, monkeypatch):
+    calls = []
+
+    def _get_vault():
+        calls.append(1)
+        return tmp_path
+
+    monkeypatch.setattr(synth, "get_vault", _get_vault)
+    monkeypatch.setattr(synth, "INBOX_FOLDER", "00_inbox")
+    monkeypatch.setattr(synth, "MIN_AXIOM_SCORE", 8.0)
+    monkeypatch.setattr(synth, "update_frontmatter", lambda path, updates: True)
+    monkeypatch.setattr(synth, "send_message", lambda text: None)
+    monkeypatch.setattr(
+        synth,
+        "synthesize_with_llm_result",
+        lambda raw, existing: {
+            "ok": True,
+            "synthesized": [{"name": "Leverage (杠杆)", "meaning": "m", "sources": ["a"]}],
+            "processed_paths": [r["path"] for r in raw],
+            "error_type": "",
+            "error_message": "",
+            "error_context": {},
+        },
+    )
+    (tmp_path / synth.MAP_FILE).write_text("1. **Old**: [[Axiom - Old]]\n", encoding="utf-8")
+    _write_clip(tmp_path / "00_inbox" / "a.md", "Leverage multiplies effort")
+
+    synth.main()
+
+    assert len(calls) == 1
+    map_text = (tmp_path / synth.MAP_FILE).read_text(encoding="utf-8")
+    assert "2. **Leverage (杠杆)**: [[Axiom - Leverage (杠杆)]]" in map_text
+    assert (tmp_path / "00_inbox" / "Axioms" / "Axiom - Leverage (杠杆).md").exists()
+
+
+def test_scan_map_counts_bullets_and_titles_in_one_pass(tmp_path: Path):
+    content = (
+        "# Map\n"
+        "1. **Old**: [[Axiom - Old]]\n"
+        "    *   *Meaning*: see also [[Axiom - Related]]\n"
+        "2. **Second**: [[Axiom - Second]]\n"
+        "not a bullet 3. **x**\n"
+    )
+    map_path = tmp_path / synth.MAP_FILE
+    map_path.write_text(content, encoding="utf-8")
+    titles, bullets = synth.scan_map(map_path)
+    assert titles == {"Old", "Related", "Second"}
+    assert bullets == 2
+    assert synth.scan_map(tmp_path / "missing.md") == (set(), 0)
+
+
+def test_title_index_matches_bidirectional_substring_semantics():
+    index = synth._TitleIndex({"Feedback Loop (闭环)", "Compounding"})
+    assert index.overlaps("feedback loop (闭环)") is True
+    assert index.overlaps("Feedback") is True  # 候选是已有标题的子串
+    assert index.overlaps("Compounding Interest (复利)") is True  # 已有标题是候选的子串
+    assert index.overlaps("Leverage (杠杆)") is False
+    assert synth._TitleIndex(set()).overlaps("anything") is False
+
+
+def test_create_axiom_notes_writes_each_new_name_once(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(synth, "INBOX_FOLDER", "00_inbox")
+    synthesized = [
+        {"name": "Leverage", "meaning": "m1", "sources": ["a"]},
+        {"name": "Leverage", "meaning": "duplicate", "sources": []},
+        {"name": "Focus", "meaning": "m2", "sources": []},
+        {"name": "", "meaning": "nameless"},
+    ]
+
+    created = synth.create_axiom_notes(synthesized, dry_run=False, vault=tmp_path)
+
+    axioms_dir = tmp_path / "00_inbox" / "Axioms"
+    assert created == [str(axioms_dir / "Axiom - Leverage.md"), str(axioms_dir / "Axiom - Focus.md")]
+    assert "> m1" in (axioms_dir / "Axiom - Leverage.md").read_text(encoding="utf-8")
+
+
+def test_dedup_key_normalizes_case_and_whitespace():
+    assert synth._dedup_key("  Feedback\tLoops   Compound ") == synth._dedup_key("feedback loops compound")
+    assert len(synth._dedup_key("x" * 200)) == 80
+
+
+def test_parse_llm_content_handles_fenced_and_bare_json():
+    item = {"name": "Leverage"}
+    assert synth._parse_llm_content(json.dumps([item])) == [item]
+    assert synth._parse_llm_content("```json\n" + json.dumps({"items": [item]}) + "\n```") == [item]
+    # 模型在 JSON 前后夹带说明文字时，从正文中截取
+    assert synth._parse_llm_content("Sure! here you go:\n" + json.dumps([item])) == [item]
+    assert synth._parse_llm_content("{}") == []
+
+
+def test_parse_llm_content_raises_on_invalid_json():
+    with pytest.raises(json.JSONDecodeError):
+        synth._parse_llm_content("no json here")
+
+
+def test_buffered_log_flushes_warnings_and_on_entry_return(tmp_path: Path, monkeypatch, capsys):
+    synth._LOGGER.info("buffered info")
+    synth._warn("synthesizer/test", "flushed now")
+    assert "flushed now" in capsys.readouterr().out
+
+    monkeypatch.setattr(synth, "get_vault", lambda: tmp_path)
+    monkeypatch.setattr(synth, "collect_raw_axioms", lambda vault: [])
+    synth.main(dry_run=True)
+    assert "未收集到有效公理碎片" in capsys.readouterr().out
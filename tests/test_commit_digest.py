@@ -3,16 +3,43 @@ from __future__ import annotations
 from datetime import UTC, datetime
 from pathlib import Path
 import asyncio
+import json
+
+import pytest
 
 from agents.daily_briefing import commit_digest
 from agents.daily_briefing.commit_digest_renderer import CommitItem
+from apps.tool_gateway.github_service import GitHubPage, ToolGatewayError
+
+
+def _returning(value):
+    async def _fake(**kwargs):
+        return value
+
+    return _fake
+
+
+def _raising(exc: Exception):
+    async def _fake(**kwargs):
+        raise exc
+
+    return _fake
 
 
-def test_run_commit_digest_requires_webhook(monkeypatch) -> None:
+class _PagedService:
+    """测试桩只实现 _request 时，分页请求统一走它并返回 200。"""
+
+    async def _request_page(self, *, path: str, params: dict[str, str] | None = None, etag: str | None = None):
+        return GitHubPage(status_code=200, payload=await self._request(method="GET", path=path, params=params), headers={})
+
+
+def test_run_commit_digest_requires_webhook(monkeypatch, capsys) -> None:
     monkeypatch.setenv("COMMIT_DIGEST_ENABLED", "true")
     monkeypatch.delenv("FEISHU_BOT_WEBHOOK", raising=False)
     monkeypatch.setenv("GITHUB_TOKEN", "x")
     assert commit_digest.run_commit_digest() == 1
+    line = capsys.readouterr().err.strip().splitlines()[-1]
+    assert json.loads(line.split(" ERROR ", 1)[1]) == {"event": "config_missing", "key": "FEISHU_BOT_WEBHOOK"}
 
 
 def test_run_commit_digest_skip_when_already_success(tmp_path: Path, monkeypatch) -> None:
@@ -25,8 +52,8 @@ def test_run_commit_digest_skip_when_already_success(tmp_path: Path, monkeypatch
 
     db_path = tmp_path / "digest.sqlite3"
     monkeypatch.setattr(commit_digest, "commit_digest_state_db_file", lambda: db_path)
-    monkeypatch.setattr(commit_digest, "_collect_commits", lambda **kwargs: [])
-    monkeypatch.setattr(commit_digest, "_send_with_retry", lambda **kwargs: None)
+    monkeypatch.setattr(commit_digest, "_collect_commits", _returning([]))
+    monkeypatch.setattr(commit_digest, "_send_with_retry_async", _returning(None))
 
     assert commit_digest.run_commit_digest() == 0
     assert commit_digest.run_commit_digest() == 0
@@ -43,28 +70,30 @@ def test_run_commit_digest_dry_run_does_not_send(tmp_path: Path, monkeypatch) ->
     monkeypatch.setattr(
         commit_digest,
         "_collect_commits",
-        lambda **kwargs: [
-            CommitItem(
-                repo="owner/repo",
-                sha="abc1234",
-                author="hugh",
-                message="feat: x",
-                committed_at=datetime(2026, 2, 24, 10, 0, tzinfo=UTC),
-                url="https://github.com/owner/repo/commit/abc1234",
-            )
-        ],
+        _returning(
+            [
+                CommitItem(
+                    repo="owner/repo",
+                    sha="abc1234",
+                    author="hugh",
+                    message="feat: x",
+                    committed_at=datetime(2026, 2, 24, 10, 0, tzinfo=UTC),
+                    url="https://github.com/owner/repo/commit/abc1234",
+                )
+            ]
+        ),
     )
     monkeypatch.setattr(
         commit_digest,
-        "_send_with_retry",
-        lambda **kwargs: (_ for _ in ()).throw(AssertionError("should not send in dry-run")),
+        "_send_with_retry_async",
+        _raising(AssertionError("should not send in dry-run")),
     )
 
     assert commit_digest.run_commit_digest(dry_run=True) == 0
 
 
 def test_collect_commits_async_respects_max_total() -> None:
-    class _FakeService:
+    class _FakeService(_PagedService):
         def __init__(self) -> None:
             self.calls = 0
 
@@ -103,10 +132,551 @@ def test_collect_commits_async_respects_max_total() -> None:
     assert len(result) == 1
 
 
-def test_record_metrics_updates_file(tmp_path: Path, monkeypatch) -> None:
-    monkeypatch.setattr(commit_digest, "_metrics_file_path", lambda: tmp_path / "metrics.json")
-    commit_digest._record_metrics(date_label="2026-02-24", success=True, sample_size=20, sample_correct=18)
-    commit_digest._record_metrics(date_label="2026-02-24", success=False)
-    raw = (tmp_path / "metrics.json").read_text(encoding="utf-8")
-    assert '"total_runs": 2' in raw
-    assert '"success_runs": 1' in raw
+def test_collect_commits_async_filters_authors_case_insensitively() -> None:
+    def _commit(sha: str, author: str) -> dict[str, object]:
+        return {
+            "sha": sha * 40,
+            "html_url": f"https://x/{sha}",
+            "commit": {"message": "feat: x", "author": {"name": author, "date": "2026-02-24T10:00:00Z"}},
+        }
+
+    class _FakeService(_PagedService):
+        async def _request(self, *, method: str, path: str, params: dict[str, str] | None = None):
+            return [_commit("a", "Hugh"), _commit("b", "bot"), _commit("c", "Hugh"), _commit("d", "HUGH")]
+
+    result = asyncio.run(
+        commit_digest._collect_commits_async(
+            service=_FakeService(),
+            repos=["owner/repo"],
+            authors=[" hugh "],
+            since=datetime(2026, 2, 24, 0, 0, tzinfo=UTC),
+            until=datetime(2026, 2, 24, 23, 59, tzinfo=UTC),
+            include_changed_files=False,
+            max_detail_commits=10,
+            max_total_commits=10,
+        )
+    )
+    assert sorted(item.sha[0] for item in result) == ["a", "c", "d"]
+
+
+def test_record_metrics_upserts_daily_row(tmp_path: Path) -> None:
+    store = commit_digest.CommitDigestStateStore(tmp_path / "digest.sqlite3")
+    try:
+        commit_digest._record_metrics(store, date_label="2026-02-24", success=True, sample_size=20, sample_correct=18)
+        commit_digest._record_metrics(store, date_label="2026-02-24", success=False)
+        assert store.metrics("2026-02-24") == {
+            "date": "2026-02-24",
+            "total_runs": 2,
+            "success_runs": 1,
+            "sample_size": 20,
+            "sample_correct": 18,
+            "accuracy": 0.9,
+        }
+        assert store.metrics("2026-02-25") is None
+    finally:
+        store.close()
+
+
+def test_collect_commits_async_gathers_repos_and_budgets_details_by_time() -> None:
+    def _commit(sha: str, minute: int) -> dict[str, object]:
+        return {
+            "sha": sha * 40,
+            "html_url": f"https://x/{sha}",
+            "commit": {"message": f"feat: {sha}", "author": {"name": "n", "date": f"2026-02-24T10:{minute:02d}:00Z"}},
+        }
+
+    pages = {
+        "/repos/o/slow/commits": [_commit("c", 3), _commit("a", 1)],
+        "/repos/o/fast/commits": [_commit("b", 2)],
+    }
+
+    class _FakeService(_PagedService):
+        def __init__(self) -> None:
+            self.detail_paths: list[str] = []
+
+        async def _request(self, *, method: str, path: str, params: dict[str, str] | None = None):
+            if path in pages:
+                if path.endswith("slow/commits"):
+                    await asyncio.sleep(0.01)
+                return pages[path]
+            self.detail_paths.append(path)
+            return {"files": [{"filename": "src/x.py"}]}
+
+    service = _FakeService()
+    result = asyncio.run(
+        commit_digest._collect_commits_async(
+            service=service,
+            repos=["o/slow", "o/fast"],
+            authors=[],
+            since=datetime(2026, 2, 24, 0, 0, tzinfo=UTC),
+            until=datetime(2026, 2, 24, 23, 59, tzinfo=UTC),
+            include_changed_files=True,
+            max_detail_commits=1,
+            max_total_commits=2,
+        )
+    )
+    assert [item.sha[0] for item in result] == ["b", "c"]
+    assert result[0].files == ()
+    assert result[1].files == ("src/x.py",)
+    assert service.detail_paths == ["/repos/o/slow/commits/" + "c" * 40]
+
+
+def test_collect_commits_async_cancels_other_repos_on_first_failure() -> None:
+    cancelled: list[str] = []
+
+    class _FakeService(_PagedService):
+        async def _request(self, *, method: str, path: str, params: dict[str, str] | None = None):
+            if "/o/bad/" in path:
+                raise ToolGatewayError("boom", status_code=502)
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(path)
+                raise
+            return []
+
+    with pytest.raises(ToolGatewayError):
+        asyncio.run(
+            commit_digest._collect_commits_async(
+                service=_FakeService(),
+                repos=["o/slow", "o/bad"],
+                authors=[],
+                since=datetime(2026, 2, 24, 0, 0, tzinfo=UTC),
+                until=datetime(2026, 2, 24, 23, 59, tzinfo=UTC),
+                include_changed_files=False,
+                max_detail_commits=0,
+                max_total_commits=10,
+            )
+        )
+    assert cancelled == ["/repos/o/slow/commits"]
+
+
+def test_collect_commits_async_maps_detail_errors_to_empty_files() -> None:
+    class _FakeService(_PagedService):
+        async def _request(self, *, method: str, path: str, params: dict[str, str] | None = None):
+            if path.endswith("/commits"):
+                return [
+                    {
+                        "sha": sha * 40,
+                        "html_url": f"https://x/{sha}",
+                        "commit": {"message": "fix: x", "author": {"name": "n", "date": f"2026-02-24T10:0{i}:00Z"}},
+                    }
+                    for i, sha in enumerate("ab")
+                ]
+            if path.endswith("a" * 40):
+                raise commit_digest.ToolGatewayError("boom", status_code=502)
+            return {"files": [{"filename": "tests/test_b.py"}]}
+
+    result = asyncio.run(
+        commit_digest._collect_commits_async(
+            service=_FakeService(),
+            repos=["owner/repo"],
+            authors=[],
+            since=datetime(2026, 2, 24, 0, 0, tzinfo=UTC),
+            until=datetime(2026, 2, 24, 23, 59, tzinfo=UTC),
+            include_changed_files=True,
+            max_detail_commits=10,
+            max_total_commits=10,
+        )
+    )
+    assert [item.files for item in result] == [(), ("tests/test_b.py",)]
+
+
+def test_retry_sleep_is_two_phase_and_honors_retry_after(monkeypatch) -> None:
+    bounds: list[tuple[float, float]] = []
+
+    def _upper(a: float, b: float) -> float:
+        bounds.append((a, b))
+        return b
+
+    monkeypatch.setattr(commit_digest._RETRY_RANDOM, "uniform", _upper)
+    assert commit_digest._retry_sleep_seconds(0, 2, 2, RuntimeError("x")) == 6
+    assert commit_digest._retry_sleep_seconds(1, 6, 2, RuntimeError("x")) == commit_digest.FAST_RETRY_MAX_SLEEP_SEC
+    assert commit_digest._retry_sleep_seconds(3, 10, 2, RuntimeError("x")) == 75
+    assert bounds == [(2, 6), (2, 18), (45, 75)]
+    limited = commit_digest.FeishuBotSendError("429", retry_after=30)
+    assert commit_digest._retry_sleep_seconds(0, 2, 2, limited) == 30
+    huge = commit_digest.FeishuBotSendError("429", retry_after=86400)
+    assert commit_digest._retry_sleep_seconds(0, 2, 2, huge) == commit_digest.SLOW_RETRY_SLEEP_SEC * 1.25
+    assert len(bounds) == 3
+
+
+def test_send_with_retry_async_bounds_attempts(monkeypatch) -> None:
+    attempts: list[int] = []
+
+    async def _fake_send(**kwargs):
+        attempts.append(1)
+        raise commit_digest.FeishuBotSendError("down")
+
+    async def _fake_sleep(sec: float) -> None:
+        return None
+
+    monkeypatch.setattr(commit_digest, "send_feishu_webhook_async", _fake_send)
+    monkeypatch.setattr(commit_digest.asyncio, "sleep", _fake_sleep)
+    try:
+        asyncio.run(
+            commit_digest._send_with_retry_async(
+                webhook="w", secret="", payload={}, max_retries=50, backoff_sec=0, trace_id="t"
+            )
+        )
+    except RuntimeError:
+        pass
+    assert len(attempts) == commit_digest.MAX_SEND_RETRIES + 1
+
+
+def test_send_with_retry_async_sleeps_without_blocking(monkeypatch) -> None:
+    attempts: list[int] = []
+    sleeps: list[float] = []
+
+    async def _fake_send(**kwargs):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise commit_digest.FeishuBotSendError("429", retry_after=0.5)
+        return {"code": 0}
+
+    async def _fake_sleep(sec: float) -> None:
+        sleeps.append(sec)
+
+    monkeypatch.setattr(commit_digest, "send_feishu_webhook_async", _fake_send)
+    monkeypatch.setattr(commit_digest.asyncio, "sleep", _fake_sleep)
+    asyncio.run(
+        commit_digest._send_with_retry_async(
+            webhook="w", secret="", payload={}, max_retries=2, backoff_sec=0, trace_id="t"
+        )
+    )
+    assert len(attempts) == 2
+    assert sleeps == [0.5]
+
+
+def test_rate_limiter_spaces_sends_by_interval(monkeypatch) -> None:
+    clock = [100.0]
+    sleeps: list[float] = []
+
+    async def _fake_sleep(sec: float) -> None:
+        sleeps.append(round(sec, 6))
+
+    monkeypatch.setattr(commit_digest.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(commit_digest.asyncio, "sleep", _fake_sleep)
+    limiter = commit_digest._RateLimiter(5)
+
+    async def _run() -> None:
+        await asyncio.gather(limiter.wait(), limiter.wait(), limiter.wait())
+        clock[0] = 101.0
+        await limiter.wait()
+
+    asyncio.run(_run())
+    assert sleeps == [0.2, 0.4]
+
+
+def test_collect_commits_async_reuses_cached_page_on_304(tmp_path: Path) -> None:
+    payload = [
+        {
+            "sha": "a" * 40,
+            "html_url": "https://x/a",
+            "author": {"login": "big-object-not-cached"},
+            "commit": {"message": "feat: a", "author": {"name": "n", "date": "2026-02-24T10:00:00Z"}},
+        }
+    ]
+
+    class _ConditionalService:
+        def __init__(self) -> None:
+            self.etags: list[str | None] = []
+
+        async def _request_page(self, *, path: str, params: dict[str, str] | None = None, etag: str | None = None):
+            self.etags.append(etag)
+            if etag == '"v1"':
+                return GitHubPage(status_code=304, payload=None, headers={"ETag": '"v1"'})
+            return GitHubPage(status_code=200, payload=payload, headers={"ETag": '"v1"'})
+
+    service = _ConditionalService()
+    store = commit_digest.CommitDigestStateStore(tmp_path / "digest.sqlite3")
+
+    def _collect() -> list[CommitItem]:
+        return asyncio.run(
+            commit_digest._collect_commits_async(
+                service=service,
+                repos=["owner/repo"],
+                authors=[],
+                since=datetime(2026, 2, 24, 0, 0, tzinfo=UTC),
+                until=datetime(2026, 2, 24, 23, 59, tzinfo=UTC),
+                include_changed_files=False,
+                max_detail_commits=0,
+                max_total_commits=10,
+                state_store=store,
+            )
+        )
+
+    try:
+        first = _collect()
+        second = _collect()
+    finally:
+        store.close()
+    assert service.etags == [None, '"v1"']
+    assert first == second
+    assert second[0].sha == "a" * 40
+
+
+def _run_with_commits(tmp_path: Path, monkeypatch, commits: list[CommitItem]) -> tuple[list[object], list[tuple[object, dict]]]:
+    monkeypatch.setenv("COMMIT_DIGEST_ENABLED", "true")
+    monkeypatch.setenv("FEISHU_BOT_WEBHOOK", "https://open.feishu.cn/open-apis/bot/v2/hook/x")
+    monkeypatch.setenv("GITHUB_TOKEN", "x")
+    monkeypatch.setenv("COMMIT_DIGEST_REPOS", "owner/repo")
+    monkeypatch.setenv("FEISHU_BOT_MSG_TYPE", "text")
+
+    db_path = tmp_path / "digest.sqlite3"
+    monkeypatch.setattr(commit_digest, "commit_digest_state_db_file", lambda: db_path)
+    services: list[object] = []
+    sent: list[tuple[object, dict]] = []
+
+    async def _fake_collect(**kwargs):
+        services.append(kwargs["service"])
+        return commits
+
+    async def _fake_send(**kwargs):
+        sent.append((kwargs["client"], kwargs["payload"]))
+
+    monkeypatch.setattr(commit_digest, "_collect_commits", _fake_collect)
+    monkeypatch.setattr(commit_digest, "_send_with_retry_async", _fake_send)
+
+    assert commit_digest.run_commit_digest(force_send_override=True) == 0
+    return services, sent
+
+
+def _commit_at(idx: int, message: str) -> CommitItem:
+    return CommitItem(
+        repo="owner/repo",
+        sha=f"{idx:07d}abc",
+        author="hugh",
+        message=message,
+        committed_at=datetime(2026, 2, 24, 10, idx % 60, tzinfo=UTC),
+        url=f"https://github.com/owner/repo/commit/{idx:07d}abc",
+    )
+
+
+def test_run_commit_digest_single_chunk_skips_separate_summary(tmp_path: Path, monkeypatch) -> None:
+    _, sent = _run_with_commits(tmp_path, monkeypatch, [_commit_at(1, "feat: x")])
+    assert len(sent) == 1
+    text = sent[0][1]["content"]["text"]
+    assert "[1/1]" in text.splitlines()[0]
+    assert "总提交" in text
+
+
+def test_run_commit_digest_sends_summary_first_over_shared_client(tmp_path: Path, monkeypatch) -> None:
+    commits = [_commit_at(i, f"feat: {'long message ' * 6}{i}") for i in range(60)]
+    services, sent = _run_with_commits(tmp_path, monkeypatch, commits)
+    texts = [payload["content"]["text"] for _, payload in sent]
+    assert len(sent) > 2
+    assert all(client is services[0].http_client for client, _ in sent)
+    assert "结论：" in texts[0] and "[1/" not in texts[0]
+    assert texts[1].splitlines()[0].endswith(f"[1/{len(sent) - 1}]")
+
+
+def test_run_commit_digest_dead_letters_unsent_payloads(tmp_path: Path, monkeypatch) -> None:
+    commits = [_commit_at(i, f"feat: {'long message ' * 6}{i}") for i in range(60)]
+    sent: list[dict] = []
+
+    async def _fail_after_first(**kwargs):
+        if sent:
+            raise RuntimeError("send webhook failed after retries: down")
+        sent.append(kwargs["payload"])
+
+    monkeypatch.setenv("COMMIT_DIGEST_ENABLED", "true")
+    monkeypatch.setenv("FEISHU_BOT_WEBHOOK", "https://open.feishu.cn/open-apis/bot/v2/hook/x")
+    monkeypatch.setenv("GITHUB_TOKEN", "x")
+    monkeypatch.setenv("COMMIT_DIGEST_REPOS", "owner/repo")
+    monkeypatch.setenv("FEISHU_BOT_MSG_TYPE", "text")
+    monkeypatch.setattr(commit_digest, "commit_digest_state_db_file", lambda: tmp_path / "digest.sqlite3")
+    monkeypatch.setattr(commit_digest, "_collect_commits", _returning(commits))
+    monkeypatch.setattr(commit_digest, "_send_with_retry_async", _fail_after_first)
+
+    assert commit_digest.run_commit_digest(force_send_override=True) == 1
+    (dead_letter,) = (tmp_path / "dlq").glob("*.json")
+    record = json.loads(dead_letter.read_text(encoding="utf-8"))
+    assert dead_letter.stem == record["trace_id"]
+    assert len(record["payloads"]) > 1
+    assert record["payloads"][0]["content"]["text"].splitlines()[0].endswith("]")
+    assert "hook" not in dead_letter.read_text(encoding="utf-8")
+
+
+def test_run_commit_digest_fails_cleanly_when_dead_letter_write_fails(tmp_path: Path, monkeypatch, capsys) -> None:
+    seen_retries: list[int] = []
+
+    async def _always_fail(**kwargs):
+        seen_retries.append(kwargs["max_retries"])
+        raise RuntimeError("send webhook failed after retries: down")
+
+    def _disk_full(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setenv("COMMIT_DIGEST_ENABLED", "true")
+    monkeypatch.setenv("FEISHU_BOT_WEBHOOK", "https://open.feishu.cn/open-apis/bot/v2/hook/x")
+    monkeypatch.setenv("GITHUB_TOKEN", "x")
+    monkeypatch.setenv("COMMIT_DIGEST_REPOS", "owner/repo")
+    monkeypatch.setenv("COMMIT_DIGEST_MAX_RETRIES", "50")
+    monkeypatch.setattr(commit_digest, "commit_digest_state_db_file", lambda: tmp_path / "digest.sqlite3")
+    monkeypatch.setattr(commit_digest, "_collect_commits", _returning([_commit_at(1, "feat: x")]))
+    monkeypatch.setattr(commit_digest, "_send_with_retry_async", _always_fail)
+    monkeypatch.setattr(commit_digest, "_write_dead_letter", _disk_full)
+
+    assert commit_digest.run_commit_digest(force_send_override=True) == 1
+    assert seen_retries == [commit_digest.MAX_SEND_RETRIES]
+    err = capsys.readouterr().err
+    assert '"event":"max_retries_clamped"' in err.replace(" ", "")
+    assert '"event":"dead_letter_failed"' in err.replace(" ", "")
+
+
+def test_run_commit_digest_sends_one_short_text_when_no_commits(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("COMMIT_DIGEST_ENABLED", "true")
+    monkeypatch.setenv("FEISHU_BOT_WEBHOOK", "https://open.feishu.cn/open-apis/bot/v2/hook/x")
+    monkeypatch.setenv("GITHUB_TOKEN", "x")
+    monkeypatch.setenv("COMMIT_DIGEST_REPOS", "owner/repo")
+
+    db_path = tmp_path / "digest.sqlite3"
+    monkeypatch.setattr(commit_digest, "commit_digest_state_db_file", lambda: db_path)
+    monkeypatch.setattr(commit_digest, "_collect_commits", _returning([]))
+    monkeypatch.setattr(
+        commit_digest,
+        "build_markdown_chunks",
+        lambda **kwargs: (_ for _ in ()).throw(AssertionError("should not render an empty window")),
+    )
+    sent: list[dict] = []
+
+    async def _fake_send(**kwargs):
+        sent.append(kwargs["payload"])
+
+    monkeypatch.setattr(commit_digest, "_send_with_retry_async", _fake_send)
+
+    assert commit_digest.run_commit_digest(force_send_override=True) == 0
+    assert len(sent) == 1
+    assert sent[0]["msg_type"] == "text"
+    assert "无新增提交" in sent[0]["content"]["text"]
+    store = commit_digest.CommitDigestStateStore(db_path)
+    try:
+        row = store._conn.execute("SELECT status, commit_count, chunk_count FROM digest_runs").fetchone()
+    finally:
+        store.close()
+    assert tuple(row) == ("success", 0, 1)
+
+
+def test_collect_commits_async_incremental_fetches_after_watermark(tmp_path: Path) -> None:
+    def _commit(sha: str, minute: int) -> dict[str, object]:
+        return {
+            "sha": sha * 40,
+            "html_url": f"https://x/{sha}",
+            "commit": {"message": f"feat: {sha}", "author": {"name": "n", "date": f"2026-02-24T10:{minute:02d}:00Z"}},
+        }
+
+    runs = [[_commit("b", 2), _commit("a", 1)], [_commit("c", 3)]]
+
+    class _FakeService(_PagedService):
+        def __init__(self) -> None:
+            self.since: list[str] = []
+
+        async def _request(self, *, method: str, path: str, params: dict[str, str] | None = None):
+            assert params is not None
+            self.since.append(params["since"])
+            return runs.pop(0)
+
+    service = _FakeService()
+    store = commit_digest.CommitDigestStateStore(tmp_path / "digest.sqlite3")
+
+    def _collect() -> list[CommitItem]:
+        return asyncio.run(
+            commit_digest._collect_commits_async(
+                service=service,
+                repos=["owner/repo"],
+                authors=[],
+                since=datetime(2026, 2, 24, 0, 0, tzinfo=UTC),
+                until=datetime(2026, 2, 24, 23, 59, tzinfo=UTC),
+                include_changed_files=False,
+                max_detail_commits=0,
+                max_total_commits=10,
+                state_store=store,
+                incremental=True,
+            )
+        )
+
+    try:
+        _collect()
+        second = _collect()
+    finally:
+        store.close()
+    assert service.since == ["2026-02-24T00:00:00+00:00", "2026-02-24T10:02:01+00:00"]
+    assert [item.sha[0] for item in second] == ["a", "b", "c"]
+
+
+def test_collect_commits_async_follows_link_next_instead_of_page_size() -> None:
+    def _commits(prefix: str, count: int) -> list[dict[str, object]]:
+        return [
+            {
+                "sha": f"{prefix}{i:039d}",
+                "html_url": f"https://x/{prefix}{i}",
+                "commit": {"message": "feat: x", "author": {"name": "n", "date": "2026-02-24T10:00:00Z"}},
+            }
+            for i in range(count)
+        ]
+
+    next_url = "https://api.github.com/repositories/1/commits?page=2"
+
+    class _LinkService:
+        def __init__(self) -> None:
+            self.paths: list[tuple[str, dict[str, str] | None]] = []
+
+        async def _request_page(self, *, path: str, params: dict[str, str] | None = None, etag: str | None = None):
+            self.paths.append((path, params))
+            if path == next_url:
+                # 最后一页恰好 100 条且没有 rel="next"：不应再多请求一次
+                return GitHubPage(status_code=200, payload=_commits("b", 100), headers={})
+            return GitHubPage(
+                status_code=200,
+                payload=_commits("a", 100),
+                headers={"Link": f'<{next_url}>; rel="next", <https://api.github.com/x?page=2>; rel="last"'},
+            )
+
+    service = _LinkService()
+    result = asyncio.run(
+        commit_digest._collect_commits_async(
+            service=service,
+            repos=["owner/repo"],
+            authors=[],
+            since=datetime(2026, 2, 24, 0, 0, tzinfo=UTC),
+            until=datetime(2026, 2, 24, 23, 59, tzinfo=UTC),
+            include_changed_files=False,
+            max_detail_commits=0,
+            max_total_commits=500,
+        )
+    )
+    assert len(result) == 200
+    assert [path for path, _ in service.paths] == ["/repos/owner/repo/commits", next_url]
+    assert service.paths[1][1] is None
+
+
+def test_digest_key_is_fixed_width_and_order_insensitive() -> None:
+    window = commit_digest.TimeWindow(
+        since=datetime(2026, 2, 24, 0, 0, tzinfo=UTC),
+        until=datetime(2026, 2, 24, 23, 59, tzinfo=UTC),
+        date_label="2026-02-24",
+        timezone="Asia/Shanghai",
+    )
+    key = commit_digest._digest_key(window, [f"o/r{i}" for i in range(50)], ["a", "b"])
+    assert len(key) == 32
+    assert key == commit_digest._digest_key(window, [f"o/r{i}" for i in reversed(range(50))], ["b", "a"])
+    assert key != commit_digest._digest_key(window, ["o/r0"], ["a", "b"])
+
+
+def test_run_commit_digest_alerts_on_second_consecutive_failure(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("COMMIT_DIGEST_ENABLED", "true")
+    monkeypatch.setenv("FEISHU_BOT_WEBHOOK", "https://open.feishu.cn/open-apis/bot/v2/hook/x")
+    monkeypatch.setenv("GITHUB_TOKEN", "x")
+    monkeypatch.setenv("COMMIT_DIGEST_REPOS", "owner/repo")
+
+    db_path = tmp_path / "digest.sqlite3"
+    monkeypatch.setattr(commit_digest, "commit_digest_state_db_file", lambda: db_path)
+    monkeypatch.setattr(commit_digest, "_collect_commits", _raising(RuntimeError("github down")))
+    alerts: list[str] = []
+    monkeypatch.setattr(commit_digest, "_send_failure_alert", lambda **kwargs: alerts.append(kwargs["error"]))
+
+    assert commit_digest.run_commit_digest() == 1
+    assert alerts == []
+    assert commit_digest.run_commit_digest() == 1
+    assert alerts == ["github down"]
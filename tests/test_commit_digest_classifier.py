@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from datetime import UTC, datetime
 
+import pytest
+
 from agents.daily_briefing import commit_digest
 from agents.daily_briefing.commit_digest_renderer import CommitItem
 
@@ -53,3 +55,82 @@ def test_analyze_commits_counts_and_risk() -> None:
     assert analytics.effective_commits == 2
     assert analytics.high_risk_changes == 1
     assert analytics.category_counts["feat"] == 1
+
+
+def test_token_matcher_finds_overlapping_keywords() -> None:
+    found = commit_digest._KEYWORD_MATCHER.find("hotfix for performance regression")
+    assert found == {"hotfix", "fix", "performance", "perf"}
+    assert commit_digest._KEYWORD_MATCHER.find("nothing here") == set()
+
+
+def test_classify_counts_each_keyword_once() -> None:
+    # hotfix 同时命中 hotfix/fix，均归入 fix；docs 路径只加 1 分
+    result = commit_digest._classify_commit(_item("hotfix fix fix", files=("docs/a.md",)))
+    assert result == "fix"
+
+
+def test_compile_risk_prefixes_drops_covered_rules() -> None:
+    assert commit_digest._compile_risk_prefixes(("apps/", "apps/tool_gateway/", "agos/notify.py", "apps/")) == (
+        "agos/notify.py",
+        "apps/",
+    )
+    assert commit_digest._is_high_risk_change(_item("x", files=("apps/x.py",)), ["apps/tool_gateway/", "apps/"])
+    assert not commit_digest._is_high_risk_change(_item("x", files=("Apps/x.py",)), ["apps/"])
+    assert not commit_digest._is_high_risk_change(_item("x", files=("apps/x.py",)), [])
+
+
+def test_parse_repo_is_memoized_and_validates() -> None:
+    assert commit_digest._parse_repo(" owner / repo ") == ("owner", "repo")
+    assert commit_digest._parse_repo(" owner / repo ") is commit_digest._parse_repo(" owner / repo ")
+    with pytest.raises(ValueError):
+        commit_digest._parse_repo("no-slash")
+
+
+@pytest.mark.parametrize(
+    ("message", "expected"),
+    [
+        ("feat(api)!: add x\nbody: y", "feat"),
+        ("Fix: crash\r\nmore", "fix"),
+        ("no colon here\nfeat: later line", ""),
+        ("", ""),
+    ],
+)
+def test_extract_commit_prefix_reads_first_line_only(message: str, expected: str) -> None:
+    assert commit_digest._extract_commit_prefix(message) == expected
+
+
+def test_classify_and_risk_matches_separate_passes() -> None:
+    cases = [
+        _item("feat: add x", files=("scheduler.py", "docs/a.md")),
+        _item("update pipeline", files=(".github/workflows/ci.yml", "apps/tool_gateway/main.py")),
+        _item("update", files=("docs/guide.md", "tests/test_a.py")),
+        _item("misc"),
+    ]
+    risk_paths = ["scheduler.py", "apps/tool_gateway/"]
+    prefixes = commit_digest._compile_risk_prefixes(tuple(risk_paths))
+    for item in cases:
+        assert commit_digest._classify_and_risk(item, prefixes) == (
+            commit_digest._classify_commit(item),
+            commit_digest._is_high_risk_change(item, risk_paths),
+        )
+
+
+def test_analyze_commits_orders_categories_by_category_order() -> None:
+    commits = [_item("chore: a"), _item("docs: b"), _item("feat: c"), _item("revert: d"), _item("feat: e")]
+    analytics = commit_digest._analyze_commits(commits=commits, exclude_types=set(), risk_paths=[])
+    assert list(analytics.category_counts) == ["revert", "feat", "docs", "chore"]
+    assert analytics.category_counts["feat"] == 2
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["2026-02-24T10:01:02Z", "2026-02-24T18:01:02+08:00", " 2026-02-24T10:01:02Z ", "2026-02-24T10:01:02.5Z"],
+)
+def test_parse_github_datetime_matches_fromisoformat(text: str) -> None:
+    expected = datetime.fromisoformat(text.strip().replace("Z", "+00:00")).astimezone(UTC)
+    assert commit_digest._parse_github_datetime(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", "   ", "not-a-date", "2026-13-24T10:01:02Z"])
+def test_parse_github_datetime_rejects_invalid(text: str) -> None:
+    assert commit_digest._parse_github_datetime(text) is None
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dataclasses import replace
 from datetime import UTC, datetime
 
 from agents.daily_briefing.commit_digest_renderer import (
@@ -105,3 +106,63 @@ def test_build_summary_text_with_analytics() -> None:
     )
     assert "总提交：7" in summary
     assert "Top 类别" in summary
+
+
+def test_commit_item_caches_lowered_message_and_files() -> None:
+    item = CommitItem(
+        repo="o/r",
+        sha="abc",
+        author="a",
+        message="Fix README",
+        committed_at=datetime(2026, 2, 24, tzinfo=UTC),
+        url="u",
+        files=("Docs/A.md",),
+    )
+    assert item.message_lower == "fix readme"
+    assert item.files_lower == ("docs/a.md",)
+    assert item.message_lower is item.message_lower
+    assert not hasattr(item, "__dict__")
+    assert item == replace(item)
+    assert replace(item, files=("X",)).files_lower == ("x",)
+
+
+def test_build_markdown_chunks_limit_stops_early() -> None:
+    commits = [_item("repo/a", f"sha{i:03d}", f"feat: message {i}", i % 50) for i in range(80)]
+    full = build_markdown_chunks(date_label="2026-02-24", timezone="Asia/Shanghai", commits=commits, max_chars=600)
+    preview = build_markdown_chunks(
+        date_label="2026-02-24", timezone="Asia/Shanghai", commits=commits, max_chars=600, limit=1
+    )
+    assert len(preview) == 1
+    assert preview[0].splitlines()[0].endswith("[1/?]")
+    assert preview[0].splitlines()[1:] == full[0].splitlines()[1:]
+    small = build_markdown_chunks(
+        date_label="2026-02-24", timezone="Asia/Shanghai", commits=commits[:1], max_chars=600, limit=1
+    )
+    assert small[0].splitlines()[0].endswith("[1/1]")
+
+
+def test_build_markdown_chunks_keeps_every_line_once_within_limit() -> None:
+    commits = [_item(f"repo/{i % 3}", f"sha{i:04d}", f"feat: message {i}", i % 50) for i in range(600)]
+    chunks = build_markdown_chunks(date_label="2026-02-24", timezone="Asia/Shanghai", commits=commits, max_chars=1500)
+    body = "".join(chunks)
+    assert all(len(chunk) <= 1500 + len("[99/99]") for chunk in chunks)
+    assert all(body.count(f"`sha{i:04d}`") == 1 for i in range(600))
+
+
+def test_build_markdown_chunks_orders_each_repo_by_time() -> None:
+    commits = [
+        _item("repo/b", "sha0003", "feat: late", 30),
+        _item("repo/a", "sha0002", "fix: mid", 20),
+        _item("repo/b", "sha0001", "feat: early", 10),
+    ]
+    chunks = build_markdown_chunks(date_label="2026-02-24", timezone="Asia/Shanghai", commits=commits, max_chars=1500)
+    body = "".join(chunks)
+    assert body.index("### repo/a") < body.index("### repo/b")
+    assert body.index("`sha0001`") < body.index("`sha0003`")
+
+
+def test_build_markdown_chunks_renders_first_line_and_hhmm() -> None:
+    commits = [_item("repo/a", "abcdef123", "feat: first\r\n\r\nbody text", 5)]
+    body = "".join(build_markdown_chunks(date_label="2026-02-24", timezone="UTC", commits=commits, max_chars=1500))
+    assert "- `abcdef1` feat: first · hugh · 10:05 · [链接](https://github.com/repo/a/commit/abcdef123)" in body
+    assert "body text" not in body
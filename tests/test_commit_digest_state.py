@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from agents.daily_briefing.commit_digest_state import CommitDigestStateStore, DigestRunState
+from agents.daily_briefing.commit_digest_state import CommitDigestStateStore, DigestRunState, hash_digest_key
 
 
 def test_state_store_success_lookup(tmp_path: Path) -> None:
@@ -29,3 +29,95 @@ def test_state_store_success_lookup(tmp_path: Path) -> None:
         assert store.is_success("k2") is False
     finally:
         store.close()
+
+
+def test_state_store_uses_wal_and_accumulates_metrics(tmp_path: Path) -> None:
+    store = CommitDigestStateStore(tmp_path / "state.sqlite3")
+    try:
+        assert store._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert store._conn.execute("PRAGMA cache_size").fetchone()[0] == -8000
+        assert store._conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+        store.begin()
+        store.record_metrics(date="2026-02-24", success=True)
+        store.record_metrics(date="2026-02-24", success=True, sample_size=4, sample_correct=3)
+        store.commit()
+        metrics = store.metrics("2026-02-24")
+        assert metrics is not None
+        assert (metrics["total_runs"], metrics["success_runs"], metrics["accuracy"]) == (2, 2, 0.75)
+    finally:
+        store.close()
+
+
+def test_state_store_success_lookup_uses_covering_index(tmp_path: Path) -> None:
+    store = CommitDigestStateStore(tmp_path / "state.sqlite3")
+    try:
+        plan = store._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM digest_runs WHERE digest_key = ? AND status = 'success' LIMIT 1",
+            ("k1",),
+        ).fetchall()
+        assert any("idx_digest_key_status" in str(row[-1]) for row in plan)
+        assert store._conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+    finally:
+        store.close()
+
+
+def test_state_store_load_run_context_returns_success_and_last_status(tmp_path: Path) -> None:
+    store = CommitDigestStateStore(tmp_path / "state.sqlite3")
+
+    def _state(key: str, status: str) -> DigestRunState:
+        return DigestRunState(
+            digest_key=key,
+            date="2026-02-24",
+            timezone="Asia/Shanghai",
+            repos="a/b",
+            authors="*",
+            status=status,
+            trace_id="t",
+            commit_count=0,
+            chunk_count=0,
+            error_message=None,
+        )
+
+    try:
+        assert store.load_run_context("k1") == (False, None)
+        store.begin()
+        store.record(_state("k1", "success"), force_send=False)
+        store.record(_state("k2", "failed"), force_send=False)
+        store.commit()
+        assert store.load_run_context("k1") == (True, "failed")
+        assert store.load_run_context("k2") == (False, "failed")
+    finally:
+        store.close()
+
+
+def test_state_store_migrates_legacy_raw_digest_keys(tmp_path: Path) -> None:
+    raw = "2026-02-24|Asia/Shanghai|repo:a/b|authors:*"
+    db_path = tmp_path / "state.sqlite3"
+    store = CommitDigestStateStore(db_path)
+    try:
+        store.begin()
+        store.record(
+            DigestRunState(
+                digest_key=raw,
+                date="2026-02-24",
+                timezone="Asia/Shanghai",
+                repos="a/b",
+                authors="*",
+                status="success",
+                trace_id="trace1",
+                commit_count=3,
+                chunk_count=1,
+                error_message=None,
+            ),
+            force_send=False,
+        )
+        store.commit()
+    finally:
+        store.close()
+
+    reopened = CommitDigestStateStore(db_path)
+    try:
+        assert reopened.is_success(hash_digest_key(raw)) is True
+        assert reopened.is_success(raw) is False
+    finally:
+        reopened.close()
@@ -10,7 +10,7 @@ from agos.config import (
     commit_digest_repos, feishu_bot_msg_type,
     notify_provider, notify_system_alerts_enabled,
     commit_digest_include_categories, commit_digest_include_risk,
-    commit_digest_risk_paths, commit_digest_exclude_types,
+    commit_digest_risk_paths, commit_digest_exclude_types, commit_digest_incremental,
 )
 
 
@@ -37,6 +37,11 @@ class TestPaths:
         assert d.exists()
         assert d.is_dir()
 
+    def test_log_dir_env_override(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("AGOS_LOG_DIR", str(tmp_path / "custom_logs"))
+        assert log_dir() == tmp_path / "custom_logs"
+        assert log_dir().is_dir()
+
 
 class TestApiKeys:
     def test_openrouter_key_from_env(self, monkeypatch):
@@ -113,3 +118,9 @@ class TestCommitDigestCategoryConfig:
     def test_commit_digest_exclude_types(self, monkeypatch):
         monkeypatch.setenv("COMMIT_DIGEST_EXCLUDE_TYPES", "docs,chore")
         assert commit_digest_exclude_types() == {"docs", "chore"}
+
+    def test_commit_digest_incremental_defaults_off(self, monkeypatch):
+        monkeypatch.delenv("COMMIT_DIGEST_INCREMENTAL", raising=False)
+        assert commit_digest_incremental() is False
+        monkeypatch.setenv("COMMIT_DIGEST_INCREMENTAL", "on")
+        assert commit_digest_incremental() is True
@@ -154,3 +154,60 @@ def test_sync_to_feishu_daily_log_handles_bridge_error(monkeypatch):
     monkeypatch.delenv("FEISHU_DAILY_BRIEFING_DOC_TOKEN", raising=False)
     ok = briefing.sync_to_feishu_daily_log(r, bridge=_FakeBridge())
     assert ok is False
+
+
+def _note(title: str, score: float, status: str, created: str):
+    return SimpleNamespace(
+        title=title, filename=f"{title}.md", score=score, status=status, created=created, source="", host=""
+    )
+
+
+def test_build_report_picks_top_recent_and_focus_in_one_pass():
+    today = datetime.now().strftime("%Y-%m-%d")
+    notes = [_note(f"recent{i}", 5.0 + i * 0.5, "done", today) for i in range(7)]
+    notes += [_note("old-high", 9.6, "pending", "2000-01-01"), _note("old-mid", 9.2, "pending", "2000-01-01")]
+    r = SimpleNamespace(
+        health_score=95.0,
+        orphan_axioms=[],
+        backlog_issues=[],
+        error=0,
+        error_types={},
+        total=len(notes),
+        pending=2,
+        done=7,
+        bottleneck="",
+        notes=notes,
+        last_bouncer_run=datetime.now(),
+        last_inbox_run=datetime.now(),
+        bouncer_7day=[0] * 7,
+        throughput_7day=[0] * 7,
+    )
+
+    text = build_report(r)
+    recent = text.split("近期高价值入库", 1)[1].split("\n\n", 1)[0]
+    assert [f"recent{i}" in recent for i in range(7)] == [False, False, True, True, True, True, True]
+    assert recent.index("recent6") < recent.index("recent2")
+    assert "今日重点阅读" in text and "old-high" in text.split("今日重点阅读", 1)[1]
+
+
+def test_sparkline_scales_counts_to_bars():
+    assert briefing.sparkline([2, 4, 6, 8, 5, 7, 3]) == "▂▄▆█▅▇▃"
+    assert briefing.sparkline([0, 1, 3]) == " ▂█"
+    assert briefing.sparkline([]) == briefing.sparkline([0, 0]) == "─" * 7
+
+
+def test_medal_and_health_thresholds_are_inclusive():
+    assert [briefing.score_medal(s) for s in (8.4, 8.5, 9.0, 9.49, 9.5)] == ["⭐️", "🥇", "🏆", "🏆", "💎"]
+    assert [briefing.health_emoji(s) for s in (59.9, 60, 84.9, 85)] == ["🔴", "🟡", "🟡", "🟢"]
+
+
+def test_local_fallback_strips_report_html_tags():
+    text = '<b>A</b> <i>B</i> <code>c</code> <a href="https://e.com/x">T</a> <bogus>'
+    assert briefing._HTML_TAG_RE.sub("", text) == "A B c T <bogus>"
+
+
+def test_cron_helpers_use_supplied_now():
+    now = datetime(2026, 3, 1, 12, 0)
+    assert briefing.fmt_cron_time(datetime(2026, 3, 1, 9, 0), now=now) == "✅ 09:00 (3h 前)"
+    assert briefing.is_cron_stale(datetime(2026, 2, 28, 9, 0), now=now) is True
+    assert briefing.is_cron_stale(datetime(2026, 2, 28, 11, 0), now=now) is False
@@ -1,5 +1,6 @@
 """inbox_processor -> stats -> daily_briefing 错误类型联动测试。"""
 
+import asyncio
 from pathlib import Path
 
 from agents.inbox_processor import inbox_processor
@@ -16,7 +17,7 @@ def test_error_type_flows_from_processor_to_briefing(tmp_vault, monkeypatch):
         "source": "https://example.com/article",
     }
 
-    def _fake_nlm(*args, **kwargs):
+    async def _fake_nlm(*args, **kwargs):
         return {
             "success": False,
             "error": "mock timeout",
@@ -28,7 +29,7 @@ def test_error_type_flows_from_processor_to_briefing(tmp_vault, monkeypatch):
 
     monkeypatch.setattr(inbox_processor, "process_with_notebooklm", _fake_nlm)
 
-    outcome = inbox_processor.process_note(note, dry_run=False)
+    outcome = asyncio.run(inbox_processor.process_note(note, dry_run=False))
     assert outcome["success"] is False
     assert outcome["error_type"] == "report_wait_timeout"
 
@@ -0,0 +1,35 @@
+"""agos.fastjson 单元测试（orjson 与标准库回退两条路径）。"""
+
+import json
+
+import pytest
+
+import agos.fastjson as fastjson
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(fastjson, "orjson", None)
+    elif fastjson.orjson is None:
+        pytest.skip("orjson not installed")
+    return request.param
+
+
+def test_roundtrip_keeps_unicode(backend):
+    payload = {"name": "反馈回路", "score": 9.5, "tags": ["a", "b"]}
+    text = fastjson.dumps(payload)
+    assert "反馈回路" in text
+    assert fastjson.loads(text) == payload
+    assert fastjson.loads(text.encode("utf-8")) == payload
+
+
+def test_indent_output_matches_stdlib_shape(backend):
+    payload = [{"axiom": "x", "title": "t"}]
+    assert json.loads(fastjson.dumps(payload, indent=True)) == payload
+    assert "\n  " in fastjson.dumps(payload, indent=True)
+
+
+def test_invalid_json_raises_json_decode_error(backend):
+    with pytest.raises(json.JSONDecodeError):
+        fastjson.loads("not json")
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import asyncio
 import httpx
 import pytest
 import json
 
-from skills.feishu_bot_sender.sender import build_feishu_signature, send_feishu_webhook, FeishuBotSendError
+from skills.feishu_bot_sender.sender import (
+    FeishuBotSendError,
+    build_feishu_signature,
+    send_feishu_webhook,
+    send_feishu_webhook_async,
+)
 
 
 def test_build_signature_non_empty() -> None:
@@ -46,3 +52,33 @@ def test_send_webhook_non_zero_code_raises() -> None:
             )
     finally:
         client.close()
+
+
+def test_send_webhook_http_error_carries_retry_after() -> None:
+    client = httpx.Client(
+        transport=httpx.MockTransport(lambda req: httpx.Response(429, headers={"Retry-After": "7"}, json={}))
+    )
+    try:
+        with pytest.raises(FeishuBotSendError) as excinfo:
+            send_feishu_webhook(
+                webhook="https://open.feishu.cn/open-apis/bot/v2/hook/xxxx",
+                payload={"msg_type": "text", "content": {"text": "hello"}},
+                client=client,
+            )
+    finally:
+        client.close()
+    assert excinfo.value.retry_after == 7.0
+
+
+def test_send_webhook_async_success() -> None:
+    async def _run() -> dict:
+        transport = httpx.MockTransport(lambda req: httpx.Response(200, json={"code": 0, "msg": "ok"}))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await send_feishu_webhook_async(
+                webhook="https://open.feishu.cn/open-apis/bot/v2/hook/xxxx",
+                payload={"msg_type": "text", "content": {"text": "hello"}},
+                secret="s",
+                client=client,
+            )
+
+    assert asyncio.run(_run())["code"] == 0
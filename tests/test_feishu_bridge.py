@@ -777,3 +777,66 @@ def test_health_contains_probe_breakdown() -> None:
     assert health["probes"]["read_ok"] is True
     assert health["probes"]["write_ok"] is True
     assert health["probes"]["bitable_ok"] is True
+
+
+def test_tenant_token_cached_on_disk_across_bridges(tmp_path) -> None:
+    calls = {"auth": 0}
+
+    def handler(req: httpx.Request) -> httpx.Response:
+        if req.url.path.endswith("/auth/v3/tenant_access_token/internal"):
+            calls["auth"] += 1
+            return httpx.Response(200, json={"code": 0, "tenant_access_token": "disk-token", "expire": 7200})
+        if req.url.path.endswith("/open-apis/docx/v1/documents/doc-1/raw_content"):
+            assert req.headers["Authorization"] == "Bearer disk-token"
+            return httpx.Response(200, json={"code": 0, "data": {"content": "hi"}})
+        raise AssertionError(f"unexpected path: {req.url.path}")
+
+    cache_file = tmp_path / "feishu_token.json"
+    config = BridgeConfig(app_id="id", app_secret="secret", document_id="doc-1", token_cache_file=cache_file)
+    first = FeishuDocBridge(config, client=httpx.Client(transport=httpx.MockTransport(handler)))
+    first.read_doc()
+    assert json.loads(cache_file.read_text())["access_token"] == "disk-token"
+    assert (cache_file.stat().st_mode & 0o777) == 0o600
+
+    second = FeishuDocBridge(config, client=httpx.Client(transport=httpx.MockTransport(handler)))
+    second.read_doc()
+    assert calls["auth"] == 1
+
+    other_app = BridgeConfig(app_id="other", app_secret="s", document_id="doc-1", token_cache_file=cache_file)
+    assert FeishuDocBridge(other_app)._tenant_access_token == ""
+
+    other_host = BridgeConfig(
+        app_id="id", app_secret="secret", base_url="https://open.larksuite.com", token_cache_file=cache_file
+    )
+    assert FeishuDocBridge(other_host)._tenant_access_token == ""
+
+
+def test_invalid_token_code_drops_cached_token_and_refreshes(tmp_path) -> None:
+    calls = {"auth": 0, "doc": 0}
+
+    def handler(req: httpx.Request) -> httpx.Response:
+        if req.url.path.endswith("/auth/v3/tenant_access_token/internal"):
+            calls["auth"] += 1
+            return httpx.Response(200, json={"code": 0, "tenant_access_token": "fresh-token", "expire": 7200})
+        if req.url.path.endswith("/open-apis/docx/v1/documents/doc-1/raw_content"):
+            calls["doc"] += 1
+            if req.headers["Authorization"] == "Bearer revoked-token":
+                return httpx.Response(200, json={"code": 99991663, "msg": "invalid access token"})
+            return httpx.Response(200, json={"code": 0, "data": {"content": "hi"}})
+        raise AssertionError(f"unexpected path: {req.url.path}")
+
+    cache_file = tmp_path / "feishu_token.json"
+    config = BridgeConfig(
+        app_id="id", app_secret="secret", document_id="doc-1", retry_delay_seconds=0, token_cache_file=cache_file
+    )
+    cache_file.write_text(
+        json.dumps(
+            {"app_id": "id", "base_url": config.base_url, "access_token": "revoked-token", "expires_at": 9999999999}
+        )
+    )
+    bridge = FeishuDocBridge(config, client=httpx.Client(transport=httpx.MockTransport(handler)))
+    assert bridge._tenant_access_token == "revoked-token"
+
+    bridge.read_doc()
+    assert calls == {"auth": 1, "doc": 2}
+    assert json.loads(cache_file.read_text())["access_token"] == "fresh-token"
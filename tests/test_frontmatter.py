@@ -1,6 +1,8 @@
 """agos.frontmatter 单元测试。"""
 
-from agos.frontmatter import parse_frontmatter, build_content
+import io
+
+from agos.frontmatter import parse_frontmatter, build_content, read_frontmatter, read_frontmatter_block
 
 
 class TestParseFrontmatter:
@@ -47,6 +49,31 @@ Body text here.
         assert fm == {}
 
 
+class TestReadFrontmatter:
+    def test_stops_at_closing_delimiter(self):
+        fh = io.StringIO("---\ntags:\n  - WebClip\nscore: 8.5\n---\n\n# Title\nBody\n")
+        fm, consumed = read_frontmatter(fh)
+        assert fm == {"tags": ["WebClip"], "score": 8.5}
+        assert consumed.endswith("---\n")
+        assert fh.read() == "\n# Title\nBody\n"
+
+    def test_no_frontmatter_reads_first_line_only(self):
+        fh = io.StringIO("# Plain\nsecond line\n")
+        fm, consumed = read_frontmatter(fh)
+        assert fm == {}
+        assert consumed == "# Plain\n"
+        assert fh.read() == "second line\n"
+
+    def test_unclosed_frontmatter(self):
+        fm, _ = read_frontmatter(io.StringIO("---\ntags:\n  - Test\nno closing delimiter"))
+        assert fm == {}
+
+    def test_block_returns_raw_header_without_parsing(self):
+        fh = io.StringIO("---\nscore: [unclosed\n---\nBody\n")
+        assert read_frontmatter_block(fh) == "---\nscore: [unclosed\n---\n"
+        assert fh.read() == "Body\n"
+
+
 class TestBuildContent:
     def test_roundtrip(self):
         original_fm = {"tags": ["Axiom"], "score": 8.5}
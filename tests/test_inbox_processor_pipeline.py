@@ -1,13 +1,123 @@
 """inbox_processor 关键路径测试。"""
 
-from agents.inbox_processor.inbox_processor import _run, process_note, build_telegram_report
+import asyncio
+from contextlib import asynccontextmanager
+from pathlib import Path
+from types import SimpleNamespace
 
+from agents.inbox_processor import inbox_processor
+from agents.inbox_processor.inbox_processor import process_note, build_telegram_report
 
-def test_run_returns_127_for_missing_binary():
-    rc, out, err = _run(["definitely_missing_cmd_12345"], timeout=1)
-    assert rc == 127
-    assert out == ""
-    assert "命令不存在" in err
+
+class _FakeNotebookLM:
+    """模拟 NotebookLMClient 的 notebooks/sources/artifacts 三个子 API。"""
+
+    def __init__(self, wait_exc=None):
+        self.calls = []
+        self.polls = []
+        self._wait_exc = wait_exc
+        self.notebooks = self.sources = self.artifacts = self
+
+    async def create(self, title):
+        self.calls.append("create")
+        return SimpleNamespace(id="nb-12345678")
+
+    async def add_url(self, notebook_id, url):
+        self.calls.append("add_url")
+        return SimpleNamespace(id="src-1")
+
+    async def wait_until_ready(self, notebook_id, source_id, timeout, **poll):
+        self.calls.append("wait_until_ready")
+        self.polls.append(poll)
+
+    async def generate_report(self, notebook_id, report_format, language):
+        self.calls.append(report_format)
+        return SimpleNamespace(task_id="task-1")
+
+    async def wait_for_completion(self, notebook_id, task_id, timeout, **poll):
+        self.calls.append("wait_for_completion")
+        self.polls.append(poll)
+        if self._wait_exc:
+            raise self._wait_exc
+        return SimpleNamespace(is_complete=True, error=None, status="completed")
+
+    async def download_report(self, notebook_id, output_path, artifact_id):
+        self.calls.append("download_report")
+        self.downloaded_to = Path(output_path)
+        Path(output_path).write_text("# report", encoding="utf-8")
+        return output_path
+
+
+def test_process_with_notebooklm_uses_client_api():
+    client = _FakeNotebookLM()
+    result = asyncio.run(inbox_processor.process_with_notebooklm("T", "https://e.com/a", "n.md", client))
+    assert result["success"] is True
+    assert result["notebook_id"] == "nb-12345678"
+    assert result["report"] == "# report"
+    assert client.calls == [
+        "create", "add_url", "wait_until_ready", "study_guide", "wait_for_completion", "download_report",
+    ]
+    assert not client.downloaded_to.exists()
+    assert all(p["initial_interval"] == 1.0 and p["max_interval"] == 30.0 for p in client.polls)
+
+
+def test_process_with_notebooklm_maps_wait_timeout():
+    client = _FakeNotebookLM(wait_exc=TimeoutError("slow"))
+    result = asyncio.run(inbox_processor.process_with_notebooklm("T", "", "n.md", client))
+    assert result["success"] is False
+    assert result["error_type"] == "report_wait_timeout"
+    assert "add_url" not in client.calls
+
+
+def test_process_all_runs_notes_concurrently_and_keeps_order(monkeypatch):
+    active = {"now": 0, "peak": 0}
+
+    opened = []
+
+    @asynccontextmanager
+    async def _fake_open():
+        opened.append(1)
+        yield "client"
+
+    async def _fake_process_note(note, dry_run=False, client=None):
+        assert client == "client"
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.01 * (5 - note["id"]))
+        active["now"] -= 1
+        return {"id": note["id"]}
+
+    monkeypatch.setattr(inbox_processor, "process_note", _fake_process_note)
+    monkeypatch.setattr(inbox_processor, "_open_notebooklm", _fake_open)
+    monkeypatch.setattr(inbox_processor, "INBOX_CONCURRENCY", 2)
+    monkeypatch.setattr(inbox_processor.random, "uniform", lambda a, b: 0)
+    results = asyncio.run(inbox_processor.process_all([{"id": i} for i in range(5)]))
+    assert [r["id"] for r in results] == list(range(5))
+    assert active["peak"] == 2
+    assert opened == [1]
+
+
+def test_process_all_marks_notes_failed_when_client_cannot_open(monkeypatch):
+    @asynccontextmanager
+    async def _broken_open():
+        raise RuntimeError("storage expired")
+        yield
+
+    updates = []
+    monkeypatch.setattr(inbox_processor, "_open_notebooklm", _broken_open)
+    monkeypatch.setattr(inbox_processor, "update_frontmatter", lambda name, fields: updates.append((name, fields)))
+    monkeypatch.setattr(inbox_processor.random, "uniform", lambda a, b: 0)
+    pending = [
+        {"path": f"/v/00_Inbox/n{i}.md", "title": f"T{i}", "score": 9.0, "source": "https://e.com"}
+        for i in range(2)
+    ]
+    results = asyncio.run(inbox_processor.process_all(pending))
+    assert [r["error_type"] for r in results] == ["notebook_create_failed"] * 2
+    assert all("storage expired" in r["error"] for r in results)
+    assert [(name, fields["status"], fields["error_type"]) for name, fields in updates] == [
+        ("n0.md", "error", "notebook_create_failed"),
+        ("n1.md", "error", "notebook_create_failed"),
+    ]
 
 
 def test_process_note_dry_run(tmp_vault):
@@ -17,7 +127,7 @@ def test_process_note_dry_run(tmp_vault):
         "score": 9.2,
         "source": "https://example.com/article",
     }
-    result = process_note(note, dry_run=True)
+    result = asyncio.run(process_note(note, dry_run=True))
     assert result["success"] is True
     assert result["title"] == "Test Article"
     assert result["note_path"].endswith("Bouncer - Test Article.md")
@@ -0,0 +1,132 @@
+"""knowledge_auditor 审计逻辑测试。"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from agents.knowledge_auditor.auditor import Auditor
+
+
+def _write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_audits_reuse_single_read_pass(tmp_vault, monkeypatch):
+    old = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+    _write(tmp_vault / "00_Inbox" / "Old.md", f'---\nstatus: pending\ncreated: "{old}"\ntitle: Old\nscore: 8.5\n---\n')
+    _write(tmp_vault / "00_Inbox" / "Done.md", "---\nstatus: done\n---\n[[Axiom - Used]]\n")
+    _write(tmp_vault / "Axiom - Used.md", "body")
+    _write(tmp_vault / "Axiom - Lonely.md", "body")
+    _write(tmp_vault / "认知架构地图.md", "[[Axiom - Lonely]]")
+
+    auditor = Auditor(tmp_vault)
+    def _no_reread(*args, **kwargs):
+        raise AssertionError("re-read")
+
+    monkeypatch.setattr(Path, "read_text", _no_reread)
+    monkeypatch.setattr(Path, "open", _no_reread)
+
+    assert auditor.audit_orphans() == ["Axiom - Lonely"]
+    assert "Old" in [b["title"] for b in auditor.audit_backlog()]
+    assert auditor.audit_metadata() == ["Done"]
+
+
+def test_cached_frontmatter_gives_same_audits(tmp_vault):
+    _write(tmp_vault / "00_Inbox" / "Old.md", "---\nstatus: pending\ncreated: 2000-01-01\ntitle: Old\nscore: 8.5\n---\n")
+    first = Auditor(tmp_vault)
+    second = Auditor(tmp_vault)
+    assert second.audit_backlog() == first.audit_backlog()
+    assert "Old" in [b["title"] for b in second.audit_backlog()]
+
+
+def test_orphans_count_links_in_frontmatter_and_body(tmp_vault):
+    _write(tmp_vault / "Axiom - A.md", "body")
+    _write(tmp_vault / "Axiom - B.md", "body")
+    _write(tmp_vault / "Axiom - C.md", "body")
+    _write(tmp_vault / "Note.md", '---\nrelated: "[[Axiom - A|alias]]"\n---\ntext [[Axiom - B#h]] and [[Missing]]\n')
+
+    auditor = Auditor(tmp_vault)
+    assert auditor.audit_orphans() == ["Axiom - C"]
+
+
+def test_vault_walk_skips_hidden_entries(tmp_vault):
+    _write(tmp_vault / ".obsidian" / "Axiom - Hidden.md", "body")
+    _write(tmp_vault / "sub" / ".draft.md", "body")
+    _write(tmp_vault / "sub" / "deep" / "Axiom - Visible.md", "body")
+
+    files = {f.relative_to(tmp_vault).as_posix() for f in Auditor(tmp_vault).all_files}
+    assert "sub/deep/Axiom - Visible.md" in files
+    assert not any(part.startswith(".") for f in files for part in f.split("/"))
+
+
+def test_frontmatter_parsed_only_for_audited_statuses(tmp_path):
+    from agents.knowledge_auditor.auditor import _scan_note
+
+    note = tmp_path / "n.md"
+    for status_line, expect_parsed in [
+        ('status: "done"  # 已处理', True),
+        ("status: pending", True),
+        ("status: error", False),
+        ("  status: done", False),
+    ]:
+        note.write_text(f"---\n{status_line}\nsource: s\n---\nbody\n", encoding="utf-8")
+        fm, _ = _scan_note(note, True)
+        assert bool(fm) is expect_parsed, status_line
+    assert _scan_note(note, False)[0] == {}
+
+
+def test_process_pool_scan_matches_thread_scan(tmp_vault, monkeypatch):
+    import agents.knowledge_auditor.auditor as auditor_module
+
+    _write(tmp_vault / "Axiom - A.md", "body")
+    _write(tmp_vault / "Axiom - B.md", "[[Axiom - A]]")
+    threaded = Auditor(tmp_vault)
+
+    monkeypatch.setattr(auditor_module, "PROCESS_SCAN_MIN_FILES", 1)
+    monkeypatch.setattr(auditor_module.os, "cpu_count", lambda: 2)
+    pooled = Auditor(tmp_vault, cache_db=tmp_vault / "pooled_scan.sqlite3")
+
+    assert pooled.audit_orphans() == threaded.audit_orphans() == ["Axiom - B"]
+    assert pooled.audit_metadata() == threaded.audit_metadata()
+
+
+def test_scan_cache_accepts_non_string_frontmatter_keys(tmp_vault):
+    _write(tmp_vault / "Dated.md", "---\nstatus: pending\n2024-01-01: x\n---\n")
+    first = Auditor(tmp_vault)
+    assert first._frontmatter[tmp_vault / "Dated.md"]["status"] == "pending"
+    second = Auditor(tmp_vault)
+    assert second._frontmatter[tmp_vault / "Dated.md"] == {"status": "pending", "2024-01-01": "x"}
+
+
+def test_scan_cache_rescans_only_changed_notes(tmp_vault, monkeypatch):
+    import os
+
+    import agents.knowledge_auditor.auditor as auditor_module
+
+    _write(tmp_vault / "Axiom - A.md", "body")
+    ref = tmp_vault / "Ref.md"
+    _write(ref, "[[Axiom - A]]")
+    assert Auditor(tmp_vault).audit_orphans() == []
+
+    scanned = []
+    real_scan = auditor_module._scan_note
+
+    def _tracking(f, want_fm):
+        scanned.append(f.name)
+        return real_scan(f, want_fm)
+
+    monkeypatch.setattr(auditor_module, "_scan_note", _tracking)
+    assert Auditor(tmp_vault).audit_orphans() == []
+    assert scanned == []
+
+    _write(ref, "no links any more")
+    st = ref.stat()
+    os.utime(ref, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert Auditor(tmp_vault).audit_orphans() == ["Axiom - A"]
+    assert scanned == ["Ref.md"]
+
+    ref.unlink()
+    cached = auditor_module.AuditScanCache(auditor_module.auditor_scan_cache_db_file())
+    Auditor(tmp_vault)
+    assert str(ref) not in cached.load(tmp_vault)
+    cached.close()
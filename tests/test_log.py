@@ -0,0 +1,30 @@
+"""agos.log 单元测试。"""
+
+import logging
+
+import pytest
+
+from agos.log import CurrentStreamHandler
+
+
+def test_handler_follows_replaced_streams(capsys):
+    logger = logging.getLogger("agos.test_log")
+    logger.propagate = False
+    out, err = CurrentStreamHandler("stdout"), CurrentStreamHandler()
+    logger.addHandler(out)
+    logger.addHandler(err)
+    try:
+        # 先构造 handler，再由 capsys 替换流：写出时仍应落到当前流
+        capsys.readouterr()
+        logger.warning("hello")
+        captured = capsys.readouterr()
+        assert captured.out == "hello\n"
+        assert captured.err == "hello\n"
+    finally:
+        logger.removeHandler(out)
+        logger.removeHandler(err)
+
+
+def test_handler_rejects_unknown_stream():
+    with pytest.raises(ValueError):
+        CurrentStreamHandler("stdin")
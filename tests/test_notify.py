@@ -3,6 +3,7 @@
 from unittest.mock import MagicMock, patch
 
 from agos.notify import (
+    _split_telegram_text,
     clear_alert_events,
     list_recent_alert_events,
     send_bouncer_report,
@@ -22,33 +23,53 @@ class TestSendMessage:
         monkeypatch.setenv("TELEGRAM_CHAT_ID", "")
         assert send_message("test") is False
 
-    @patch("agos.notify.requests.post")
-    def test_successful_send(self, mock_post, monkeypatch):
+    @patch("agos.notify._telegram_session")
+    def test_successful_send(self, mock_session, monkeypatch):
         monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "fake-token")
         monkeypatch.setenv("TELEGRAM_CHAT_ID", "12345")
 
         mock_resp = MagicMock()
         mock_resp.status_code = 200
         mock_resp.json.return_value = {"ok": True}
-        mock_post.return_value = mock_resp
+        mock_session.return_value.post.return_value = mock_resp
 
         result = send_message("Hello!")
         assert result is True
-        mock_post.assert_called_once()
+        mock_session.return_value.post.assert_called_once()
 
-    @patch("agos.notify.requests.post")
-    def test_api_error_returns_false(self, mock_post, monkeypatch):
+    @patch("agos.notify._telegram_session")
+    def test_api_error_returns_false(self, mock_session, monkeypatch):
         monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "fake-token")
         monkeypatch.setenv("TELEGRAM_CHAT_ID", "12345")
 
         mock_resp = MagicMock()
         mock_resp.status_code = 403
         mock_resp.text = "Forbidden"
-        mock_post.return_value = mock_resp
+        mock_session.return_value.post.return_value = mock_resp
 
         result = send_message("Hello!")
         assert result is False
 
+    @patch("agos.notify._telegram_session")
+    def test_long_text_split_into_multiple_sends(self, mock_session, monkeypatch):
+        monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "fake-token")
+        monkeypatch.setenv("TELEGRAM_CHAT_ID", "12345")
+
+        mock_resp = MagicMock()
+        mock_resp.status_code = 200
+        mock_resp.json.return_value = {"ok": True}
+        mock_session.return_value.post.return_value = mock_resp
+
+        assert send_message("\n".join(["x" * 100] * 60)) is True
+        texts = [c.kwargs["json"]["text"] for c in mock_session.return_value.post.call_args_list]
+        assert len(texts) == 2
+        assert all(len(t) <= 4096 for t in texts)
+
+    def test_split_keeps_lines_and_hard_cuts_overlong(self):
+        assert _split_telegram_text("a\nb") == ["a\nb"]
+        assert _split_telegram_text("ab\ncd", limit=4) == ["ab", "cd"]
+        assert _split_telegram_text("abcdefghij", limit=4) == ["abcd", "efgh", "ij"]
+
 
 class TestSendBouncerReport:
     @patch("agos.notify.send_message")
@@ -27,3 +27,5 @@ created: "2026-02-22"
     report = collect()
     assert report.error >= 1
     assert report.error_types.get("report_download_failed", 0) >= 1
+    note = next(n for n in report.notes if n.filename == err_note.name)
+    assert note.host == "example.com"
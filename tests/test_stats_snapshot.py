@@ -0,0 +1,66 @@
+"""stats collect() 快照缓存测试。"""
+
+import os
+import time
+
+from scripts import stats
+
+
+def test_collect_cached_reuses_fresh_snapshot_until_invalidated(tmp_path, monkeypatch):
+    calls = []
+
+    def _fake_collect():
+        calls.append(1)
+        return stats.StatsReport(total=len(calls))
+
+    monkeypatch.setattr(stats, "_snapshot_path", lambda: tmp_path / "stats_snapshot.pkl")
+    monkeypatch.setattr(stats, "collect", _fake_collect)
+
+    assert stats.collect_cached().total == 1
+    assert stats.collect_cached().total == 1
+    assert stats.collect_cached(force_refresh=True).total == 2
+
+    stats.invalidate_snapshot()
+    assert stats.collect_cached().total == 3
+
+    stale = time.time() - stats.SNAPSHOT_MAX_AGE_SEC - 1
+    os.utime(tmp_path / "stats_snapshot.pkl", (stale, stale))
+    assert stats.collect_cached().total == 4
+
+
+def test_collect_cached_rescans_when_snapshot_is_corrupt(tmp_path, monkeypatch):
+    snapshot = tmp_path / "stats_snapshot.pkl"
+    snapshot.write_bytes(b"not a pickle")
+    monkeypatch.setattr(stats, "_snapshot_path", lambda: snapshot)
+    monkeypatch.setattr(stats, "collect", lambda: stats.StatsReport(total=7))
+
+    assert stats.collect_cached().total == 7
+    assert stats.collect_cached().total == 7
+
+
+def test_collect_cached_keys_snapshot_by_vault_and_inbox(tmp_path, monkeypatch):
+    calls = []
+
+    def _fake_collect():
+        calls.append(1)
+        return stats.StatsReport(total=len(calls))
+
+    vault_a, vault_b = tmp_path / "a", tmp_path / "b"
+    (vault_a / "00_Inbox").mkdir(parents=True)
+    (vault_b / "00_Inbox").mkdir(parents=True)
+    monkeypatch.setattr(stats, "_snapshot_path", lambda: tmp_path / "stats_snapshot.pkl")
+    monkeypatch.setattr(stats, "collect", _fake_collect)
+
+    monkeypatch.setenv("OBSIDIAN_VAULT", str(vault_a))
+    assert stats.collect_cached().total == 1
+    assert stats.collect_cached().total == 1
+
+    monkeypatch.setenv("OBSIDIAN_VAULT", str(vault_b))
+    assert stats.collect_cached().total == 2
+
+    # 其他写入方（如 Bouncer）新增笔记会改变 Inbox 目录 mtime，快照随之失效
+    inbox = vault_b / "00_Inbox"
+    (inbox / "New.md").write_text("---\nstatus: pending\n---\n", encoding="utf-8")
+    st = inbox.stat()
+    os.utime(inbox, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert stats.collect_cached().total == 3
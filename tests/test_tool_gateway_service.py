@@ -49,3 +49,79 @@ def test_comment_pr_dry_run_has_no_side_effect() -> None:
     result = asyncio.run(service.comment_pr(owner="o", repo="r", pr_number=7, body="hello", dry_run=True))
     assert result["dry_run"] is True
     assert result["external_id"] == "o/r#7"
+
+
+def test_async_with_reuses_one_client_for_all_requests(monkeypatch: pytest.MonkeyPatch) -> None:
+    created: list[httpx.AsyncClient] = []
+    real_client = httpx.AsyncClient
+
+    def _factory(**kwargs):
+        kwargs.pop("http2", None)
+        client = real_client(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=[])), **kwargs)
+        created.append(client)
+        return client
+
+    monkeypatch.setattr("apps.tool_gateway.github_service.httpx.AsyncClient", _factory)
+    service = GitHubService(token="x")
+
+    async def _run() -> None:
+        async with service:
+            await service.list_open_prs(owner="o", repo="r", per_page=10)
+            await service.list_open_prs(owner="o", repo="r2", per_page=10)
+        assert service._client is None
+        await service.list_open_prs(owner="o", repo="r3", per_page=10)
+
+    asyncio.run(_run())
+    assert len(created) == 2
+    assert all(client.is_closed for client in created)
+
+
+def test_request_page_sends_if_none_match_and_reports_304(monkeypatch: pytest.MonkeyPatch) -> None:
+    seen: list[str | None] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json=[{"sha": "a"}], headers={"ETag": '"v1"'})
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        "apps.tool_gateway.github_service.httpx.AsyncClient",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), timeout=kwargs.get("timeout")),
+    )
+    service = GitHubService(token="x")
+
+    first = asyncio.run(service._request_page(path="/repos/o/r/commits"))
+    second = asyncio.run(service._request_page(path="/repos/o/r/commits", etag=first.headers["ETag"]))
+
+    assert seen == [None, '"v1"']
+    assert first.payload == [{"sha": "a"}] and not first.not_modified
+    assert second.not_modified and second.payload is None
+
+
+def test_request_refuses_absolute_url_outside_base() -> None:
+    service = GitHubService(token="x")
+    with pytest.raises(ToolGatewayError):
+        asyncio.run(service._request_page(path="https://evil.example.com/repos/o/r/commits?page=2"))
+
+
+def test_request_refuses_lookalike_host_with_base_prefix() -> None:
+    service = GitHubService(token="x")
+    with pytest.raises(ToolGatewayError):
+        asyncio.run(service._request_page(path="https://api.github.com.evil.com/repos/o/r/commits?page=2"))
+
+
+def test_async_with_uses_injected_client_without_closing_it() -> None:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=[])))
+    service = GitHubService(token="x", http_client=client)
+
+    async def _run() -> None:
+        async with service:
+            assert service._client is client
+            await service.list_open_prs(owner="o", repo="r", per_page=10)
+        assert service._client is None
+        assert not client.is_closed
+        await client.aclose()
+
+    asyncio.run(_run())
@@ -40,14 +40,48 @@ def test_sync_weekly_report_creates_subdoc_and_appends(monkeypatch):
             calls.append(("append", markdown, section_title, document_id))
             return {"success": True}
 
-    monkeypatch.setattr(wr, "collect", _mock_report)
+    monkeypatch.setattr(wr, "collect_cached", lambda **kwargs: _mock_report())
     result = wr.sync_weekly_report(bridge=_FakeBridge(), today=datetime(2026, 2, 23))
 
     assert result["success"] is True
     assert calls[0][0] == "create"
-    assert calls[1][0] == "append"
-    assert calls[1][3] == "doc_weekly_1"
-    assert calls[2][0] == "append"
-    assert calls[2][2] is not None
-    assert calls[2][3] is None
+    # 先写正文，再挂索引链接
+    appends = calls[1:]
+    assert [c[0] for c in appends] == ["append", "append"]
+    assert appends[0][3] == "doc_weekly_1"
+    assert appends[1][2] is not None
+    assert appends[1][3] is None
 
+
+def test_sync_weekly_report_surfaces_append_failure(monkeypatch):
+    class _FailingBridge:
+        def create_sub_doc(self, title: str, folder_token=None):
+            return {"document_id": "doc_weekly_1", "url": ""}
+
+        def append_markdown(self, markdown: str, section_title=None, document_id=None):
+            if section_title is not None:
+                raise wr.FeishuBridgeError("section missing")
+            return {"success": True}
+
+    monkeypatch.setattr(wr, "collect_cached", lambda **kwargs: _mock_report())
+    result = wr.sync_weekly_report(bridge=_FailingBridge(), today=datetime(2026, 2, 23))
+    assert result == {"success": False, "message": "section missing"}
+
+
+def test_sync_weekly_report_skips_link_when_body_fails(monkeypatch):
+    link_calls = []
+
+    class _FailingBridge:
+        def create_sub_doc(self, title: str, folder_token=None):
+            return {"document_id": "doc_weekly_1", "url": ""}
+
+        def append_markdown(self, markdown: str, section_title=None, document_id=None):
+            if document_id is not None:
+                raise wr.FeishuBridgeError("body failed")
+            link_calls.append(markdown)
+            return {"success": True}
+
+    monkeypatch.setattr(wr, "collect_cached", lambda **kwargs: _mock_report())
+    result = wr.sync_weekly_report(bridge=_FailingBridge(), today=datetime(2026, 2, 23))
+    assert result == {"success": False, "message": "body failed"}
+    assert link_calls == []